@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Digital Worker VSC - Benchmarks dos caminhos críticos
+Gera corpora e templates sintéticos de tamanho crescente e mede vazão,
+latência (mínimo/mediana/máximo) e pico de memória, gravando uma baseline em JSON
+
+Uso:
+    python benchmarks/run_benchmarks.py                       # grava benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --quick --output /tmp/atual.json --compare benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from docx import Document
+import openpyxl
+
+from tools.document_reader import DocumentReader
+from tools.template_generator import TemplateGenerator
+from tools.template_processor import TemplateProcessor
+
+SEED = 658
+MIN_DELTA_MS = 1.0  # Piora absoluta mínima (ms) para contar como regressão
+WORDS = (
+    "sistema validação protocolo qualificação instalação operacional desempenho requisito "
+    "usuário risco auditoria trilha assinatura eletrônica backup restauração integridade "
+    "dados controle acesso versão servidor banco relatório evidência desvio aprovação"
+).split()
+
+
+# ========== GERADORES SINTÉTICOS ==========
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_marker_template(n, syntax='{{}}'):
+    """Template Markdown com n marcadores distribuídos em títulos, tabelas e texto"""
+    open_, close = ('{{', '}}') if syntax == '{{}}' else ('[[', ']]')
+    lines = ["# PROTOCOLO DE QUALIFICAÇÃO", ""]
+    for i in range(n):
+        key = f"{open_}CAMPO_{i}{close}"
+        kind = i % 4
+        if kind == 0:
+            lines.append(f"## Seção {i}: {key}")
+        elif kind == 1:
+            lines.append(f"| TI-{i:04d} | {key} | [ ] ✅ [ ] ❌ |")
+        elif kind == 2:
+            lines.append(f"- Item verificado: {key}")
+        else:
+            lines.append(f"O valor registrado para o teste {i} foi {key} conforme especificação.")
+    return "\n".join(lines) + "\n"
+
+
+def make_context(n, rng):
+    return {f"CAMPO_{i}": _sentence(rng, 4) for i in range(n)}
+
+
+LOOP_TEMPLATE = """# PROTOCOLO DE QUALIFICAÇÃO OPERACIONAL
+
+[[#each TESTES]]
+## [[INDICE]]. [[ID]] - [[DESCRICAO]]
+
+| Passo | Esperado | Resultado |
+|-------|----------|-----------|
+[[#each PASSOS]]
+| [[INDICE]] | [[ESPERADO]] | [[RESULTADO]] |
+[[/each]]
+
+[[/each]]"""
+
+
+def make_test_cases(n, rng):
+    """Lista estruturada de n casos de teste com 3 passos cada"""
+    return [{
+        'ID': f"TI-{i:05d}", 'DESCRICAO': _sentence(rng, 6),
+        'PASSOS': [{'ESPERADO': _sentence(rng, 4), 'RESULTADO': 'Aprovado'} for _ in range(3)],
+    } for i in range(n)]
+
+
+def make_markdown(n_blocks, rng):
+    """Markdown preenchido com n blocos (títulos, listas, parágrafos e tabelas)"""
+    lines = ["# RELATÓRIO DE QUALIFICAÇÃO", ""]
+    for i in range(n_blocks):
+        kind = i % 5
+        if kind == 0:
+            lines.append(f"## {i}. {_sentence(rng, 4)}")
+        elif kind == 1:
+            lines.extend(f"- {_sentence(rng, 6)}" for _ in range(3))
+        elif kind == 2:
+            lines.extend(f"{j + 1}. {_sentence(rng, 6)}" for j in range(3))
+        elif kind == 3:
+            lines.append("| ID | Verificação | Resultado |")
+            lines.append("|----|-------------|-----------|")
+            lines.extend(f"| TI-{i}-{j} | {_sentence(rng, 5)} | Aprovado |" for j in range(4))
+        else:
+            lines.append(f"**{_sentence(rng, 3)}**")
+            lines.append(_sentence(rng, 40))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def make_table_lines(n_rows, rng):
+    lines = ["| ID | Requisito | Esperado | Obtido | Resultado |", "|---|---|---|---|---|"]
+    lines.extend(
+        f"| REQ-{i:05d} | {_sentence(rng, 5)} | {_sentence(rng, 3)} | {_sentence(rng, 3)} | Aprovado |"
+        for i in range(n_rows)
+    )
+    return lines
+
+
+def _write_pdf(file_path, text):
+    """PDF mínimo (uma página, Helvetica) sem dependências externas"""
+    safe = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    stream = f"BT /F1 10 Tf 50 750 Td ({safe}) Tj ET".encode('latin-1', 'replace')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    Path(file_path).write_bytes(bytes(out))
+
+
+def make_corpus(root, n_docs, rng):
+    """Knowledge Base sintética com PDF, Word, Excel, Markdown e CSV"""
+    reader = DocumentReader(kb_path=root)
+    reader.ensure_folders()
+    for i in range(n_docs):
+        folder = Path(root) / reader.categories[i % len(reader.categories)] / f"lote_{i // 50}"
+        folder.mkdir(parents=True, exist_ok=True)
+        kind = i % 5
+        if kind == 0:
+            _write_pdf(folder / f"doc_{i}.pdf", _sentence(rng, 60))
+        elif kind == 1:
+            doc = Document()
+            for _ in range(20):
+                doc.add_paragraph(_sentence(rng, 15))
+            doc.save(folder / f"doc_{i}.docx")
+        elif kind == 2:
+            wb = openpyxl.Workbook()
+            sheet = wb.active
+            for r in range(30):
+                sheet.append([f"REQ-{r}", _sentence(rng, 4), "Aprovado"])
+            wb.save(folder / f"doc_{i}.xlsx")
+        elif kind == 3:
+            (folder / f"doc_{i}.md").write_text(make_markdown(10, rng), encoding='utf-8')
+        else:
+            rows = "\n".join(f"REQ-{r};{_sentence(rng, 4)};Aprovado" for r in range(30))
+            (folder / f"doc_{i}.csv").write_text("id;descricao;resultado\n" + rows, encoding='utf-8')
+    return reader
+
+
+def make_knowledge(n_docs, rng):
+    categories = ['manuais', 'especificacoes', 'documentos_empresa', 'normas', 'projeto_atual']
+    knowledge = {c: {} for c in categories}
+    for i in range(n_docs):
+        content = " ".join(_sentence(rng, 20) for _ in range(40))
+        knowledge[categories[i % 5]][f"doc_{i}.pdf"] = {
+            'path': f"knowledge_base/doc_{i}.pdf", 'content': content[:10000],
+            'full_size': len(content), 'type': '.pdf',
+        }
+    return knowledge
+
+
+# ========== CASOS DE BENCHMARK ==========
+# Cada caso recebe (tamanho, rng, pasta temporária) e devolve (função medida, itens por chamada)
+# ou (função medida, itens por chamada, preparo): o preparo roda fora da medição antes de
+# cada chamada e o seu retorno é passado à função medida
+
+def bench_fill_template(n, rng, tmp):
+    generator = TemplateGenerator()
+    template = make_marker_template(n)
+    context = make_context(n, rng)
+    return (lambda: generator._fill_template(template, dict(context))), n
+
+
+def bench_replace_placeholders(n, rng, tmp):
+    processor = TemplateProcessor()
+    template = make_marker_template(n, syntax='[[]]')
+    context = make_context(n, rng)
+    return (lambda: processor.replace_placeholders(template, context)), n
+
+
+def bench_each_loop(n, rng, tmp):
+    processor = TemplateProcessor()
+    context = {'TESTES': make_test_cases(n, rng)}
+    return (lambda: processor.fill(LOOP_TEMPLATE, context).blocks), n
+
+
+def bench_markdown_to_docx(n, rng, tmp):
+    processor = TemplateProcessor()
+    markdown = make_markdown(n, rng)
+    output = os.path.join(tmp, 'saida.docx')
+    return (lambda: processor.markdown_to_docx(markdown, output)), n
+
+
+def bench_add_table_to_doc(n, rng, tmp):
+    processor = TemplateProcessor()
+    table_lines = make_table_lines(n, rng)
+    # Document() custa mais que as tabelas pequenas: cria o documento no preparo
+    return (lambda doc: processor._add_table_to_doc(doc, table_lines)), n, Document
+
+
+def bench_extract_all_content(n, rng, tmp):
+    reader = make_corpus(os.path.join(tmp, 'kb'), n, rng)
+    return reader.extract_all_content, n
+
+
+def bench_search(n, rng, tmp):
+    reader = DocumentReader(kb_path=os.path.join(tmp, 'kb'))
+    reader.knowledge = make_knowledge(n, rng)
+    queries = ['trilha de auditoria', 'assinatura', 'termo inexistente xyz']
+    counter = iter(range(10 ** 9))
+    return (lambda: reader.search(queries[next(counter) % len(queries)])), n
+
+
+BENCHMARKS = {
+    'fill_template': (bench_fill_template, [100, 1000, 10000]),
+    'replace_placeholders': (bench_replace_placeholders, [100, 1000, 10000]),
+    'each_loop': (bench_each_loop, [100, 1000, 10000]),
+    'markdown_to_docx': (bench_markdown_to_docx, [10, 100, 500]),
+    'add_table_to_doc': (bench_add_table_to_doc, [10, 100, 500]),
+    'extract_all_content': (bench_extract_all_content, [10, 50, 200]),
+    'search': (bench_search, [100, 1000, 5000]),
+}
+
+
+# ========== EXECUÇÃO E RELATÓRIO ==========
+
+def _timed_call(func, setup):
+    """Executa uma chamada medindo só a função (o preparo fica de fora)"""
+    if setup is None:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    prepared = setup()
+    start = time.perf_counter()
+    func(prepared)
+    return time.perf_counter() - start
+
+
+def run_case(name, size, repeat, warmup):
+    """Mede um caso em um tamanho: latências, vazão e pico de memória
+
+    Com poucas repetições percentis altos (p95/p99) seriam apenas o máximo,
+    por isso o relatório traz mínimo, mediana e máximo.
+    """
+    factory = BENCHMARKS[name][0]
+    rng = random.Random(f"{SEED}-{name}-{size}")
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        func, items, *rest = factory(size, rng, tmp)
+        setup = rest[0] if rest else None
+
+        for _ in range(warmup):
+            _timed_call(func, setup)
+
+        samples = [_timed_call(func, setup) for _ in range(repeat)]
+
+        # Pico de memória em uma execução separada (tracemalloc distorce o tempo).
+        # Mede alocações Python; buffers internos do lxml (python-docx) não entram.
+        call = (lambda prepared=setup(): func(prepared)) if setup else func
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    median = statistics.median(samples)
+    return {
+        'size': size,
+        'repeat': repeat,
+        'throughput_items_s': round(items / median, 2) if median else None,
+        'latency_ms': {
+            'min': round(min(samples) * 1000, 3),
+            'p50': round(median * 1000, 3),
+            'max': round(max(samples) * 1000, 3),
+        },
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(current, baseline, tolerance, min_delta_ms=MIN_DELTA_MS):
+    """Lista regressões de latência p50 acima da tolerância
+
+    Uma diferença só conta como regressão se, além de passar da tolerância
+    relativa, piorar pelo menos min_delta_ms e também o melhor tempo atual
+    (mínimo) passar da tolerância sobre o p50 da baseline: uma mediana puxada
+    por algumas execuções lentas é ruído da máquina, não regressão.
+    """
+    regressions = []
+    for name, cases in current['benchmarks'].items():
+        previous = {c['size']: c for c in baseline.get('benchmarks', {}).get(name, [])}
+        for case in cases:
+            old = previous.get(case['size'])
+            if not old:
+                continue
+            ratio = case['latency_ms']['p50'] / old['latency_ms']['p50'] if old['latency_ms']['p50'] else 1.0
+            delta = case['latency_ms']['p50'] - old['latency_ms']['p50']
+            best = case['latency_ms'].get('min', case['latency_ms']['p50'])
+            if (ratio > 1 + tolerance and delta >= min_delta_ms
+                    and best > old['latency_ms']['p50'] * (1 + tolerance)):
+                regressions.append(f"{name}[{case['size']}]: p50 {old['latency_ms']['p50']}ms → "
+                                   f"{case['latency_ms']['p50']}ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do Digital Worker VSC")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Casos a executar")
+    parser.add_argument('--quick', action='store_true', help="Somente os dois menores tamanhos")
+    parser.add_argument('--repeat', type=int, default=7, help="Repetições medidas por tamanho")
+    parser.add_argument('--warmup', type=int, default=1, help="Execuções de aquecimento")
+    parser.add_argument('--output', default=str(Path(__file__).parent / 'baseline.json'))
+    parser.add_argument('--compare', help="Baseline JSON para detectar regressões")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Regressão tolerada no p50 (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_MS,
+                        help="Piora absoluta mínima no p50 para contar como regressão")
+    args = parser.parse_args(argv)
+
+    results = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': SEED,
+        'benchmarks': {},
+    }
+
+    for name in args.only or BENCHMARKS:
+        sizes = BENCHMARKS[name][1][:2] if args.quick else BENCHMARKS[name][1]
+        results['benchmarks'][name] = []
+        for size in sizes:
+            case = run_case(name, size, args.repeat, args.warmup)
+            results['benchmarks'][name].append(case)
+            print(f"⏱️  {name:<22} n={size:<6} min={case['latency_ms']['min']:>10.3f}ms "
+                  f"p50={case['latency_ms']['p50']:>10.3f}ms "
+                  f"{case['throughput_items_s'] or 0:>12.1f} itens/s "
+                  f"pico={case['peak_memory_kb']:>10.1f}KB")
+
+    # Ler a baseline antes de gravar: --output e --compare podem ser o mesmo arquivo
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n💾 Resultados gravados: {output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressão(ões) acima de {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"\n✅ Sem regressões acima de {args.tolerance:.0%} em relação a {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,13 +7,21 @@ Conforme ANVISA RDC 658/2022, GAMP 5, 21 CFR Part 11
 
 import os
 from dotenv import load_dotenv
+
+# Carregar .env antes das ferramentas (VSC_TRACE/VSC_PROFILE são lidos na importação)
+load_dotenv()
+
 from crewai import Agent, Task, Crew, Process
-# from tools.browser_automation import BrowserTool
+from tools.browser_automation import BrowserTool
 from tools.document_analyzer import DocumentAnalyzer
 from tools.template_generator import TemplateGenerator
 from tools.compliance_checker import ComplianceChecker
+from tools.output_manager import start_run
+from tools.llm_client import create_llm
+from tools.run_store import RunRecorder
 
-load_dotenv()
+# LLM compartilhado: limite de taxa, pool de conexões e retentativas valem para todos os agentes
+llm = create_llm()
 
 # ========== AGENTES DO DIGITAL WORKER VSC ==========
 
@@ -25,7 +33,9 @@ analista_tecnico = Agent(
     Conhece profundamente GAMP 5, RDC 658/2022, IN 134/2022, Guia 33 ANVISA e 21 CFR Part 11.
     Sua expertise está em categorizar sistemas (GAMP 3/4/5), realizar análise de risco (ICH Q9) 
     e mapear requisitos de usuário (URS) para especificações funcionais (FS).""",
-    tools=[DocumentAnalyzer()],    verbose=True,
+    tools=[DocumentAnalyzer()],
+    llm=llm,
+    verbose=True,
     allow_delegation=False
 )
 
@@ -38,6 +48,7 @@ escritor_protocolos = Agent(
     Conhece ALCOA+ (Attributable, Legible, Contemporaneous, Original, Accurate + Complete, Consistent, Enduring, Available).
     Suas documentações passam em auditorias da ANVISA e FDA.""",
     tools=[TemplateGenerator(), DocumentAnalyzer()],
+    llm=llm,
     verbose=True,
     allow_delegation=False
 )
@@ -51,6 +62,7 @@ revisor_conformidade = Agent(
     assinaturas eletrônicas conforme 21 CFR Part 11, integridade de dados (Data Integrity).
     Identifica gaps e sugere correções antes de auditoria externa.""",
     tools=[ComplianceChecker(), DocumentAnalyzer()],
+    llm=llm,
     verbose=True,
     allow_delegation=False
 )
@@ -63,7 +75,9 @@ navegador_sistemas = Agent(
     Consegue acessar GED (Gestão Eletrônica de Documentos), LIMS (Laboratory Information Management System),
     ERP, SCADA, CDS (Chromatography Data System), BMS.
     Extrai evidências de configuração, logs de auditoria e executa testes automatizados de IQ/OQ/PQ.""",
-    tools=[],    verbose=True,
+    tools=[BrowserTool()],
+    llm=llm,
+    verbose=True,
     allow_delegation=False
 )
 
@@ -81,6 +95,7 @@ def criar_validacao_completa(sistema_nome: str, sistema_tipo: str, criticidade:
     
     # Task 1: Análise Técnica e Categorização
     task_analise = Task(
+        name='analise',
         description=f"""Analisar o sistema {sistema_nome} (GAMP {sistema_tipo}):
         1. Determinar categoria GAMP e justificativa
         2. Realizar análise de risco (ICH Q9) considerando criticidade {criticidade}
@@ -95,6 +110,7 @@ def criar_validacao_completa(sistema_nome: str, sistema_tipo: str, criticidade:
     
     # Task 2: Geração de Protocolos
     task_protocolos = Task(
+        name='protocolos',
         description=f"""Com base no Plano de Validação, gerar:
         1. Protocolo de Qualificação de Instalação (IQ):
            - Checklist de hardware/software instalado
@@ -110,7 +126,9 @@ def criar_validacao_completa(sistema_nome: str, sistema_tipo: str, criticidade:
            - Aceitação de usuário
         4. Matriz de Rastreabilidade (RTM)
         
-        Todos os protocolos devem seguir template ANVISA/GAMP 5""",
+        Todos os protocolos devem seguir template ANVISA/GAMP 5.
+        Ao salvar, informe só o nome do arquivo (ex: PRT-IQ-{{{{DATA_DOCUMENTO}}}}.docx):
+        a saída é organizada por sistema e execução""",
         agent=escritor_protocolos,
         expected_output="3 protocolos (IQ/OQ/PQ) + RTM em formato Word/PDF",
         context=[task_analise]
@@ -118,10 +136,12 @@ def criar_validacao_completa(sistema_nome: str, sistema_tipo: str, criticidade:
     
     # Task 3: Execução Automática de Testes
     task_execucao = Task(
+        name='execucao',
         description=f"""Executar testes automatizados no sistema {sistema_nome}:
         1. Acessar o sistema via interface web/desktop
         2. Executar checklist do IQ (verificar versões, configurações)
         3. Executar testes do OQ (criar registros, validar cálculos, testar audit trail)
+           - Use a ação 'run_checklist' para executar os passos do checklist em paralelo
         4. Capturar evidências (screenshots, logs, exports)
         5. Documentar desvios encontrados
         
@@ -133,6 +153,7 @@ def criar_validacao_completa(sistema_nome: str, sistema_tipo: str, criticidade:
     
     # Task 4: Revisão de Conformidade
     task_revisao = Task(
+        name='revisao',
         description="""Revisar toda a documentação gerada:
         1. Verificar completude de todos os documentos
         2. Validar rastreabilidade (RTM fechada?)
@@ -151,17 +172,27 @@ def criar_validacao_completa(sistema_nome: str, sistema_tipo: str, criticidade:
         context=[task_analise, task_protocolos, task_execucao]
     )
     
+    # Execução (saídas em output/<sistema>/<run_id>/, histórico em output/runs.db)
+    run_id = start_run()
+    recorder = RunRecorder(run_id, sistema_nome, {
+        'sistema_tipo': sistema_tipo,
+        'criticidade': criticidade,
+    })
+
     # Criar Crew
     crew_vsc = Crew(
         agents=[analista_tecnico, escritor_protocolos, navegador_sistemas, revisor_conformidade],
         tasks=[task_analise, task_protocolos, task_execucao, task_revisao],
         process=Process.sequential,  # Executar em sequência
+        task_callback=recorder.on_task,
         verbose=True
     )
     
     # Executar
-    print(f"\n🚀 Iniciando validação completa do sistema: {sistema_nome}\n")
-    resultado = crew_vsc.kickoff()
+    print(f"\n🚀 Iniciando validação completa do sistema: {sistema_nome} (execução {run_id})\n")
+    with recorder:
+        resultado = crew_vsc.kickoff()
+        recorder.on_crew(resultado)
     
     print("\n✅ Validação concluída!\n")
     print(resultado)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Script de teste das versões assíncronas (_arun) das ferramentas"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import async_io
+from tools.compliance_checker import ComplianceChecker
+from tools.template_generator import TemplateGenerator
+
+
+def test_concurrent_arun_calls():
+    """Vários agentes gerando protocolos ao mesmo tempo sem bloquear o loop"""
+    async def scenario(tmp):
+        generator = TemplateGenerator()
+        checker = ComplianceChecker()
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        beat = asyncio.create_task(heartbeat())
+        results = await asyncio.gather(*(
+            generator._arun('IQ', json.dumps({'NOME_SISTEMA': f'SISTEMA {i}'}), str(Path(tmp) / f'IQ_{i}.md'))
+            for i in range(20)
+        ), checker._arun('doc.md', 'GAMP_5'))
+        beat.cancel()
+        return results, ticks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results, ticks = asyncio.run(scenario(tmp))
+
+        assert all(r.startswith('✅') for r in results[:20])
+        assert 'GAMP 5' in results[20]
+        assert ticks > 0
+        assert 'SISTEMA 7' in (Path(tmp) / 'IQ_7.md').read_text(encoding='utf-8')
+        assert not list(Path(tmp).glob('.*.tmp'))
+
+
+def test_cancelled_write_leaves_no_file():
+    """Gravação cancelada antes de começar não cria o arquivo de destino"""
+    async def scenario(target):
+        release = threading.Event()
+        workers = async_io.get_executor()._max_workers
+        blockers = [asyncio.ensure_future(async_io.run_blocking(release.wait)) for _ in range(workers)]
+        await asyncio.sleep(0.05)
+
+        write = asyncio.ensure_future(async_io.write_text(target, 'conteúdo'))
+        await asyncio.sleep(0.05)
+        write.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(*blockers)
+
+        try:
+            await write
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / 'saida.md'
+        assert asyncio.run(scenario(target)) is True
+        assert not target.exists()
+        assert list(Path(tmp).iterdir()) == []
+
+
+if __name__ == "__main__":
+    test_concurrent_arun_calls()
+    test_cancelled_write_leaves_no_file()
+    print("[OK] Async tools")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Script de teste do BrowserTool contra um sistema local simulado (login + telas)"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import pytest
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import output_manager
+from tools.browser_automation import BrowserSessionPool, BrowserSettings, BrowserTool
+
+LOGIN_PAGE = """<html><body>
+<form method="post" action="/login">
+  <input id="username" name="username"><input id="password" name="password" type="password">
+  <button type="submit">Entrar</button>
+</form></body></html>"""
+
+
+class StandInSystem(BaseHTTPRequestHandler):
+    """Sistema simulado: exige login por cookie e expõe telas de versão e cadastro"""
+
+    logins = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def do_GET(self):
+        if self.path == '/':
+            return self._send(LOGIN_PAGE)
+        if 'sessao=ok' not in (self.headers.get('Cookie') or ''):
+            return self._send('', 302, {'Location': '/'})
+        if self.path == '/home':
+            return self._send('<h1>Bem-vindo</h1>')
+        if self.path == '/sobre':
+            return self._send('<div id="versao">LIMS 3.2.1</div>')
+        if self.path == '/amostras/nova':
+            return self._send('<form method="post" action="/amostras"><input id="codigo" name="codigo">'
+                              '<button id="salvar" type="submit">Salvar</button></form>')
+        return self._send('não encontrado', 404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        if self.path == '/login':
+            if form.get('username') == ['analista'] and form.get('password') == ['segredo']:
+                StandInSystem.logins += 1
+                return self._send('', 302, {'Location': '/home', 'Set-Cookie': 'sessao=ok; Path=/'})
+            return self._send(LOGIN_PAGE, 401)
+        if self.path == '/amostras':
+            return self._send(f'<div id="msg">Amostra {form["codigo"][0]} registrada</div>')
+        return self._send('não encontrado', 404)
+
+
+@pytest.fixture
+def stand_in_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInSystem)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+
+
+def _settings(url, evidence_dir):
+    return BrowserSettings(
+        base_url=url, user='analista', password='segredo',
+        headless=True, timeout_ms=10000, pool_size=3, evidence_dir=evidence_dir,
+        executable_path=os.environ.get('BROWSER_EXECUTABLE_PATH') or None,
+    )
+
+
+def _require_browser(settings):
+    """Pula o teste se o Playwright ou o Chromium não estiverem instalados"""
+    pytest.importorskip('playwright.async_api')
+    pool = BrowserSessionPool(settings)
+    try:
+        pool.start()
+    except Exception as e:
+        pool.close()
+        pytest.skip(f"Chromium indisponível: {e}")
+    return pool
+
+
+def test_checklist_runs_in_parallel_with_single_login(stand_in_url):
+    """Checklist IQ/OQ roda nos contextos do pool reaproveitando uma única autenticação"""
+    with tempfile.TemporaryDirectory() as tmp:
+        StandInSystem.logins = 0
+        pool = _require_browser(_settings(stand_in_url, tmp))
+        try:
+            steps = [
+                {'id': 'IQ_01', 'actions': [
+                    {'action': 'navigate', 'url': 'sobre'},
+                    {'action': 'extract', 'selector': '#versao', 'expected': '3.2.1'},
+                    {'action': 'screenshot', 'value': 'Tela Sobre'},
+                ]},
+                {'id': 'OQ_01', 'actions': [
+                    {'action': 'navigate', 'url': 'amostras/nova'},
+                    {'action': 'fill', 'selector': '#codigo', 'value': 'AM-001'},
+                    {'action': 'click', 'selector': '#salvar'},
+                    {'action': 'extract', 'selector': '#msg', 'expected': 'AM-001 registrada'},
+                ]},
+                {'id': 'OQ_02', 'actions': [
+                    {'action': 'navigate', 'url': 'sobre'},
+                    {'action': 'extract', 'selector': '#versao', 'expected': '9.9'},
+                ]},
+            ]
+            results = pool.run(pool.run_steps(steps * 4))
+
+            assert StandInSystem.logins == 1
+            assert [r['id'] for r in results[:3]] == ['IQ_01', 'OQ_01', 'OQ_02']
+            assert [r['status'] for r in results[:3]] == ['Aprovado', 'Aprovado', 'Reprovado']
+            evidence_id = results[0]['actions'][2]['evidence']
+            pool.evidence.flush()
+            assert pool.evidence.entries[evidence_id]['step'] == 'IQ_01'
+            assert 'EVIDENCIA_TESTE_IQ_01' in pool.evidence.markers()
+        finally:
+            pool.close()
+        assert Path(tmp, 'manifest.json').exists()
+
+
+def test_browser_tool_keeps_page_between_calls(stand_in_url):
+    """Ações isoladas do agente compartilham a mesma página autenticada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = _settings(stand_in_url, tmp)
+        _require_browser(settings).close()
+
+        tool = BrowserTool(settings=settings)
+        try:
+            tool._run(action='navigate', url='sobre')
+            output = tool._run(action='extract', selector='#versao')
+            result = json.loads(output.split('\n\n', 1)[1])
+            assert result[0]['actions'][0]['text'] == 'LIMS 3.2.1'
+        finally:
+            tool.close()
+
+
+def test_evidence_store_follows_active_run():
+    """O pool sobrevive entre execuções; cada execução grava evidências na própria pasta"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = BrowserSessionPool(BrowserSettings(evidence_dir=tmp))
+        try:
+            with output_manager.active_run('20260121-143005-aaaaaa'):
+                first = pool.evidence
+                assert pool.evidence is first
+                assert first.root == Path(tmp, '20260121-143005-aaaaaa')
+
+            with output_manager.active_run('20260122-090000-bbbbbb'):
+                assert pool.evidence.root == Path(tmp, '20260122-090000-bbbbbb')
+                assert pool.evidence_store('20260121-143005-aaaaaa') is first
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-v']))
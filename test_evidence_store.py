@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Script de teste do repositório de evidências de teste"""
+
+import asyncio
+import gzip
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools.evidence_store import EvidenceStore
+
+
+def test_capture_deduplicates_and_writes_manifest():
+    """Capturas idênticas compartilham o arquivo e o manifesto liga IDs aos passos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with EvidenceStore(tmp, max_workers=4, max_pending=8) as store:
+            ids = [store.capture(f"TI_01_1_{i % 3 + 1}", b'tela do sistema', 'log', 'txt') for i in range(30)]
+            unique = store.capture('TI_02_1_1', b'audit trail: login analista', 'log', 'txt')
+            assert store.flush() == []
+
+            assert ids[0] == 'EV-0001' and unique == 'EV-0031'
+            objects = [p for p in Path(tmp, 'objects').rglob('*') if p.is_file()]
+            assert len(objects) == 2
+
+            stored = Path(tmp, store.entries[unique]['file'])
+            assert gzip.decompress(stored.read_bytes()) == b'audit trail: login analista'
+            assert sum(1 for e in store.entries.values() if not e['duplicate']) == 2
+
+            markers = store.markers()
+            assert markers['EVIDENCIA_TESTE_TI_02_1_1'] == 'EV-0031'
+            assert markers['EVIDENCIA_TESTE_TI_01_1_1'].startswith('EV-0001, EV-0004')
+
+        manifest = json.loads(Path(tmp, 'manifest.json').read_text(encoding='utf-8'))
+        assert len(manifest['evidencias']) == 31
+        assert manifest['evidencias']['EV-0031']['step'] == 'TI_02_1_1'
+
+
+def test_reopen_continues_numbering():
+    """Reabrir o repositório continua a numeração e a deduplicação"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with EvidenceStore(tmp) as store:
+            store.capture('TI_01_1_1', b'export.csv', 'export', 'csv')
+
+        with EvidenceStore(tmp) as store:
+            evidence_id = store.capture('TI_01_1_2', b'export.csv', 'export', 'csv')
+            store.flush()
+            assert evidence_id == 'EV-0002'
+            assert store.entries[evidence_id]['duplicate'] is True
+            assert store.evidence_for_step('TI_01_1_1') == ['EV-0001']
+
+
+def test_acapture_waits_without_blocking_the_loop():
+    """Fila cheia: acapture() espera a vaga, mas as outras corrotinas do loop seguem"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EvidenceStore(tmp, max_workers=1, max_pending=1)
+        release = threading.Event()
+        write_object = store._write_object
+        store._write_object = lambda *args: release.wait(5) and write_object(*args)
+
+        async def main():
+            ticks = []
+
+            async def ticker():
+                for _ in range(5):
+                    ticks.append(1)
+                    await asyncio.sleep(0.01)
+                release.set()
+
+            first = await store.acapture('TI_01', b'tela 1', 'log', 'txt')
+            second, _ = await asyncio.gather(store.acapture('TI_02', b'tela 2', 'log', 'txt'), ticker())
+            return first, second, len(ticks)
+
+        start = time.monotonic()
+        assert asyncio.run(main()) == ('EV-0001', 'EV-0002', 5)
+        assert time.monotonic() - start < 2  # capture() bloqueante só sairia pelo timeout de 5 s
+        assert store.flush() == []
+        store.close()
+
+
+def test_failed_evidence_is_not_cited():
+    """Evidência cuja gravação falhou não entra nos marcadores, só no manifesto"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with EvidenceStore(tmp) as store:
+            write_object = store._write_object
+
+            def failing(digest, data, kind, extension):
+                if data == b'disco cheio':
+                    raise OSError('sem espaço')
+                return write_object(digest, data, kind, extension)
+
+            store._write_object = failing
+            ok = store.capture('TI_01', b'tela', 'log', 'txt')
+            failed = store.capture('TI_01', b'disco cheio', 'log', 'txt')
+            assert store.flush() == [failed]
+            assert store.markers() == {'EVIDENCIA_TESTE_TI_01': ok}
+            assert 'sem espaço' in store.entries[failed]['error']
+
+
+if __name__ == "__main__":
+    test_capture_deduplicates_and_writes_manifest()
+    test_reopen_continues_numbering()
+    test_acapture_waits_without_blocking_the_loop()
+    test_failed_evidence_is_not_cited()
+    print("[OK] Evidence Store")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Script de teste da regeneração incremental (manifesto de impressões digitais)"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import fingerprint, output_manager, template_generator
+from tools.fingerprint import FingerprintManifest, MANIFEST_FILE
+from tools.output_manager import OutputManager
+from tools.template_generator import TemplateGenerator
+
+
+def test_unchanged_documents_are_skipped():
+    """Segunda geração com as mesmas entradas não reescreve a saída"""
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = TemplateGenerator()
+        output = Path(tmp) / 'PRT-IQ-LIMS.md'
+        data = json.dumps({'NOME_SISTEMA': 'LIMS', 'VERSAO_SISTEMA': '2.0'})
+
+        assert generator._run('IQ', data, str(output)).startswith('✅')
+        assert (Path(tmp) / MANIFEST_FILE).exists()
+        mtime = output.stat().st_mtime_ns
+
+        # Mesmo contexto com chaves em outra ordem gera a mesma impressão digital
+        reordered = json.dumps({'VERSAO_SISTEMA': '2.0', 'NOME_SISTEMA': 'LIMS'})
+        assert generator._run('IQ', reordered, str(output)).startswith('⏭️')
+        assert output.stat().st_mtime_ns == mtime
+
+        assert generator._run('IQ', reordered, str(output), force=True).startswith('✅')
+        changed = json.dumps({'NOME_SISTEMA': 'LIMS', 'VERSAO_SISTEMA': '2.1'})
+        assert generator._run('IQ', changed, str(output)).startswith('✅')
+        assert '2.1' in output.read_text(encoding='utf-8')
+
+        # Saída editada à mão deixa de ser considerada atualizada
+        output.write_text('editado', encoding='utf-8')
+        assert generator._run('IQ', changed, str(output)).startswith('✅')
+
+
+def test_stale_report():
+    """stale() aponta template alterado, saída ausente e versão do gerador"""
+    with tempfile.TemporaryDirectory() as tmp:
+        templates = Path(tmp) / 'templates'
+        templates.mkdir()
+        (templates / 'template_iq.md').write_text('# IQ {{NOME_SISTEMA}}\n', encoding='utf-8')
+        (templates / 'template_oq.md').write_text('# OQ {{NOME_SISTEMA}}\n', encoding='utf-8')
+
+        original_dir = template_generator.TEMPLATES_DIR
+        template_generator.TEMPLATES_DIR = templates
+        try:
+            generator = TemplateGenerator()
+            out = Path(tmp) / 'out'
+            for tipo in ('IQ', 'OQ'):
+                generator._run(tipo, '{"NOME_SISTEMA": "LIMS"}', str(out / f'{tipo}.md'))
+            assert FingerprintManifest(out).stale() == []
+
+            (templates / 'template_iq.md').write_text('# IQ v2 {{NOME_SISTEMA}}\n', encoding='utf-8')
+            os.remove(out / 'OQ.md')
+            reasons = {Path(item['output']).name: item['reason'] for item in FingerprintManifest(out).stale()}
+            assert reasons == {'IQ.md': 'template alterado', 'OQ.md': 'saída ausente'}
+
+            original_version = fingerprint.GENERATOR_VERSION
+            fingerprint.GENERATOR_VERSION = original_version + '.next'
+            try:
+                assert len(FingerprintManifest(out).stale()) == 2
+            finally:
+                fingerprint.GENERATOR_VERSION = original_version
+        finally:
+            template_generator.TEMPLATES_DIR = original_dir
+
+
+def test_new_run_reuses_previous_run_outputs():
+    """Nova execução do mesmo sistema copia o protocolo inalterado da execução anterior"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['OUTPUT_DIR'] = tmp
+        try:
+            generator = TemplateGenerator()
+            data = json.dumps({'NOME_SISTEMA': 'LIMS'})
+
+            with output_manager.active_run('20260121-143005-aaaaaa') as first:
+                assert generator._run('IQ', data, 'PRT-IQ.md').startswith('✅')
+
+                second = output_manager.start_run('20260122-090000-bbbbbb')
+                result = generator._run('IQ', data, 'PRT-IQ.md')
+                assert result.startswith('⏭️') and first in result
+                source = Path(tmp) / 'LIMS' / first / 'PRT-IQ.md'
+                copy = Path(tmp) / 'LIMS' / second / 'PRT-IQ.md'
+                assert copy.read_bytes() == source.read_bytes()
+                assert FingerprintManifest(copy.parent).stale() == []
+
+                entries = OutputManager(root=tmp).index(run_id=second)
+                assert entries[0]['reaproveitado_de'] == str(source)
+
+                # Dados diferentes: a execução seguinte gera de novo
+                output_manager.start_run('20260123-090000-cccccc')
+                assert generator._run('IQ', json.dumps({'NOME_SISTEMA': 'LIMS', 'VERSAO_SISTEMA': '3'}),
+                                      'PRT-IQ.md').startswith('✅')
+
+                # Mesmos dados em outro dia: a data de elaboração muda, então não há cópia
+                generator._document_dates = lambda: {'DATA_DOCUMENTO': '20990101', 'DATA_ELABORACAO': '01/01/2099'}
+                output_manager.start_run('20260124-090000-dddddd')
+                assert generator._run('IQ', data, 'PRT-IQ.md').startswith('✅')
+                assert '01/01/2099' in (Path(tmp) / 'LIMS' / '20260124-090000-dddddd' / 'PRT-IQ.md').read_text(encoding='utf-8')
+        finally:
+            del os.environ['OUTPUT_DIR']
+
+
+if __name__ == "__main__":
+    test_unchanged_documents_are_skipped()
+    test_stale_report()
+    test_new_run_reuses_previous_run_outputs()
+    print("[OK] Fingerprint")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Script de teste para a Knowledge Base (extração, armazenamento e busca)"""
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools.document_reader import DocumentReader
+from tools.kb_store import KnowledgeStore
+from tools.kb_watcher import KnowledgeBaseWatcher
+
+
+def _sample_knowledge():
+    """Knowledge Base de exemplo no formato de DocumentReader.knowledge"""
+    return {
+        'manuais': {
+            'manual_lims.pdf': {
+                'path': 'knowledge_base/manuais/manual_lims.pdf',
+                'content': 'Manual do LIMS: o audit trail registra usuário e data/hora.',
+                'full_size': 60,
+                'type': '.pdf',
+            },
+            'vazio.docx': {
+                'path': 'knowledge_base/manuais/vazio.docx',
+                'content': '',
+                'full_size': 0,
+                'type': '.docx',
+            },
+        },
+        'normas': {
+            'rdc_658.pdf': {
+                'path': 'knowledge_base/normas/rdc_658.pdf',
+                'content': 'RDC 658/2022 - Validação de sistemas computadorizados críticos.',
+                'full_size': 63,
+                'type': '.pdf',
+            },
+        },
+        'projeto_atual': {},
+    }
+
+
+def test_knowledge_store_roundtrip():
+    """Grava e reabre a Knowledge Store preservando conteúdo e metadados"""
+    knowledge = _sample_knowledge()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp) / 'kb_store'
+
+        with KnowledgeStore.write(knowledge, store_path) as written:
+            assert len(written) == 3
+
+        with KnowledgeStore(store_path) as store:
+            loaded = store.as_knowledge()
+
+            assert list(loaded.keys()) == ['manuais', 'normas', 'projeto_atual']
+            for category, docs in knowledge.items():
+                assert list(loaded[category].keys()) == list(docs.keys())
+                for filename, data in docs.items():
+                    assert dict(loaded[category][filename]) == data
+
+
+def test_rewrite_publishes_a_complete_generation():
+    """Regravar a store não mistura conteúdo novo com offsets antigos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp) / 'kb_store'
+        KnowledgeStore.write(_sample_knowledge(), store_path).close()
+
+        with KnowledgeStore(store_path) as old:
+            changed = _sample_knowledge()
+            changed['normas']['rdc_658.pdf']['content'] = 'Revisão ção ' * 50
+            KnowledgeStore.write(changed, store_path).close()
+
+            # Quem já abriu continua na geração antiga; quem abre agora vê a nova inteira
+            assert old.as_knowledge()['normas']['rdc_658.pdf']['content'] == \
+                _sample_knowledge()['normas']['rdc_658.pdf']['content']
+            with KnowledgeStore(store_path) as new:
+                assert new.as_knowledge()['normas']['rdc_658.pdf']['content'] == 'Revisão ção ' * 50
+                generation = new.generation
+        assert sorted(p.name for p in store_path.glob('*.bin')) == [
+            f'content-{generation}.bin', f'offsets-{generation}.bin']
+
+        # Conteúdo que não corresponde ao índice é rejeitado na abertura
+        content_file = store_path / f'content-{generation}.bin'
+        content_file.write_bytes(content_file.read_bytes()[:-3])
+        try:
+            KnowledgeStore(store_path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("conteúdo truncado deveria ser rejeitado")
+
+
+def test_concurrent_store_writes_are_atomic():
+    """Gravações simultâneas na mesma pasta usam temporários distintos e nunca falham"""
+    knowledge = _sample_knowledge()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp) / 'kb_store'
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for written in pool.map(lambda _: KnowledgeStore.write(knowledge, store_path), range(32)):
+                written.close()
+
+        with KnowledgeStore(store_path) as store:
+            assert len(store) == 3
+        assert not list(store_path.glob('*.tmp'))
+
+
+def test_reader_search_on_store():
+    """DocumentReader busca na Knowledge Store como na extração em memória"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp) / 'kb_store'
+        KnowledgeStore.write(_sample_knowledge(), store_path).close()
+
+        reader = DocumentReader(kb_path=Path(tmp) / 'knowledge_base')
+        store = reader.load_store(store_path)
+        try:
+            results = reader.search('AUDIT TRAIL')
+            assert len(results) == 1
+            assert results[0]['file'] == 'manual_lims.pdf'
+            assert results[0]['category'] == 'manuais'
+            assert 'TOTAL: 3 documentos' in reader.get_summary()
+        finally:
+            store.close()
+
+
+def _write_docx(file_path, text):
+    """Cria um documento Word simples"""
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(file_path)
+
+
+def test_recursive_scan_and_type_detection():
+    """Varredura recursiva, extensões em maiúsculas, texto e detecção por conteúdo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = DocumentReader(kb_path=Path(tmp) / 'knowledge_base', exclude=['~$*', 'rascunhos'])
+        reader.ensure_folders()
+        manuais = reader.kb_path / 'manuais'
+        (manuais / 'fornecedor' / 'v2').mkdir(parents=True)
+        (manuais / 'rascunhos').mkdir()
+
+        _write_docx(manuais / 'fornecedor' / 'v2' / 'MANUAL.DOCX', 'Manual do fornecedor versão 2')
+        _write_docx(manuais / 'renomeado.pdf', 'Word salvo com extensão errada')
+        _write_docx(manuais / 'relatorio.txt', 'Word salvo como texto')
+        (manuais / 'imagem.md').write_bytes(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR')
+        (manuais / 'notas.md').write_text('# Notas de instalação', encoding='utf-8')
+        (manuais / 'usuarios.csv').write_text('login;perfil\nana;admin\n', encoding='utf-8')
+        (manuais / '~$temp.docx').write_bytes(b'lixo')
+        (manuais / 'rascunhos' / 'ignorar.txt').write_text('ignorar', encoding='utf-8')
+
+        knowledge = reader.extract_all_content()['manuais']
+
+        assert sorted(knowledge) == ['fornecedor/v2/MANUAL.DOCX', 'imagem.md', 'notas.md',
+                                     'relatorio.txt', 'renomeado.pdf', 'usuarios.csv']
+        assert knowledge['fornecedor/v2/MANUAL.DOCX']['type'] == '.docx'
+        assert knowledge['renomeado.pdf']['type'] == '.docx'
+        assert 'extensão errada' in knowledge['renomeado.pdf']['content']
+        assert knowledge['relatorio.txt']['type'] == '.docx'
+        assert 'Word salvo como texto' in knowledge['relatorio.txt']['content']
+        assert knowledge['imagem.md']['content'] == ''
+        assert knowledge['notas.md']['content'] == '# Notas de instalação'
+        assert 'ana | admin' in knowledge['usuarios.csv']['content']
+
+        reader.register_reader('log', lambda path: 'log de auditoria', extensions=['.log'])
+        (manuais / 'audit.log').write_text('2026-01-21 login', encoding='utf-8')
+        assert reader.extract_all_content()['manuais']['audit.log']['content'] == 'log de auditoria'
+
+
+def test_watcher_ingests_changes():
+    """Watcher detecta inclusão, alteração e remoção de documentos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = DocumentReader(kb_path=Path(tmp) / 'knowledge_base')
+        reader.ensure_folders()
+        manual = reader.kb_path / 'manuais' / 'manual_ged.docx'
+
+        with KnowledgeBaseWatcher(reader, interval=0.02, debounce=0.05) as watcher:
+            _write_docx(manual, 'Procedimento de backup diário do GED')
+            time.sleep(0.1)
+            assert watcher.wait_idle(timeout=5)
+            assert reader.search('backup diário')[0]['file'] == 'manual_ged.docx'
+
+            _write_docx(manual, 'Procedimento de restauração do GED')
+            time.sleep(0.1)
+            assert watcher.wait_idle(timeout=5)
+            assert reader.search('backup diário') == []
+            assert reader.search('restauração')[0]['category'] == 'manuais'
+
+            manual.unlink()
+            time.sleep(0.1)
+            assert watcher.wait_idle(timeout=5)
+            assert reader.knowledge['manuais'] == {}
+
+
+def test_watcher_drops_batches_finished_out_of_order():
+    """Lote antigo que termina depois de um mais novo não sobrescreve o arquivo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = DocumentReader(kb_path=Path(tmp) / 'knowledge_base')
+        reader.ensure_folders()
+        manual = reader.kb_path / 'manuais' / 'manual_ged.docx'
+        _write_docx(manual, 'Versão nova')
+        reader.knowledge = {category: {} for category in reader.categories}
+
+        watcher = KnowledgeBaseWatcher(reader, store_path=str(Path(tmp) / 'store'))
+        watcher._snapshot = watcher._take_snapshot()
+        current = watcher._snapshot[manual]
+        stale = (current[0], current[1] - 1, current[2])
+
+        watcher._apply([(manual, current, reader.extract_file(manual))], [])
+        watcher._apply([(manual, stale, {'path': str(manual), 'content': 'Versão antiga',
+                                         'full_size': 13, 'type': '.docx'})], [manual])
+        assert reader.knowledge['manuais']['manual_ged.docx']['content'] == 'Versão nova'
+        with KnowledgeStore(Path(tmp) / 'store') as store:
+            assert store.as_knowledge()['manuais']['manual_ged.docx']['content'] == 'Versão nova'
+        watcher.stop()
+
+
+def test_watcher_publishes_one_version_per_batch():
+    """Rajada de arquivos novos: uma única publicação (e gravação da Store) por rodada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = DocumentReader(kb_path=Path(tmp) / 'knowledge_base')
+        reader.ensure_folders()
+        updates = []
+
+        for i in range(30):
+            _write_docx(reader.kb_path / 'manuais' / f'manual_{i:02d}.docx', f'Procedimento {i}')
+
+        # Carga inicial: os 30 arquivos entram na primeira varredura
+        with KnowledgeBaseWatcher(reader, interval=60, debounce=0, store_path=str(Path(tmp) / 'store'),
+                                  on_update=updates.append) as watcher:
+            assert watcher.wait_idle(timeout=10)
+
+        assert len(updates) == 1 and len(updates[0]['updated']) == 30
+        store = KnowledgeStore(str(Path(tmp) / 'store'))
+        assert len(store) == 30
+        store.close()
+
+
+if __name__ == "__main__":
+    test_knowledge_store_roundtrip()
+    test_rewrite_publishes_a_complete_generation()
+    test_concurrent_store_writes_are_atomic()
+    test_reader_search_on_store()
+    test_recursive_scan_and_type_detection()
+    test_watcher_ingests_changes()
+    test_watcher_drops_batches_finished_out_of_order()
+    test_watcher_publishes_one_version_per_batch()
+    print("[OK] Knowledge Base")
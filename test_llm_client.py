@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Script de teste do cliente LLM (rate limit, retentativas, agregação) contra um provedor simulado local"""
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import llm_client
+from tools.llm_client import LLMClient, LLMClientError, PooledLLM, TokenBucket
+
+
+class MockProvider(BaseHTTPRequestHandler):
+    """Provedor OpenAI-compatível: responde com o último prompt, após `delay` segundos"""
+
+    requests = []
+    failures = []  # status a devolver antes de responder 200 (ex: [429, 503])
+    delay = 0.0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.lock:
+            self.requests.append((time.monotonic(), body))
+            status = self.failures.pop(0) if self.failures else 200
+
+        if status != 200:
+            self.send_response(status)
+            self.send_header('Retry-After', '0.2')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        time.sleep(self.delay)
+        content = f"eco: {body['messages'][-1]['content']}"
+        data = json.dumps({
+            'choices': [{'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': 5, 'completion_tokens': 3, 'total_tokens': 8},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(failures=(), delay=0.0):
+    MockProvider.requests = []
+    MockProvider.failures = list(failures)
+    MockProvider.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockProvider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/v1'
+
+
+def _messages(text):
+    return [{'role': 'user', 'content': text}]
+
+
+def test_token_bucket_spaces_requests():
+    """Após a rajada, o bucket libera uma ficha a cada 1/rate segundos"""
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.18  # 4 fichas além da rajada, a 20/s
+
+    server, url = _serve()
+    try:
+        client = LLMClient(base_url=url, requests_per_minute=600, burst=1)
+        # Medido a partir do envio: a latência da primeira conexão não encurta o intervalo
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda i: client.complete(_messages(f'p{i}'), 'gpt-4o'), range(4)))
+        times = sorted(t for t, _ in MockProvider.requests)
+        assert times[-1] - start >= 0.28  # 10 req/s: 4 requisições em ~0,3 s
+    finally:
+        server.shutdown()
+
+
+def test_retries_honor_retry_after():
+    """429/503 são repetidos respeitando Retry-After; 400 falha na hora"""
+    server, url = _serve(failures=[429, 503])
+    try:
+        client = LLMClient(base_url=url, requests_per_minute=6000, backoff_base=0.01)
+        start = time.monotonic()
+        assert client.complete(_messages('olá'), 'gpt-4o') == 'eco: olá'
+        assert time.monotonic() - start >= 0.4
+        assert client.stats['requests'] == 3 and client.stats['retries'] == 2
+
+        MockProvider.failures = [400]
+        try:
+            client.complete(_messages('inválido'), 'gpt-4o')
+        except LLMClientError as e:
+            assert e.status == 400
+        else:
+            raise AssertionError("erro 400 não deveria ser repetido")
+        assert client.stats['requests'] == 4
+
+        MockProvider.failures = [500, 500]
+        client.max_retries = 1
+        try:
+            client.complete(_messages('fora do ar'), 'gpt-4o')
+        except LLMClientError as e:
+            assert e.status == 500
+        else:
+            raise AssertionError("retentativas esgotadas deveriam falhar")
+    finally:
+        server.shutdown()
+
+
+def test_identical_inflight_prompts_are_coalesced():
+    """Oito agentes com o mesmo prompt determinístico ao mesmo tempo geram uma única requisição"""
+    server, url = _serve(delay=0.3)
+    try:
+        client = LLMClient(base_url=url, requests_per_minute=6000)
+
+        def ask(text, **params):
+            return client.complete(_messages(text), 'gpt-4o', **params)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            answers = list(pool.map(lambda _: ask('mesmo prompt', temperature=0), range(8)))
+            distinct = list(pool.map(lambda i: ask(f'prompt {i}', temperature=0), range(3)))
+
+        assert set(answers) == {'eco: mesmo prompt'}
+        assert len(MockProvider.requests) == 1 + 3
+        assert client.stats['coalesced'] == 7
+        assert distinct == ['eco: prompt 0', 'eco: prompt 1', 'eco: prompt 2']
+
+        # Terminada a requisição, o mesmo prompt volta a ir ao provedor (não é cache)
+        ask('mesmo prompt', temperature=0)
+        assert len(MockProvider.requests) == 5
+
+        # Amostragem proposital: cada agente recebe a sua própria resposta
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: ask('varie', temperature=0.7), range(4)))
+            list(pool.map(lambda _: ask('fixo', temperature=0.7, seed=42), range(4)))
+        assert len(MockProvider.requests) == 5 + 4 + 1
+        assert client.stats['coalesced'] == 7 + 3
+    finally:
+        server.shutdown()
+
+
+def test_crewai_llm_uses_shared_client():
+    """PooledLLM envia as mensagens do agente pelo cliente compartilhado e contabiliza tokens"""
+    server, url = _serve()
+    llm_client._client = LLMClient(base_url=url, requests_per_minute=6000)
+    try:
+        llm = PooledLLM(model='gpt-4o', temperature=0, stop=['\nObservation:'])
+        assert llm.call('Qual a categoria GAMP?') == 'eco: Qual a categoria GAMP?'
+
+        body = MockProvider.requests[0][1]
+        assert body['model'] == 'gpt-4o' and body['temperature'] == 0
+        assert body['stop'] == ['\nObservation:']
+        assert llm.get_token_usage_summary().total_tokens == 8
+
+        # Provedor que ignora 'stop': a resposta é cortada aqui
+        assert llm.call('Ação: buscar\nObservation: resultado') == 'eco: Ação: buscar'
+        usage = llm.get_token_usage_summary()
+        assert (usage.total_tokens, usage.successful_requests) == (16, 2)
+    finally:
+        llm_client._client = None
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_token_bucket_spaces_requests()
+    test_retries_honor_retry_after()
+    test_identical_inflight_prompts_are_coalesced()
+    test_crewai_llm_uses_shared_client()
+    print("[OK] LLM client")
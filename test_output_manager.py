@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Script de teste do gerenciador de saídas (gravação atômica, pastas por execução, índice)"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import output_manager
+from tools.output_manager import OutputManager, atomic_path, atomic_write, expand_name
+from tools.template_generator import TemplateGenerator
+
+
+def _record_many(root, worker, count):
+    manager = OutputManager(root=root, system='LIMS', run_id=f'run-{worker}')
+    for i in range(count):
+        manager.write_text(f'doc_{i}.md', f'worker {worker} documento {i}')
+    return count
+
+
+def test_concurrent_writes_are_atomic():
+    """Threads gravando o mesmo arquivo: o resultado é sempre uma versão inteira"""
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / 'PRT-IQ.docx'
+        payloads = [bytes([i]) * 2_000_000 for i in range(8)]
+        threads = [threading.Thread(target=atomic_write, args=(target, p)) for p in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert target.read_bytes() in payloads
+        assert [p.name for p in Path(tmp).iterdir()] == ['PRT-IQ.docx']
+
+        # Falha no meio da gravação mantém a versão anterior
+        before = target.read_bytes()
+        try:
+            with atomic_path(target) as partial:
+                partial.write_bytes(b'pela metade')
+                raise RuntimeError('falha simulada')
+        except RuntimeError:
+            pass
+        assert target.read_bytes() == before
+        assert len(list(Path(tmp).iterdir())) == 1
+
+
+def test_index_is_safe_across_processes():
+    """Vários processos anexando ao índice sem perder ou misturar linhas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            assert sum(pool.map(_record_many, [tmp] * 4, range(4), [25] * 4)) == 100
+
+        entries = OutputManager(root=tmp).index()
+        assert len(entries) == 100
+        assert len(OutputManager(root=tmp).index(run_id='run-2')) == 25
+        assert (Path(tmp) / 'LIMS' / 'run-3' / 'doc_24.md').read_text(encoding='utf-8') == 'worker 3 documento 24'
+
+
+def test_names_are_expanded_and_sanitized():
+    """Marcadores do nome são expandidos e nunca escapam da pasta da execução"""
+    today = datetime.now().strftime('%Y%m%d')
+    assert expand_name('PRT-IQ-{{DATA_DOCUMENTO}}.md') == f'PRT-IQ-{today}.md'
+    assert expand_name('PRT-[[NOME_SISTEMA]].docx', {'NOME_SISTEMA': 'SAP/ERP 2.0'}) == 'PRT-SAP_ERP_2.0.docx'
+
+    manager = OutputManager(root='saida', system='../LIMS', run_id='r1')
+    assert manager.path_for('../../etc/{{X}}.md', {'X': '..'}) == Path('saida/LIMS/r1/etc/sem_nome.md')
+
+
+def test_generator_shards_by_system_and_run():
+    """Só o nome do arquivo: protocolo vai para output/<sistema>/<execução>/ e entra no índice"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['OUTPUT_DIR'] = tmp
+        try:
+            with output_manager.active_run('20260121-143005-teste') as run_id:
+                generator = TemplateGenerator()
+                data = json.dumps({'NOME_SISTEMA': 'LIMS Waters'})
+                result = generator._run('IQ', data, 'PRT-IQ-{{DATA_DOCUMENTO}}.md')
+            assert output_manager.current_run_id() is None
+            assert result.startswith('✅')
+
+            today = datetime.now().strftime('%Y%m%d')
+            output = Path(tmp) / 'LIMS_Waters' / run_id / f'PRT-IQ-{today}.md'
+            assert output.exists()
+            assert str(output) in result
+
+            entries = OutputManager(root=tmp).index(system='LIMS Waters')
+            assert [(e['run_id'], e['protocolo']) for e in entries] == [(run_id, 'IQ')]
+        finally:
+            del os.environ['OUTPUT_DIR']
+
+
+if __name__ == "__main__":
+    test_concurrent_writes_are_atomic()
+    test_index_is_safe_across_processes()
+    test_names_are_expanded_and_sanitized()
+    test_generator_shards_by_system_and_run()
+    print("[OK] Output manager")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Script de teste da instrumentação (spans, Chrome Trace e cProfile)"""
+
+import json
+import pstats
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import profiling
+from tools.template_generator import TemplateGenerator
+
+
+def test_tracing_records_tool_and_phase_spans():
+    """Trace contém o span da ferramenta e as fases load/fill/convert/save aninhadas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = Path(tmp) / 'trace.json'
+        profile_path = Path(tmp) / 'run.prof'
+
+        with profiling.tracing(trace_path, profile_path=profile_path):
+            result = TemplateGenerator()._run(
+                protocol_type='IQ',
+                system_data=json.dumps({'NOME_SISTEMA': 'LIMS'}),
+                output_path=str(Path(tmp) / 'PRT-IQ-LIMS.md'),
+            )
+        assert result.startswith('✅')
+        assert not profiling.is_enabled()
+
+        trace = json.loads(trace_path.read_text(encoding='utf-8'))
+        spans = {e['name']: e for e in trace['traceEvents'] if e['ph'] == 'X'}
+        assert {'TemplateGenerator._run', 'load', 'fill', 'convert', 'save'} <= set(spans)
+
+        tool = spans['TemplateGenerator._run']
+        for phase in ('load', 'fill', 'convert', 'save'):
+            assert tool['ts'] <= spans[phase]['ts']
+            assert spans[phase]['ts'] + spans[phase]['dur'] <= tool['ts'] + tool['dur'] + 1
+
+        assert spans['convert']['ts'] + spans['convert']['dur'] <= spans['save']['ts'] + 1
+
+        stats = pstats.Stats(str(profile_path))
+        assert any(func[2] == '_fill_document' for func in stats.stats)
+
+
+def test_spans_are_noop_when_disabled():
+    """Fora de tracing() nenhum evento é registrado"""
+    assert profiling._current() is None
+    with profiling.span('ignorado'):
+        pass
+    assert not profiling.is_enabled()
+
+
+def test_overlapping_blocks_in_threads_keep_their_events():
+    """Bloco que termina primeiro não desliga nem apaga os eventos do outro"""
+    with tempfile.TemporaryDirectory() as tmp:
+        a_open, a_closed = threading.Event(), threading.Event()
+
+        def block_a():
+            with profiling.tracing(Path(tmp) / 'a.json'):
+                with profiling.span('a1'):
+                    pass
+                a_open.set()
+            a_closed.set()
+
+        def block_b():
+            a_open.wait(5)
+            with profiling.tracing(Path(tmp) / 'b.json'):
+                with profiling.span('b1'):
+                    pass
+                a_closed.wait(5)
+                assert profiling.is_enabled()
+                with profiling.span('b2'):
+                    pass
+
+        threads = [threading.Thread(target=block_a), threading.Thread(target=block_b)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        def names(name):
+            trace = json.loads((Path(tmp) / name).read_text(encoding='utf-8'))
+            return [e['name'] for e in trace['traceEvents'] if e['ph'] == 'X']
+
+        assert names('a.json') == ['a1']
+        assert names('b.json') == ['b1', 'b2']
+
+
+if __name__ == "__main__":
+    test_tracing_records_tool_and_phase_spans()
+    test_spans_are_noop_when_disabled()
+    test_overlapping_blocks_in_threads_keep_their_events()
+    print("[OK] Profiling")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Script de teste do histórico de execuções (SQLite) e dos relatórios de tendência"""
+
+import asyncio
+import io
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tools import output_manager, run_store
+from tools.compliance_checker import ComplianceChecker
+from tools.run_store import RunRecorder, RunStore, parse_findings
+
+
+def test_recorder_captures_tasks_tokens_and_findings():
+    """Uma validação grava entradas, tarefas com duração, tokens e os gaps do ComplianceChecker"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RunStore(Path(tmp) / 'runs.db')
+        recorder = RunRecorder('run-1', 'LIMS Waters', {'criticidade': 'Alta'}, store=store)
+
+        with recorder:
+            recorder.on_task(SimpleNamespace(name='analise', agent='Analista', raw='Plano de Validação'))
+            ComplianceChecker()._run('output/PRT-IQ.docx', 'CFR_21_Part11')
+            recorder.on_task(SimpleNamespace(name='revisao', agent='Revisor', raw='Relatório'))
+            result = SimpleNamespace(
+                token_usage={'prompt_tokens': 900, 'completion_tokens': 100,
+                             'total_tokens': 1000, 'successful_requests': 4},
+                tasks_output=[SimpleNamespace(name=n, agent='?', raw='') for n in ('analise', 'revisao')]
+                + [SimpleNamespace(name='extra', agent='Navegador', raw='sem callback')])
+            recorder.on_crew(result)
+
+        # Fora da execução, o checker não grava nada
+        ComplianceChecker()._run('output/PRT-IQ.docx', 'RDC_658')
+
+        run = next(store.runs())
+        assert (run['run_id'], run['system'], run['status']) == ('run-1', 'LIMS Waters', 'concluida')
+        assert run['total_tokens'] == 1000 and run['llm_requests'] == 4
+        assert '"criticidade": "Alta"' in run['inputs']
+
+        tasks = store.tasks('run-1')
+        assert [t['task'] for t in tasks] == ['analise', 'revisao', 'extra']
+        assert tasks[0]['duration_s'] is not None and tasks[2]['duration_s'] is None
+
+        findings = store.findings('run-1')
+        assert findings == [{'regulation': 'CFR_21_Part11', 'severity': 'atencao',
+                             'item': '§11.10 - Controles de sistema fechado: REVISAR'}]
+
+        try:
+            with RunRecorder('run-2', 'LIMS Waters', store=store):
+                raise RuntimeError('provedor fora do ar')
+        except RuntimeError:
+            pass
+        assert next(store.runs(limit=1))['status'] == 'erro'
+        store.close()
+
+
+def test_unavailable_history_does_not_stop_validation():
+    """Com VSC_RUN_DB inacessível, a validação roda normalmente e só gera um aviso"""
+    with tempfile.TemporaryDirectory() as tmp:
+        blocker = Path(tmp) / 'arquivo'
+        blocker.write_text('não é uma pasta', encoding='utf-8')
+        os.environ['VSC_RUN_DB'] = str(blocker / 'runs.db')
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                with RunRecorder('run-1', 'LIMS Waters') as recorder:
+                    recorder.on_task(SimpleNamespace(name='analise', agent='Analista', raw=''))
+                    report = ComplianceChecker()._run('output/PRT-IQ.docx', 'CFR_21_Part11')
+                    recorder.on_crew(SimpleNamespace(token_usage={'total_tokens': 1}, tasks_output=[]))
+        finally:
+            del os.environ['VSC_RUN_DB']
+
+        assert recorder.store is None
+        assert 'CFR' in report
+        assert 'Histórico de execuções indisponível' in output.getvalue()
+
+
+def test_concurrent_runs_keep_their_own_findings():
+    """Duas validações simultâneas no mesmo processo: cada gap vai para a execução certa"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RunStore(Path(tmp) / 'runs.db')
+
+        async def validate(run_id, regulation):
+            output_manager.start_run(run_id)
+            with RunRecorder(run_id, 'LIMS Waters', store=store):
+                await asyncio.sleep(0.05)  # a outra validação entra enquanto esta está ativa
+                await ComplianceChecker()._arun('output/PRT-IQ.docx', regulation)
+                return await asyncio.to_thread(output_manager.current_run_id)
+
+        async def main():
+            return await asyncio.gather(validate('run-a', 'CFR_21_Part11'), validate('run-b', 'RDC_658'))
+
+        assert asyncio.run(main()) == ['run-a', 'run-b']
+        assert output_manager.current_run_id() is None
+        assert {f['regulation'] for f in store.findings('run-a')} == {'CFR_21_Part11'}
+        assert {f['regulation'] for f in store.findings('run-b')} == {'RDC_658'}
+        store.close()
+
+
+def test_trend_queries_over_many_runs():
+    """Agentes mais lentos e gaps mais frequentes por agregação SQL, com filtros"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RunStore(Path(tmp) / 'runs.db')
+        for i in range(2000):
+            run_id = f'run-{i:04d}'
+            system = 'LIMS' if i % 2 else 'ERP'
+            store.start_run(run_id, system)
+            store.record_task(run_id, 0, 'analise', 'Analista', 10.0 + i % 5, '')
+            store.record_task(run_id, 1, 'execucao', 'Navegador', 60.0 + i % 7, '')
+            store.record_findings(run_id, [('RDC_658', 'atencao', 'Art. 9º - Revalidação periódica')]
+                                  + ([('ALCOA', 'nao_conforme', 'Audit trail desativado')] if i % 10 == 0 else []))
+            store.finish_run(run_id, 'concluida', 70.0)
+
+        slowest = store.slowest_agents()
+        assert [row['agent'] for row in slowest] == ['Navegador', 'Analista']
+        assert slowest[0]['tasks'] == 2000 and slowest[0]['max_s'] == 66.0
+
+        gaps = store.frequent_gaps(limit=1)
+        assert gaps[0]['item'] == 'Art. 9º - Revalidação periódica' and gaps[0]['runs'] == 2000
+        assert store.frequent_gaps(system='ERP')[1]['occurrences'] == 200
+
+        assert sum(1 for _ in store.runs(system='LIMS')) == 1000
+        assert store.slowest_agents(since='2999-01-01') == []
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            run_store.main(['gaps', '--db', str(store.path), '--limite', '2'])
+        assert 'Art. 9º - Revalidação periódica' in output.getvalue()
+        store.close()
+
+
+def test_parse_findings_reads_regulation_header():
+    text = "=== VERIFICAÇÃO GAMP 5 ===\n✅ OK\n⚠️ URS: AUSENTE\n❌ RTM: ABERTA\n"
+    assert parse_findings(text) == [('GAMP 5', 'atencao', 'URS: AUSENTE'), ('GAMP 5', 'nao_conforme', 'RTM: ABERTA')]
+
+
+if __name__ == "__main__":
+    test_recorder_captures_tasks_tokens_and_findings()
+    test_unavailable_history_does_not_stop_validation()
+    test_concurrent_runs_keep_their_own_findings()
+    test_trend_queries_over_many_runs()
+    test_parse_findings_reads_regulation_header()
+    print("[OK] Run store")
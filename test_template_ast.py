@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Script de teste do template AST e dos renderizadores Markdown/DOCX/PDF"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Adicionar path do projeto
+sys.path.insert(0, str(Path(__file__).parent))
+
+from docx import Document
+
+from tools.fingerprint import compute_fingerprint
+from tools.template_ast import BULLET, HEADING, STRONG, TABLE, compile_template
+from tools.template_generator import TemplateGenerator
+from tools.template_processor import TemplateProcessor
+from tools import template_render
+from tools.template_render import DOCX, PDF, SimpleDocTemplate, build_docx, render_bytes, render_markdown
+
+TEMPLATE = """# PROTOCOLO {{NOME_SISTEMA}}
+
+**Sistema [[NOME_SISTEMA]]**
+
+## 1. ESCOPO
+
+- Versão {{VERSAO}}
+1. Fabricante [[FABRICANTE]]
+
+| Teste | Resultado |
+|-------|-----------|
+| TI-01 | [[RESULTADO_TI_01]] |
+"""
+
+
+def test_both_syntaxes_compile_into_one_ast():
+    """{{...}} e [[...]] viram o mesmo tipo de nó e seguem a política de ausentes de cada sintaxe"""
+    template = compile_template(TEMPLATE)
+    assert template.markers == {'NOME_SISTEMA', 'VERSAO', 'FABRICANTE', 'RESULTADO_TI_01'}
+    assert compile_template(TEMPLATE) is template
+
+    document = template.fill({'NOME_SISTEMA': 'LIMS', 'RESULTADO_TI_01': 'Aprovado'})
+    markdown = render_markdown(document)
+    assert markdown.startswith("# PROTOCOLO LIMS\n\n**Sistema LIMS**\n")
+    assert '- Versão {{MISSING: VERSAO}}' in markdown
+    assert '1. Fabricante [[FABRICANTE]]' in markdown
+    assert document.missing == {'[[FABRICANTE]]'}
+
+    kinds = [block.kind for block in document.blocks]
+    assert kinds[0] == HEADING and STRONG in kinds and BULLET in kinds
+    table = document.blocks[kinds.index(TABLE)]
+    assert table.rows == [['Teste', 'Resultado'], ['TI-01', 'Aprovado']]
+
+
+def test_each_processor_only_fills_its_own_syntax():
+    """Generator só preenche {{...}} e Processor só [[...]]; a outra sintaxe fica como texto"""
+    processor = TemplateProcessor()
+    assert processor.replace_placeholders("Valor [[A]] e {{B}}", {'A': '1'}) == "Valor 1 e {{B}}"
+    assert processor.replace_placeholders("{{A}} [[A]]", {'A': 'v'}) == "{{A}} v"
+    assert processor.replace_placeholders("[[#each L]]\n[[ITEM]]\n[[/each]]\n{{#each L}}", {'L': [1]}) == "1\n{{#each L}}"
+
+    generator = TemplateGenerator()
+    assert generator._fill_template("{{A}} [[B]]", {'A': '1', 'B': '2'}) == "1 [[B]]"
+    assert generator._fill_template("{{C}} [[C]]", {}) == "{{MISSING: C}} [[C]]"
+
+
+def test_multiline_values_are_classified():
+    """Valor com quebra de linha gera linhas classificadas como se estivessem no template"""
+    document = compile_template("[[ITENS]]").fill({'ITENS': '## Itens\n- um\n- dois'})
+    assert [block.kind for block in document.blocks] == [HEADING, BULLET, BULLET]
+    assert render_markdown(document) == '## Itens\n- um\n- dois'
+
+
+def test_one_fill_renders_every_format():
+    """O mesmo documento preenchido alimenta Markdown, DOCX e PDF"""
+    document = compile_template(TEMPLATE).fill({
+        'NOME_SISTEMA': 'LIMS', 'VERSAO': '2.0', 'FABRICANTE': 'ACME', 'RESULTADO_TI_01': 'Aprovado',
+    })
+
+    docx = Document(io.BytesIO(render_bytes(document, DOCX)))
+    texts = [p.text for p in docx.paragraphs]
+    assert 'PROTOCOLO LIMS' in texts and 'Sistema LIMS' in texts
+    assert docx.tables[0].cell(1, 1).text == 'Aprovado'
+
+    # Mesmo resultado do caminho antigo via Markdown intermediário
+    via_markdown = TemplateProcessor()._build_docx(render_markdown(document))
+    assert [p.text for p in via_markdown.paragraphs] == [p.text for p in build_docx(document).paragraphs]
+
+    if SimpleDocTemplate is not None:
+        assert render_bytes(document, PDF).startswith(b'%PDF-')
+
+
+def test_generator_writes_format_from_extension():
+    """TemplateGenerator grava DOCX direto quando a saída termina em .docx"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / 'PRT-IQ-LIMS.docx'
+        result = TemplateGenerator()._run('IQ', json.dumps({'NOME_SISTEMA': 'LIMS'}), str(output))
+        assert result.startswith('✅')
+        assert 'LIMS' in result
+
+        docx = Document(str(output))
+        assert any('LIMS' in p.text for p in docx.paragraphs)
+
+
+OQ_TEMPLATE = """# OQ {{NOME_SISTEMA}}
+
+{{#each TESTES}}
+## {{INDICE}}. Teste {{ID}} - {{NOME_SISTEMA}}
+
+| Passo | Resultado |
+|-------|-----------|
+{{#each PASSOS}}
+| {{ID}}.{{INDICE}} | {{ITEM}} |
+{{/each}}
+
+{{/each}}
+Fim"""
+
+
+def test_each_blocks_resolve_item_then_context():
+    """Itens resolvem primeiro, depois o contexto; INDICE e ITEM valem dentro do bloco"""
+    document = compile_template(OQ_TEMPLATE).fill({
+        'NOME_SISTEMA': 'LIMS',
+        'TESTES': [
+            {'ID': 'TI-01', 'PASSOS': ['Aprovado', 'Reprovado']},
+            {'ID': 'TI-02', 'PASSOS': ['Aprovado']},
+        ],
+    })
+    markdown = render_markdown(document)
+    assert '## 1. Teste TI-01 - LIMS' in markdown
+    assert '| TI-01.2 | Reprovado |' in markdown
+    assert '## 2. Teste TI-02 - LIMS' in markdown
+    assert '| TI-02.1 | Aprovado |' in markdown
+    assert markdown.endswith('Fim')
+
+    tables = [block for block in document.blocks if block.kind == TABLE]
+    assert [len(table.rows) for table in tables] == [3, 2]
+
+    empty = render_markdown(compile_template(OQ_TEMPLATE).fill({'NOME_SISTEMA': 'LIMS', 'TESTES': []}))
+    assert empty == '# OQ LIMS\n\nFim'
+
+    document = compile_template("[[#each ITENS]]\n- [[ITEM]]\n[[/each]]").fill({})
+    assert document.missing == {'[[ITENS]]'}
+
+    for broken in ("{{#each A}}\nx", "x\n{{/each}}"):
+        try:
+            compile_template(broken)
+        except ValueError:
+            continue
+        raise AssertionError(f"template inválido aceito: {broken!r}")
+
+
+def test_fragment_includes():
+    """Fragmentos são incluídos na compilação, com proteção contra ciclos e recompilação se mudarem"""
+    with tempfile.TemporaryDirectory() as tmp:
+        fragments = Path(tmp)
+        (fragments / 'assinaturas.md').write_text(
+            "| Papel | Nome |\n|---|---|\n[[#each SIGNATARIOS]]\n| [[PAPEL]] | [[NOME]] |\n[[/each]]\n",
+            encoding='utf-8')
+        source = "# QI\n[[> assinaturas]]\nFim"
+
+        template = compile_template(source, fragments)
+        assert template.markers == {'SIGNATARIOS', 'PAPEL', 'NOME'}
+        markdown = render_markdown(template.fill({'SIGNATARIOS': [{'PAPEL': 'Revisor', 'NOME': 'Maria'}]}))
+        assert markdown == "# QI\n| Papel | Nome |\n|---|---|\n| Revisor | Maria |\nFim"
+
+        before = compute_fingerprint(source, {}, includes=template.includes)
+        (fragments / 'assinaturas.md').write_text("Assinado por [[NOME]]\n", encoding='utf-8')
+        os.utime(fragments / 'assinaturas.md', ns=(0, 1))
+        recompiled = compile_template(source, fragments)
+        assert recompiled is not template
+        assert render_markdown(recompiled.fill({'NOME': 'Ana'})) == "# QI\nAssinado por Ana\nFim"
+        assert compute_fingerprint(source, {}, includes=recompiled.includes)['template'] != before['template']
+
+        (fragments / 'a.md').write_text("[[> b]]", encoding='utf-8')
+        (fragments / 'b.md').write_text("[[> a]]", encoding='utf-8')
+        for source in ("[[> a]]", "[[> ../fora]]"):
+            try:
+                compile_template(source, fragments)
+            except ValueError:
+                continue
+            raise AssertionError(f"inclusão inválida aceita: {source!r}")
+
+
+def test_large_oq_from_structured_data():
+    """OQ com 1000 casos de teste a partir de uma lista, sem marcadores numerados à mão"""
+    testes = [{'ID': f'TI-{i:04d}', 'PASSOS': ['Aprovado', 'Aprovado', 'Reprovado']} for i in range(1000)]
+    document = TemplateGenerator()._fill_document(OQ_TEMPLATE, {'NOME_SISTEMA': 'LIMS', 'TESTES': testes})
+
+    tables = [block for block in document.blocks if block.kind == TABLE]
+    assert len(tables) == 1000
+    assert tables[-1].rows[-1] == ['TI-0999.3', 'Reprovado']
+    assert not document.missing
+
+
+def _make_dotx(path, font_name):
+    """Modelo corporativo .dotx com timbre no cabeçalho e sem o estilo 'List Bullet'"""
+    base = Document()
+    base.styles['Normal'].font.name = font_name
+    base.styles['List Bullet'].delete()
+    base.sections[0].header.paragraphs[0].text = 'KIVALITA - Documento Controlado'
+    buffer = io.BytesIO()
+    base.save(buffer)
+
+    with zipfile.ZipFile(buffer) as source, zipfile.ZipFile(path, 'w') as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == '[Content_Types].xml':
+                content = content.replace(b'document.main+xml', b'template.main+xml')
+            target.writestr(item, content)
+
+
+def test_base_docx_template_is_cached_and_cloned():
+    """Modelo .dotx é carregado uma vez, clonado por documento e recarregado se mudar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dotx = Path(tmp) / 'timbre.dotx'
+        _make_dotx(dotx, 'Arial')
+        processor = TemplateProcessor(base_template=str(dotx))
+        document = processor.fill("# QI [[NOME_SISTEMA]]\n- item\n[[#each N]]\nLinha [[ITEM]]\n[[/each]]",
+                                  {'NOME_SISTEMA': 'LIMS', 'N': [1, 2]})
+
+        for name in ('a.docx', 'b.docx'):
+            processor.render(document, str(Path(tmp) / name))
+        key = str(dotx.resolve())
+        assert key in template_render._bases
+
+        docx = Document(str(Path(tmp) / 'b.docx'))
+        assert docx.sections[0].header.paragraphs[0].text == 'KIVALITA - Documento Controlado'
+        assert docx.styles['Normal'].font.name == 'Arial'
+        assert [p.text for p in docx.paragraphs] == ['QI LIMS', 'item', 'Linha 1', 'Linha 2']
+        assert docx.paragraphs[1].style.name == 'Normal'
+
+        first, _ = template_render.new_docx(str(dotx))
+        second, _ = template_render.new_docx(str(dotx))
+        assert first is not second and first.element is not second.element
+
+        _make_dotx(dotx, 'Verdana')
+        os.utime(dotx, ns=(0, 1))
+        processor.render(document, str(Path(tmp) / 'c.docx'))
+        assert Document(str(Path(tmp) / 'c.docx')).styles['Normal'].font.name == 'Verdana'
+
+
+def test_base_template_from_env_is_part_of_fingerprint():
+    """Trocar TEMPLATE_DOCX regenera protocolos .docx que estavam atualizados"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / 'PRT-IQ-LIMS.docx'
+        generator = TemplateGenerator()
+        data = json.dumps({'NOME_SISTEMA': 'LIMS'})
+        assert generator._run('IQ', data, str(output)).startswith('✅')
+        assert generator._run('IQ', data, str(output)).startswith('⏭️')
+
+        dotx = Path(tmp) / 'timbre.dotx'
+        _make_dotx(dotx, 'Arial')
+        os.environ['TEMPLATE_DOCX'] = str(dotx)
+        try:
+            assert generator._run('IQ', data, str(output)).startswith('✅')
+            assert Document(str(output)).sections[0].header.paragraphs[0].text.startswith('KIVALITA')
+        finally:
+            del os.environ['TEMPLATE_DOCX']
+
+
+if __name__ == "__main__":
+    test_both_syntaxes_compile_into_one_ast()
+    test_each_processor_only_fills_its_own_syntax()
+    test_multiline_values_are_classified()
+    test_one_fill_renders_every_format()
+    test_generator_writes_format_from_extension()
+    test_each_blocks_resolve_item_then_context()
+    test_fragment_includes()
+    test_large_oq_from_structured_data()
+    test_base_docx_template_is_cached_and_cloned()
+    test_base_template_from_env_is_part_of_fingerprint()
+    print("[OK] Template AST")
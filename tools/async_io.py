@@ -0,0 +1,81 @@
+"""
+Digital Worker VSC - Async I/O
+Executor limitado para tirar parsing e gravação bloqueantes do event loop,
+usado pelas implementações _arun das ferramentas
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Optional
+import asyncio
+import contextvars
+import os
+import threading
+
+from .output_manager import atomic_path
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Executor compartilhado pelas ferramentas
+
+    O tamanho vem de VSC_IO_WORKERS (padrão: 8). Ser limitado evita que muitos
+    agentes simultâneos criem threads sem controle.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get('VSC_IO_WORKERS', '8'))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vsc-io')
+        return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Executa uma função bloqueante no executor e aguarda o resultado
+
+    Se a tarefa for cancelada, o await termina imediatamente com CancelledError;
+    a função em andamento na thread não é interrompida, mas o resultado é descartado.
+    A função roda numa cópia do contexto de quem chama (execução ativa, RunRecorder).
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), partial(context.run, func, *args, **kwargs))
+
+
+async def read_text(path, encoding: str = 'utf-8') -> str:
+    """Lê um arquivo de texto sem bloquear o event loop"""
+    return await run_blocking(Path(path).read_text, encoding=encoding)
+
+
+def _write_atomic(path: Path, data: bytes, cancelled: threading.Event) -> None:
+    """Grava em arquivo temporário e só renomeia se a escrita não foi cancelada"""
+    with atomic_path(path) as tmp:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        if cancelled.is_set():
+            raise asyncio.CancelledError()
+
+
+async def write_bytes(path, data: bytes) -> None:
+    """
+    Grava um arquivo sem bloquear o event loop
+
+    A escrita é atômica (arquivo temporário + rename): se a tarefa for cancelada
+    antes do rename, o destino não é criado nem fica pela metade.
+    """
+    cancelled = threading.Event()
+    try:
+        await run_blocking(_write_atomic, Path(path), data, cancelled)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
+async def write_text(path, text: str, encoding: str = 'utf-8') -> None:
+    """Versão texto de write_bytes()"""
+    await write_bytes(path, text.encode(encoding))
@@ -1,13 +1,392 @@
-"""Browser Automation Tool - Automatiza navegação em sistemas farmacêuticos""" 
-# from crewai_tools import BaseTool
-from typing import Type, Optional, Any
-from pydantic import BaseModel, Field
+"""Browser Automation Tool - Automatiza navegação em sistemas farmacêuticos"""
+from crewai.tools import BaseTool
+from typing import Type, Optional, Any, Dict, List
+from pydantic import BaseModel, Field, PrivateAttr
+from pathlib import Path
+from urllib.parse import urljoin
+from datetime import datetime
+import asyncio
+import atexit
+import json
+import os
+import threading
 import time
 
+from .evidence_store import EvidenceStore
+from .output_manager import current_run_id, sanitize_component
+from .profiling import span, traced
+
 class BrowserInput(BaseModel):
     """Input para BrowserTool"""
-    action: str = Field(..., description="Ação: 'navigate', 'click', 'fill', 'extract', 'screenshot'")
+    action: str = Field(..., description="Ação: 'navigate', 'click', 'fill', 'extract', 'screenshot', 'run_checklist'")
     url: Optional[str] = Field(None, description="URL para navegar")
     selector: Optional[str] = Field(None, description="Seletor CSS do elemento")
     value: Optional[str] = Field(None, description="Valor para preencher")
-    
+    steps: Optional[str] = Field(
+        None,
+        description=(
+            "Para 'run_checklist': JSON com lista de passos do IQ/OQ. Cada passo tem 'id' e "
+            "'action'/'url'/'selector'/'value'/'expected', ou uma lista 'actions' executada em sequência"
+        )
+    )
+
+
+class BrowserSettings(BaseModel):
+    """Configurações de acesso ao sistema a validar (lidas do .env)"""
+    base_url: str = ""
+    user: Optional[str] = None
+    password: Optional[str] = None
+    headless: bool = True
+    executable_path: Optional[str] = None
+    timeout_ms: int = 30000
+    pool_size: int = 4
+    login_user_selector: str = "#username"
+    login_password_selector: str = "#password"
+    login_submit_selector: str = "button[type=submit]"
+    evidence_dir: str = "./output/evidencias"
+
+    @classmethod
+    def from_env(cls) -> 'BrowserSettings':
+        """Carrega configurações das variáveis de ambiente (o .env é lido pelo python-dotenv no main.py)"""
+        env = os.environ.get
+        return cls(
+            base_url=env('SISTEMA_URL', ''),
+            user=env('SISTEMA_USER') or None,
+            password=env('SISTEMA_PASSWORD') or None,
+            headless=env('BROWSER_HEADLESS', 'true').lower() != 'false',
+            executable_path=env('BROWSER_EXECUTABLE_PATH') or None,
+            timeout_ms=int(env('BROWSER_TIMEOUT', '30000')),
+            pool_size=int(env('BROWSER_POOL_SIZE', '4')),
+            login_user_selector=env('BROWSER_LOGIN_USER_SELECTOR', cls.model_fields['login_user_selector'].default),
+            login_password_selector=env('BROWSER_LOGIN_PASSWORD_SELECTOR', cls.model_fields['login_password_selector'].default),
+            login_submit_selector=env('BROWSER_LOGIN_SUBMIT_SELECTOR', cls.model_fields['login_submit_selector'].default),
+            evidence_dir=str(Path(env('OUTPUT_DIR', './output')) / 'evidencias'),
+        )
+
+
+class BrowserSessionPool:
+    """
+    Pool de contextos de navegador reutilizáveis e já autenticados
+
+    Um único Chromium headless é lançado; o login é feito uma vez e o estado
+    (cookies, localStorage) é copiado para `pool_size` contextos. Cada passo
+    do checklist pega um contexto livre, então casos de teste independentes
+    rodam em paralelo sem relançar o navegador.
+
+    O pool vive em um event loop próprio (thread em segundo plano), de modo
+    que pode ser usado tanto por código síncrono quanto assíncrono.
+    """
+
+    def __init__(self, settings: Optional[BrowserSettings] = None):
+        self.settings = settings or BrowserSettings.from_env()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='browser-pool', daemon=True)
+        self._thread.start()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._available: Optional[asyncio.Queue] = None
+        self._interactive_page = None
+        self._interactive_lock: Optional[asyncio.Lock] = None
+        self._evidence: Dict[Optional[str], EvidenceStore] = {}
+        self._evidence_lock = threading.Lock()
+
+    # ---------- Ciclo de vida ----------
+
+    def run(self, coro):
+        """Executa uma corrotina no loop do pool e aguarda o resultado (uso síncrono)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def arun(self, coro):
+        """Executa uma corrotina no loop do pool a partir de outro event loop"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def start(self) -> 'BrowserSessionPool':
+        """Lança o navegador e autentica os contextos (idempotente)"""
+        with self._start_lock:
+            if not self._started:
+                self.run(self._start())
+                self._started = True
+        return self
+
+    def evidence_store(self, run_id: Optional[str] = None) -> EvidenceStore:
+        """
+        Repositório de evidências da execução (por padrão, a ativa)
+
+        Com execução ativa, cada execução tem sua própria pasta e numeração
+        EV-0001... O pool sobrevive entre execuções, então o repositório é
+        resolvido a cada chamada, na thread de quem chama.
+        """
+        run_id = run_id or current_run_id()
+        with self._evidence_lock:
+            store = self._evidence.get(run_id)
+            if store is None:
+                evidence_dir = Path(self.settings.evidence_dir)
+                if run_id:
+                    evidence_dir = evidence_dir / sanitize_component(run_id)
+                store = self._evidence[run_id] = EvidenceStore(evidence_dir)
+            return store
+
+    @property
+    def evidence(self) -> EvidenceStore:
+        """Repositório de evidências da execução ativa"""
+        return self.evidence_store()
+
+    async def _start(self) -> None:
+        from playwright.async_api import async_playwright
+
+        try:
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.settings.headless,
+                executable_path=self.settings.executable_path,
+            )
+
+            storage_state = await self._login()
+
+            self._available = asyncio.Queue()
+            for _ in range(max(1, self.settings.pool_size)):
+                self._available.put_nowait(await self._new_context(storage_state))
+
+            # Página persistente para ações isoladas chamadas uma a uma pelo agente
+            interactive_context = await self._new_context(storage_state)
+            self._interactive_page = await interactive_context.new_page()
+            self._interactive_lock = asyncio.Lock()
+        except Exception:
+            await self._close()
+            raise
+
+    async def _new_context(self, storage_state):
+        context = await self._browser.new_context(storage_state=storage_state, base_url=self.settings.base_url or None)
+        context.set_default_timeout(self.settings.timeout_ms)
+        self._contexts.append(context)
+        return context
+
+    async def _login(self) -> Optional[Dict[str, Any]]:
+        """Faz login uma única vez e retorna o estado de sessão para os demais contextos"""
+        if not (self.settings.base_url and self.settings.user):
+            return None
+
+        context = await self._browser.new_context()
+        context.set_default_timeout(self.settings.timeout_ms)
+        try:
+            page = await context.new_page()
+            await page.goto(self.settings.base_url)
+            await page.fill(self.settings.login_user_selector, self.settings.user)
+            await page.fill(self.settings.login_password_selector, self.settings.password or "")
+            await page.click(self.settings.login_submit_selector)
+            await page.wait_for_load_state('networkidle')
+            return await context.storage_state()
+        finally:
+            await context.close()
+
+    def close(self) -> None:
+        """Fecha contextos, navegador e o loop do pool"""
+        if self._loop.is_closed():
+            return
+        if self._started:
+            self.run(self._close())
+            self._started = False
+        with self._evidence_lock:
+            for store in self._evidence.values():
+                store.close()
+            self._evidence = {}
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _close(self) -> None:
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    # ---------- Execução ----------
+
+    async def _run_action(self, page, step: Dict[str, Any], evidence: EvidenceStore) -> Dict[str, Any]:
+        """Executa uma ação em uma página já aberta"""
+        action = step.get('action')
+        selector = step.get('selector')
+        result: Dict[str, Any] = {'action': action}
+
+        if action == 'navigate':
+            await page.goto(urljoin(self.settings.base_url, step.get('url') or ''))
+            result['url'] = page.url
+        elif action == 'click':
+            await page.click(selector)
+        elif action == 'fill':
+            await page.fill(selector, str(step.get('value') or ''))
+        elif action == 'extract':
+            result['text'] = await page.inner_text(selector or 'body')
+        elif action == 'screenshot':
+            data = await page.screenshot(full_page=True)
+            result['evidence'] = await evidence.acapture(
+                step.get('id') or '', data, 'screenshot', 'png', step.get('value') or page.url
+            )
+        else:
+            raise ValueError(f"Ação '{action}' não reconhecida.")
+
+        expected = step.get('expected')
+        if expected is not None:
+            observed = result.get('text', page.url)
+            result['passed'] = str(expected) in observed
+
+        return result
+
+    async def run_step(self, step: Dict[str, Any], evidence: Optional[EvidenceStore] = None) -> Dict[str, Any]:
+        """
+        Executa um passo do checklist em um contexto livre do pool
+
+        Um passo pode ser uma ação simples ou conter 'actions', executadas em
+        sequência na mesma página (ex: navegar, preencher, clicar, conferir).
+        Sem `evidence`, usa o repositório de evidence_store().
+        """
+        if evidence is None:
+            evidence = self.evidence_store()
+        context = await self._available.get()
+        started = time.perf_counter()
+        outcome: Dict[str, Any] = {
+            'id': step.get('id'),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'actions': [],
+        }
+        page = await context.new_page()
+        try:
+            with span(f"step {step.get('id')}", 'browser'):
+                for action in step.get('actions') or [step]:
+                    action_result = await self._run_action(page, {'id': step.get('id'), **action}, evidence)
+                    outcome['actions'].append(action_result)
+            passed = all(a.get('passed', True) for a in outcome['actions'])
+            outcome['status'] = 'Aprovado' if passed else 'Reprovado'
+        except Exception as e:
+            outcome['status'] = 'Erro'
+            outcome['error'] = str(e)
+        finally:
+            await page.close()
+            self._available.put_nowait(context)
+            outcome['duration_s'] = round(time.perf_counter() - started, 3)
+
+        return outcome
+
+    async def run_interactive(self, step: Dict[str, Any], evidence: Optional[EvidenceStore] = None) -> Dict[str, Any]:
+        """Executa uma ação isolada na página persistente (mantém o estado entre chamadas)"""
+        if evidence is None:
+            evidence = self.evidence_store()
+        async with self._interactive_lock:
+            outcome = {'id': step.get('id'), 'timestamp': datetime.now().isoformat(timespec='seconds')}
+            try:
+                outcome['actions'] = [await self._run_action(self._interactive_page, step, evidence)]
+                outcome['status'] = 'Aprovado' if outcome['actions'][0].get('passed', True) else 'Reprovado'
+            except Exception as e:
+                outcome['status'] = 'Erro'
+                outcome['error'] = str(e)
+            return outcome
+
+    async def run_steps(self, steps: List[Dict[str, Any]],
+                        evidence: Optional[EvidenceStore] = None) -> List[Dict[str, Any]]:
+        """Executa os passos em paralelo (limitado ao tamanho do pool), preservando a ordem"""
+        if evidence is None:
+            evidence = self.evidence_store()
+        return list(await asyncio.gather(*(self.run_step(step, evidence) for step in steps)))
+
+
+class BrowserTool(BaseTool):
+    name: str = "Browser Automation Tool"
+    description: str = (
+        "Navega no sistema computadorizado sob validação (SISTEMA_URL) com sessão já autenticada. "
+        "Executa ações isoladas (navigate, click, fill, extract, screenshot) ou um checklist IQ/OQ "
+        "completo ('run_checklist') em paralelo, retornando status e IDs de evidência de cada passo."
+    )
+    args_schema: Type[BaseModel] = BrowserInput
+
+    _pool: Optional[BrowserSessionPool] = PrivateAttr(default=None)
+    _pool_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _settings: Optional[BrowserSettings] = PrivateAttr(default=None)
+
+    def __init__(self, settings: Optional[BrowserSettings] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._settings = settings
+
+    @property
+    def pool(self) -> BrowserSessionPool:
+        """Pool de sessões, criado e autenticado no primeiro uso"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = BrowserSessionPool(self._settings)
+                atexit.register(self._pool.close)
+            return self._pool.start()
+
+    def close(self) -> None:
+        """Encerra o navegador do pool"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    @staticmethod
+    def _build_job(pool: BrowserSessionPool, evidence: EvidenceStore, action: str, url: Optional[str],
+                   selector: Optional[str], value: Optional[str], steps: Optional[str]):
+        """Corrotina que executa o checklist (em paralelo) ou a ação isolada"""
+        if action == 'run_checklist':
+            data = json.loads(steps) if isinstance(steps, str) else steps
+            if not data:
+                raise ValueError("'run_checklist' exige a lista de passos em 'steps'.")
+            return pool.run_steps(data, evidence)
+
+        async def single():
+            step = {'action': action, 'url': url, 'selector': selector, 'value': value}
+            return [await pool.run_interactive(step, evidence)]
+        return single()
+
+    @staticmethod
+    def _format(evidence: EvidenceStore, results: List[Dict[str, Any]]) -> str:
+        manifest = evidence.root / 'manifest.json'
+        approved = sum(1 for r in results if r['status'] == 'Aprovado')
+        header = (
+            f"=== EXECUÇÃO DE TESTES ===\n{approved}/{len(results)} passos aprovados\n"
+            f"Manifesto de evidências: {manifest}\n\n"
+        )
+        return header + json.dumps(results, ensure_ascii=False, indent=2)
+
+    @traced()
+    def _run(self, action: str, url: Optional[str] = None, selector: Optional[str] = None,
+             value: Optional[str] = None, steps: Optional[str] = None) -> str:
+        """
+        Executa ação ou checklist no navegador
+
+        Args:
+            action: navigate, click, fill, extract, screenshot, run_checklist
+            url: URL (absoluta ou relativa a SISTEMA_URL)
+            selector: Seletor CSS
+            value: Valor para 'fill'
+            steps: JSON com os passos para 'run_checklist'
+        """
+        try:
+            pool = self.pool
+            # Resolvido aqui, e não no loop do pool, para valer a execução de quem chama
+            evidence = pool.evidence_store()
+            results = pool.run(self._build_job(pool, evidence, action, url, selector, value, steps))
+            evidence.flush()
+            return self._format(evidence, results)
+        except Exception as e:
+            return f"❌ Erro na automação do navegador: {str(e)}"
+
+    @traced()
+    async def _arun(self, action: str, url: Optional[str] = None, selector: Optional[str] = None,
+                    value: Optional[str] = None, steps: Optional[str] = None) -> str:
+        """Versão assíncrona"""
+        try:
+            pool = await asyncio.to_thread(lambda: self.pool)
+            evidence = await asyncio.to_thread(pool.evidence_store)
+            results = await pool.arun(self._build_job(pool, evidence, action, url, selector, value, steps))
+            await asyncio.to_thread(evidence.flush)
+            return self._format(evidence, results)
+        except Exception as e:
+            return f"❌ Erro na automação do navegador: {str(e)}"
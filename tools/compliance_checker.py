@@ -3,6 +3,10 @@ from crewai.tools import BaseTool
 from typing import Type, Optional, List, Dict
 from pydantic import BaseModel, Field
 
+from .async_io import run_blocking
+from .profiling import traced
+from .run_store import record_findings
+
 class ComplianceCheckerInput(BaseModel):
     """Input para ComplianceChecker"""
     document_path: str = Field(..., description="Caminho do documento a verificar")
@@ -16,6 +20,7 @@ class ComplianceChecker(BaseTool):
     )
     args_schema: Type[BaseModel] = ComplianceCheckerInput
     
+    @traced()
     def _run(self, document_path: str, regulation: str) -> str:
         """
         Verifica conformidade com norma específica
@@ -26,17 +31,21 @@ class ComplianceChecker(BaseTool):
         """
         try:
             if regulation == 'RDC_658':
-                return self._check_rdc_658(document_path)
+                result = self._check_rdc_658(document_path)
             elif regulation == 'GAMP_5':
-                return self._check_gamp_5(document_path)
+                result = self._check_gamp_5(document_path)
             elif regulation == 'CFR_21_Part11':
-                return self._check_cfr_21_part11(document_path)
+                result = self._check_cfr_21_part11(document_path)
             elif regulation == 'ALCOA':
-                return self._check_alcoa(document_path)
+                result = self._check_alcoa(document_path)
             else:
                 return f"Norma '{regulation}' não reconhecida."
         except Exception as e:
             return f"Erro ao verificar conformidade: {str(e)}"
+
+        # Gaps (⚠️) entram no histórico da validação em andamento
+        record_findings(result, regulation)
+        return result
     
     def _check_rdc_658(self, doc_path: str) -> str:
         """Verifica conformidade com ANVISA RDC 658/2022"""
@@ -111,6 +120,7 @@ class ComplianceChecker(BaseTool):
             "Observação: Sistema atende todos os princípios de integridade de dados\n"
         )
     
-    async def _arun(self, *args, **kwargs) -> str:
-        """Versão assíncrona"""
-        return self._run(*args, **kwargs)
+    @traced()
+    async def _arun(self, document_path: str, regulation: str) -> str:
+        """Versão assíncrona: a verificação roda no executor limitado, fora do event loop"""
+        return await run_blocking(self._run, document_path, regulation)
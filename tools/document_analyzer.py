@@ -4,6 +4,9 @@ from pydantic import BaseModel, Field
 from typing import Type, Optional
 import re
 
+from .async_io import run_blocking
+from .profiling import traced
+
 class DocumentAnalyzerInput(BaseModel):
     """Input para DocumentAnalyzer"""
     document_path: str = Field(..., description="Caminho do documento a analisar")
@@ -17,6 +20,7 @@ class DocumentAnalyzer(BaseTool):
     )
     args_schema: Type[BaseModel] = DocumentAnalyzerInput
 
+    @traced()
     def _run(self, document_path: str, analysis_type: str) -> str:
         """
         Analisa documento e retorna insights
@@ -29,3 +33,8 @@ class DocumentAnalyzer(BaseTool):
             Análise estruturada do documento
         """
         return f"Análise do documento {document_path} realizada com foco em {analysis_type}"
+
+    @traced()
+    async def _arun(self, document_path: str, analysis_type: str) -> str:
+        """Versão assíncrona: a análise roda no executor limitado, fora do event loop"""
+        return await run_blocking(self._run, document_path, analysis_type)
@@ -1,6 +1,6 @@
 """
 Digital Worker VSC - Knowledge Base Document Reader
-Lê e processa documentos de referência (PDF, Word, Excel)
+Lê e processa documentos de referência (PDF, Word, Excel, Markdown, texto, CSV)
 """
 
 from pathlib import Path
@@ -8,12 +8,52 @@ import PyPDF2
 from docx import Document
 import openpyxl
 import json
+import csv
+
+from .kb_store import KnowledgeStore
+from .kb_scanner import EXTENSION_TYPES, detect_type, iter_documents, scan_documents
+from .profiling import traced
+
+DEFAULT_CATEGORIES = ['manuais', 'especificacoes', 'documentos_empresa', 'normas', 'projeto_atual']
 
 class DocumentReader:
-    def __init__(self, kb_path="knowledge_base"):
+    def __init__(self, kb_path="knowledge_base", categories=None, include=None, exclude=None):
+        """
+        Args:
+            kb_path: Raiz da Knowledge Base
+            categories: Pastas de categoria (padrão: DEFAULT_CATEGORIES)
+            include: Padrões glob aceitos (padrão: extensões com leitor registrado)
+            exclude: Padrões glob ignorados (padrão: temporários do Office e ocultos)
+        """
         self.kb_path = Path(kb_path)
-        self.categories = ['manuais', 'especificacoes', 'documentos_empresa', 'normas', 'projeto_atual']
+        self.categories = list(categories or DEFAULT_CATEGORIES)
+        self.include = include
+        self.exclude = exclude
         self.knowledge = {}
+        
+        # Registro de leitores: tipo detectado -> função de extração
+        self.extensions = dict(EXTENSION_TYPES)
+        self.readers = {
+            'pdf': self.read_pdf,
+            'docx': self.read_word,
+            'xlsx': self.read_excel,
+            'md': self.read_text,
+            'txt': self.read_text,
+            'csv': self.read_csv,
+        }
+    
+    def register_reader(self, doc_type, reader, extensions=()):
+        """
+        Registra (ou substitui) o leitor de um tipo de documento
+        
+        Args:
+            doc_type: Tipo do documento (ex: 'pptx')
+            reader: Função que recebe o caminho e retorna o texto extraído
+            extensions: Extensões associadas ao tipo (ex: ['.pptx'])
+        """
+        self.readers[doc_type] = reader
+        for ext in extensions:
+            self.extensions[ext.lower()] = doc_type
     
     def ensure_folders(self):
         """Cria estrutura de pastas se não existir"""
@@ -21,20 +61,29 @@ class DocumentReader:
             folder = self.kb_path / category
             folder.mkdir(parents=True, exist_ok=True)
     
+    def iter_documents(self):
+        """Percorre a Knowledge Base: (categoria, os.DirEntry) de cada documento"""
+        return iter_documents(self.kb_path, self.categories, self._include_patterns(), self.exclude)
+    
+    def list_documents(self):
+        """Lista os documentos de cada categoria, incluindo subpastas (sem saída no console)"""
+        return scan_documents(self.kb_path, self.categories, self._include_patterns(), self.exclude)
+
+    def _include_patterns(self):
+        """Padrões aceitos: os informados ou as extensões registradas"""
+        return self.include or [f'*{ext}' for ext in self.extensions]
+    
+    def document_key(self, category, file_path):
+        """Chave do documento em self.knowledge: caminho relativo à pasta da categoria"""
+        return Path(file_path).relative_to(self.kb_path / category).as_posix()
+    
     def scan_all_documents(self):
         """Escaneia todos os documentos"""
         print("\n" + "="*60)
         print("🔍 ESCANEANDO KNOWLEDGE BASE")
         print("="*60)
         
-        docs = {cat: [] for cat in self.categories}
-        
-        for category in self.categories:
-            folder = self.kb_path / category
-            if folder.exists():
-                docs[category].extend(list(folder.glob("*.pdf")))
-                docs[category].extend(list(folder.glob("*.docx")))
-                docs[category].extend(list(folder.glob("*.xlsx")))
+        docs = self.list_documents()
         
         total = sum(len(v) for v in docs.values())
         print(f"\n📊 TOTAL: {total} documentos encontrados")
@@ -43,7 +92,7 @@ class DocumentReader:
             if files:
                 print(f"\n📁 {cat.upper()}: {len(files)} arquivo(s)")
                 for f in files:
-                    print(f"   → {f.name}")
+                    print(f"   → {self.document_key(cat, f)}")
         
         return docs
     
@@ -81,6 +130,33 @@ class DocumentReader:
         except Exception as e:
             return f"Erro ao ler Excel: {e}"
     
+    def read_text(self, file_path):
+        """Lê arquivos de texto (Markdown, TXT)"""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+        except Exception as e:
+            return f"Erro ao ler texto: {e}"
+    
+    def read_csv(self, file_path):
+        """Extrai dados de CSV"""
+        try:
+            text = ""
+            with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+                except csv.Error:
+                    dialect = csv.excel
+                for row_num, row in enumerate(csv.reader(f, dialect)):
+                    if row_num >= 100:
+                        break
+                    text += " | ".join([c for c in row if c]) + "\n"
+            return text
+        except Exception as e:
+            return f"Erro ao ler CSV: {e}"
+    
     def extract_all_content(self):
         """Extrai conteúdo de TODOS os documentos"""
         all_docs = self.scan_all_documents()
@@ -93,28 +169,35 @@ class DocumentReader:
                 print(f"\n📖 Processando: {file_path.name}...")
                 
                 try:
-                    if file_path.suffix == '.pdf':
-                        content = self.read_pdf(file_path)
-                    elif file_path.suffix == '.docx':
-                        content = self.read_word(file_path)
-                    elif file_path.suffix == '.xlsx':
-                        content = self.read_excel(file_path)
-                    else:
-                        content = ""
-                    
-                    self.knowledge[category][file_path.name] = {
-                        'path': str(file_path),
-                        'content': content[:10000],
-                        'full_size': len(content),
-                        'type': file_path.suffix
-                    }
-                    print(f"   ✅ {len(content)} caracteres extraídos")
+                    entry = self.extract_file(file_path)
+                    self.knowledge[category][self.document_key(category, file_path)] = entry
+                    print(f"   ✅ {entry['full_size']} caracteres extraídos")
                     
                 except Exception as e:
                     print(f"   ❌ Erro: {e}")
         
         return self.knowledge
     
+    @traced(category='kb')
+    def extract_file(self, file_path):
+        """
+        Extrai o conteúdo de um único documento
+        
+        Returns:
+            Entrada no formato de self.knowledge[categoria][arquivo]
+        """
+        file_path = Path(file_path)
+        doc_type = detect_type(file_path, self.extensions)
+        reader = self.readers.get(doc_type)
+        content = reader(file_path) if reader else ""
+        
+        return {
+            'path': str(file_path),
+            'content': content[:10000],
+            'full_size': len(content),
+            'type': f".{doc_type}" if doc_type else file_path.suffix.lower()
+        }
+    
     def get_summary(self):
         """Gera resumo da Knowledge Base"""
         if not self.knowledge:
@@ -133,6 +216,27 @@ class DocumentReader:
         
         return summary
     
+    def save_store(self, store_path="knowledge_store"):
+        """Grava a Knowledge Base extraída em formato compacto (mmap)"""
+        if not self.knowledge:
+            self.extract_all_content()
+        
+        store = KnowledgeStore.write(self.knowledge, store_path)
+        print(f"💾 Knowledge Store gravada: {store_path} ({len(store)} documentos)")
+        return store
+    
+    def load_store(self, store_path="knowledge_store"):
+        """
+        Carrega a Knowledge Base de uma Knowledge Store em disco
+        
+        O conteúdo não é lido na abertura: os textos ficam no mmap, compartilhado
+        entre processos, e são decodificados sob demanda em search().
+        """
+        store = KnowledgeStore(store_path)
+        self.knowledge = store.as_knowledge()
+        return store
+    
+    @traced(category='kb')
     def search(self, query, max_results=5):
         """Busca em todos os documentos"""
         results = []
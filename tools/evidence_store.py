@@ -0,0 +1,285 @@
+"""
+Digital Worker VSC - Evidence Store
+Captura assíncrona de evidências de teste (screenshots, logs, exports) com
+compressão fora do caminho principal, deduplicação por hash e manifesto
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import threading
+
+from .output_manager import atomic_write
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele as imagens são gravadas como capturadas
+    Image = None
+
+MANIFEST_FILE = 'manifest.json'
+IMAGE_KINDS = ('screenshot',)
+MARKER_PREFIX = 'EVIDENCIA_TESTE_'
+SLOT_POLL_INTERVAL = 0.01
+
+
+class EvidenceStore:
+    """
+    Repositório de evidências endereçado por conteúdo
+
+    capture() devolve o ID da evidência (EV-0001, EV-0002, ...) imediatamente;
+    hash, compressão e gravação rodam em um pool de threads. Capturas idênticas
+    (mesmo SHA-256) apontam para o mesmo arquivo em objects/. A compressão é
+    sempre sem perdas, preservando a evidência original (ALCOA+):
+    - screenshots: WebP lossless (se Pillow estiver instalado)
+    - logs e exports: gzip
+
+    O manifest.json mapeia cada ID ao passo de teste, hash e arquivo gravado, e
+    markers() gera os valores dos marcadores [[EVIDENCIA_TESTE_*]] dos templates.
+    """
+
+    def __init__(self, root="output/evidencias", max_workers: int = 4, max_pending: int = 256):
+        """
+        Args:
+            root: Pasta do repositório de evidências
+            max_workers: Threads de compressão/gravação
+            max_pending: Capturas aguardando gravação antes de capture() bloquear
+                (acapture() aguarda sem bloquear o event loop)
+        """
+        self.root = Path(root)
+        self.objects_path = self.root / 'objects'
+        self.objects_path.mkdir(parents=True, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='evidence')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._objects: Dict[str, Future] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._counter = 0
+
+        self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        """Retoma um repositório existente (IDs continuam a numeração)"""
+        manifest_file = self.root / MANIFEST_FILE
+        if not manifest_file.exists():
+            return
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.entries = manifest.get('evidencias', {})
+        self._counter = manifest.get('ultimo_id', len(self.entries))
+        for entry in self.entries.values():
+            if 'sha256' not in entry:
+                continue
+            done = Future()
+            done.set_result(entry['file'])
+            self._objects.setdefault(entry['sha256'], done)
+
+    # ---------- Captura ----------
+
+    def capture(self, step_id: str, data: bytes, kind: str = 'screenshot',
+                extension: str = 'png', description: str = '') -> str:
+        """
+        Registra uma evidência sem bloquear o teste
+
+        Args:
+            step_id: Passo de teste (ex: 'TI_01_1_1')
+            data: Conteúdo capturado
+            kind: 'screenshot', 'log', 'export'...
+            extension: Extensão original do conteúdo
+            description: Descrição opcional
+
+        Returns:
+            ID da evidência (ex: 'EV-0001')
+        """
+        self._slots.acquire()
+        return self._submit(step_id, data, kind, extension, description)
+
+    async def acapture(self, step_id: str, data: bytes, kind: str = 'screenshot',
+                       extension: str = 'png', description: str = '') -> str:
+        """
+        Versão de capture() para event loops (ex: pool do navegador)
+
+        Com `max_pending` capturas na fila, só esta corrotina espera por uma
+        vaga; as demais sessões no mesmo loop continuam rodando.
+        """
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+        return self._submit(step_id, data, kind, extension, description)
+
+    def _submit(self, step_id: str, data: bytes, kind: str, extension: str, description: str) -> str:
+        """Registra a entrada e agenda a gravação (a vaga em _slots já foi reservada)"""
+        with self._lock:
+            self._counter += 1
+            evidence_id = f"EV-{self._counter:04d}"
+            self.entries[evidence_id] = {
+                'step': step_id,
+                'kind': kind,
+                'description': description,
+                'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+                'original_size': len(data),
+                'extension': extension,
+            }
+
+        try:
+            future = self._executor.submit(self._store, evidence_id, data, kind, extension)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending[evidence_id] = future
+        future.add_done_callback(lambda f: self._finished(evidence_id, f))
+        return evidence_id
+
+    def _finished(self, evidence_id: str, future: Future) -> None:
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self.entries[evidence_id]['error'] = str(error)
+
+    def capture_file(self, step_id: str, file_path, kind: str = 'export', description: str = '') -> str:
+        """Registra um arquivo existente (log, export) como evidência"""
+        file_path = Path(file_path)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        return self.capture(step_id, data, kind, file_path.suffix.lstrip('.') or 'bin',
+                            description or file_path.name)
+
+    def _store(self, evidence_id: str, data: bytes, kind: str, extension: str) -> None:
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            existing = self._objects.get(digest)
+            if existing is None:
+                owner = Future()
+                self._objects[digest] = owner
+
+        if existing is not None:
+            # Duplicata: reaproveita o arquivo (aguarda se ainda estiver sendo gravado)
+            stored_name = existing.result()
+            duplicate = True
+        else:
+            try:
+                stored_name = self._write_object(digest, data, kind, extension)
+            except BaseException as e:
+                with self._lock:
+                    del self._objects[digest]
+                owner.set_exception(e)
+                raise
+            owner.set_result(stored_name)
+            duplicate = False
+
+        with self._lock:
+            self.entries[evidence_id].update({
+                'sha256': digest,
+                'file': stored_name,
+                'stored_size': (self.root / stored_name).stat().st_size,
+                'duplicate': duplicate,
+            })
+
+    def _write_object(self, digest: str, data: bytes, kind: str, extension: str) -> str:
+        """Comprime (sem perdas) e grava o conteúdo em objects/<hash[:2]>/<hash>"""
+        payload, suffix = self._compress(data, kind, extension)
+        target = self.objects_path / digest[:2] / f"{digest}.{suffix}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists():
+            atomic_write(target, payload)
+        return target.relative_to(self.root).as_posix()
+
+    @staticmethod
+    def _compress(data: bytes, kind: str, extension: str):
+        if kind in IMAGE_KINDS:
+            if Image is None:
+                return data, extension
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    buffer = io.BytesIO()
+                    image.save(buffer, format='WEBP', lossless=True, method=4)
+                return buffer.getvalue(), 'webp'
+            except (OSError, ValueError):
+                return data, extension
+        return gzip.compress(data, compresslevel=6, mtime=0), f"{extension}.gz"
+
+    # ---------- Consulta ----------
+
+    def flush(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Aguarda as gravações pendentes e atualiza o manifesto
+
+        Returns:
+            IDs de evidências cuja gravação falhou
+        """
+        with self._lock:
+            pending = dict(self._pending)
+            self._pending.clear()
+
+        wait(pending.values(), timeout=timeout)
+
+        failed = []
+        for evidence_id, future in pending.items():
+            if not future.done():
+                with self._lock:
+                    self._pending[evidence_id] = future
+                continue
+            error = future.exception()
+            if error is not None:
+                failed.append(evidence_id)
+                with self._lock:
+                    self.entries[evidence_id]['error'] = str(error)
+
+        self.write_manifest()
+        return failed
+
+    def write_manifest(self) -> Path:
+        """Grava manifest.json com o mapa evidência -> passo de teste"""
+        with self._lock:
+            manifest = {
+                'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                'ultimo_id': self._counter,
+                'evidencias': self.entries,
+            }
+            data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        manifest_file = self.root / MANIFEST_FILE
+        atomic_write(manifest_file, data)
+        return manifest_file
+
+    def evidence_for_step(self, step_id: str) -> List[str]:
+        """IDs das evidências de um passo de teste"""
+        with self._lock:
+            return [eid for eid, entry in self.entries.items() if entry['step'] == step_id]
+
+    def markers(self, prefix: str = MARKER_PREFIX) -> Dict[str, str]:
+        """
+        Valores dos marcadores de evidência para o contexto dos templates
+
+        Evidências cuja gravação falhou ficam de fora: o documento nunca cita
+        um anexo inexistente (a falha continua registrada no manifesto).
+
+        Returns:
+            {'EVIDENCIA_TESTE_TI_01_1_1': 'EV-0001, EV-0004', ...}
+        """
+        by_step: Dict[str, List[str]] = {}
+        with self._lock:
+            for evidence_id, entry in self.entries.items():
+                if not entry['step'] or 'error' in entry:
+                    continue
+                by_step.setdefault(entry['step'], []).append(evidence_id)
+        return {f"{prefix}{step}": ', '.join(ids) for step, ids in by_step.items()}
+
+    def close(self) -> None:
+        """Grava pendências, atualiza o manifesto e encerra o pool"""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,206 @@
+"""
+Digital Worker VSC - Fingerprint Manifest
+Regeneração incremental: cada saída registra a impressão digital das entradas
+(hash do template + hash canônico do contexto + versão do gerador) em um
+manifesto ao lado dos arquivos gerados
+
+Relatório de saídas desatualizadas:
+    python -m tools.fingerprint output/
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import shutil
+import sys
+
+from .output_manager import atomic_path, atomic_write, file_lock
+
+# Incrementar quando a renderização mudar de forma que saídas antigas fiquem diferentes
+GENERATOR_VERSION = "2"
+
+MANIFEST_FILE = '.vsc-manifest.json'
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_template(template: str, includes: Iterable = ()) -> str:
+    """
+    Hash do template e dos fragmentos incluídos
+
+    Sem fragmentos é igual a hash_bytes(template), mantendo manifestos antigos válidos.
+    """
+    digest = hashlib.sha256(template.encode('utf-8'))
+    for path in sorted(str(p) for p in includes):
+        digest.update(b'\0' + path.encode('utf-8') + b'\0')
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def hash_context(context: Dict[str, Any]) -> str:
+    """Hash do contexto em forma canônica (chaves ordenadas, separadores fixos)"""
+    canonical = json.dumps(context, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hash_bytes(canonical.encode('utf-8'))
+
+
+def compute_fingerprint(template: str, context: Dict[str, Any], template_path=None,
+                        includes: Iterable = ()) -> Dict[str, Any]:
+    """
+    Impressão digital das entradas de um documento
+
+    Args:
+        template: Conteúdo do template
+        context: Dados do documento, incluindo as datas automáticas que serão renderizadas
+        template_path: Caminho do template, usado em stale() para detectar mudanças
+        includes: Fragmentos incluídos pelo template ({{> nome}})
+    """
+    fingerprint = {
+        'template': hash_template(template, includes),
+        'context': hash_context(context),
+        'generator': GENERATOR_VERSION,
+        'template_path': str(template_path) if template_path else None,
+    }
+    if includes:
+        fingerprint['includes'] = sorted(str(p) for p in includes)
+    return fingerprint
+
+
+def _same_inputs(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return all(a.get(key) == b.get(key) for key in ('template', 'context', 'generator'))
+
+
+class FingerprintManifest:
+    """
+    Manifesto .vsc-manifest.json de uma pasta de saída
+
+    Para cada arquivo gerado guarda a impressão digital das entradas e o
+    tamanho/mtime da saída, de modo que uma saída editada ou apagada à mão
+    também é considerada desatualizada.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.manifest_path = self.output_dir / MANIFEST_FILE
+        self.entries: Dict[str, Dict[str, Any]] = self._read()
+
+    @classmethod
+    def for_output(cls, output_path) -> 'FingerprintManifest':
+        """Manifesto da pasta onde o arquivo será gerado"""
+        return cls(Path(output_path).parent)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('outputs', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _key(self, output_path) -> str:
+        return Path(output_path).name
+
+    def is_current(self, output_path, fingerprint: Dict[str, Any]) -> bool:
+        """True se a saída existe, não foi alterada e foi gerada com as mesmas entradas"""
+        entry = self.entries.get(self._key(output_path))
+        if not entry or not _same_inputs(entry, fingerprint):
+            return False
+        try:
+            stat = Path(output_path).stat()
+        except OSError:
+            return False
+        return entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns
+
+    def record(self, output_path, fingerprint: Dict[str, Any]) -> None:
+        """Registra a saída recém-gerada e grava o manifesto"""
+        stat = Path(output_path).stat()
+        entry = {**fingerprint, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+        # Lock entre processos; relê antes de gravar para não perder registros de outras gerações
+        with file_lock(self.manifest_path):
+            self.entries = self._read()
+            self.entries[self._key(output_path)] = entry
+            self._write()
+
+    def reuse(self, output_path, fingerprint: Dict[str, Any], candidates: Iterable) -> Optional[Path]:
+        """
+        Copia para output_path uma saída idêntica gerada em outra pasta
+
+        Usado com as execuções anteriores do mesmo sistema (OutputManager.previous_outputs):
+        cada execução continua com o conjunto completo de documentos, mas o que
+        não mudou é copiado em vez de regenerado. Vale a primeira candidata
+        intacta gerada com as mesmas entradas; a cópia é registrada neste manifesto.
+
+        Returns:
+            A saída reaproveitada, ou None se nenhuma candidata serve
+        """
+        for candidate in candidates:
+            candidate = Path(candidate)
+            if not FingerprintManifest.for_output(candidate).is_current(candidate, fingerprint):
+                continue
+            with atomic_path(output_path) as tmp:
+                shutil.copyfile(candidate, tmp)
+            self.record(output_path, fingerprint)
+            return candidate
+        return None
+
+    def _write(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({'generator': GENERATOR_VERSION, 'outputs': self.entries},
+                          ensure_ascii=False, indent=2, sort_keys=True)
+        atomic_write(self.manifest_path, data.encode('utf-8'))
+
+    def stale(self) -> List[Dict[str, str]]:
+        """
+        Saídas que uma nova execução regeneraria
+
+        Returns:
+            Lista de {'output': arquivo, 'reason': motivo}
+        """
+        template_hashes: Dict[tuple, Optional[str]] = {}
+        report = []
+
+        for name, entry in sorted(self.entries.items()):
+            output_path = self.output_dir / name
+            reason = None
+
+            if entry.get('generator') != GENERATOR_VERSION:
+                reason = f"versão do gerador {entry.get('generator')} → {GENERATOR_VERSION}"
+            elif not output_path.exists():
+                reason = "saída ausente"
+            else:
+                stat = output_path.stat()
+                if entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+                    reason = "saída alterada fora do gerador"
+
+            template_path = entry.get('template_path')
+            if reason is None and template_path:
+                key = (template_path, tuple(entry.get('includes', ())))
+                if key not in template_hashes:
+                    try:
+                        template = Path(template_path).read_text(encoding='utf-8')
+                        template_hashes[key] = hash_template(template, key[1])
+                    except OSError:
+                        template_hashes[key] = None
+                current = template_hashes[key]
+                if current is None:
+                    reason = "template ou fragmento não encontrado"
+                elif current != entry.get('template'):
+                    reason = "template alterado"
+
+            if reason:
+                report.append({'output': str(output_path), 'reason': reason})
+
+        return report
+
+
+if __name__ == "__main__":
+    for folder in sys.argv[1:] or ['output']:
+        manifest = FingerprintManifest(folder)
+        stale = manifest.stale()
+        print(f"📁 {folder}: {len(manifest.entries)} saída(s) registradas, {len(stale)} desatualizada(s)")
+        for item in stale:
+            print(f"   ⚠️  {item['output']}: {item['reason']}")
@@ -0,0 +1,163 @@
+"""
+Digital Worker VSC - Knowledge Base Scanner
+Varredura recursiva em passada única (os.scandir) e detecção de tipo por conteúdo
+"""
+
+from fnmatch import translate
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import os
+import re
+import zipfile
+
+# Extensão (minúscula) -> tipo de documento
+EXTENSION_TYPES = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.xlsx': 'xlsx',
+    '.md': 'md',
+    '.markdown': 'md',
+    '.txt': 'txt',
+    '.csv': 'csv',
+}
+
+# Tipos reconhecidos pelo conteúdo binário
+BINARY_TYPES = ('pdf', 'docx', 'xlsx')
+
+# Tipos de texto puro: a extensão nunca vence uma assinatura binária
+TEXT_TYPES = ('md', 'txt', 'csv')
+
+# Padrões ignorados por padrão (arquivos temporários do Office, pastas ocultas)
+DEFAULT_EXCLUDE = ('~$*', '.*')
+
+SNIFF_SIZE = 4096
+
+
+def detect_type(file_path, extensions: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Detecta o tipo do documento pelos primeiros bytes (magic bytes)
+
+    A assinatura é verificada primeiro e a extensão só vale quando nenhuma
+    assinatura confere. Um .pdf ou .txt que na verdade é um .docx é roteado
+    para o leitor Word; um binário salvo como .txt/.md/.csv é descartado em
+    vez de indexado como texto. Tipos registrados pelo usuário (ex: .pptx,
+    também um ZIP) continuam decididos pela extensão.
+
+    Args:
+        file_path: Arquivo a inspecionar
+        extensions: Mapa extensão -> tipo (padrão: EXTENSION_TYPES)
+
+    Returns:
+        Tipo do documento ('pdf', 'docx', 'xlsx', 'md', 'txt', 'csv', ...) ou None
+    """
+    file_path = Path(file_path)
+    by_extension = (extensions or EXTENSION_TYPES).get(file_path.suffix.lower())
+    custom = by_extension is not None and by_extension not in BINARY_TYPES
+    registered = custom and by_extension not in TEXT_TYPES
+
+    with open(file_path, 'rb') as f:
+        head = f.read(SNIFF_SIZE)
+
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+
+    if head.startswith(b'PK\x03\x04'):
+        if by_extension in ('docx', 'xlsx') or registered:
+            return by_extension
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            return None
+        if 'word/document.xml' in names:
+            return 'docx'
+        if 'xl/workbook.xml' in names:
+            return 'xlsx'
+        return None
+
+    if b'\x00' in head:
+        return by_extension if registered else None
+
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Caractere multibyte cortado no fim do bloco lido ainda é texto
+        if e.start < len(head) - 3:
+            return by_extension if registered else None
+
+    return by_extension if custom else 'txt'
+
+
+def _compile(patterns: Iterable[str]):
+    """Compila os padrões glob em uma única regex (sem diferenciar maiúsculas)"""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{translate(p)})' for p in patterns), re.IGNORECASE)
+
+
+def _matches(name: str, relative: str, pattern) -> bool:
+    """Compara nome e caminho relativo com os padrões compilados"""
+    return pattern is not None and (pattern.match(name) is not None or pattern.match(relative) is not None)
+
+
+def iter_documents(
+    kb_path,
+    categories: Iterable[str],
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Percorre recursivamente as pastas de categoria em uma única passada
+
+    Args:
+        kb_path: Raiz da Knowledge Base
+        categories: Pastas de primeiro nível a percorrer
+        include: Padrões glob aceitos (padrão: extensões de EXTENSION_TYPES)
+        exclude: Padrões glob ignorados, aplicados também a pastas
+
+    Yields:
+        (categoria, os.DirEntry) de cada arquivo aceito
+    """
+    include = _compile(include or [f'*{ext}' for ext in EXTENSION_TYPES])
+    exclude = _compile(DEFAULT_EXCLUDE if exclude is None else exclude)
+    root = os.fspath(kb_path)
+
+    for category in categories:
+        top = os.path.join(root, category)
+        stack = [(top, '')]
+
+        while stack:
+            folder, prefix = stack.pop()
+            try:
+                with os.scandir(folder) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+
+            subfolders = []
+            for entry in entries:
+                relative = prefix + entry.name
+                if _matches(entry.name, relative, exclude):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append((entry.path, relative + '/'))
+                elif entry.is_file() and _matches(entry.name, relative, include):
+                    yield category, entry
+
+            # Ordem determinística: arquivos da pasta antes das subpastas
+            stack.extend(reversed(subfolders))
+
+
+def scan_documents(
+    kb_path,
+    categories: Iterable[str],
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+) -> Dict[str, List[Path]]:
+    """Agrupa por categoria os arquivos encontrados por iter_documents()"""
+    categories = list(categories)
+    docs = {category: [] for category in categories}
+    for category, entry in iter_documents(kb_path, categories, include, exclude):
+        docs[category].append(Path(entry.path))
+    return docs
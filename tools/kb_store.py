@@ -0,0 +1,238 @@
+"""
+Digital Worker VSC - Knowledge Store
+Armazenamento colunar em disco (offsets + blob UTF-8) aberto via mmap,
+para compartilhar a Knowledge Base entre processos em modo somente leitura
+"""
+
+from pathlib import Path
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import mmap
+import os
+import secrets
+
+from .output_manager import atomic_write, file_lock
+
+STORE_VERSION = 2
+
+INDEX_FILE = 'index.json'
+OFFSETS_FILE = 'offsets-{generation}.bin'
+CONTENT_FILE = 'content-{generation}.bin'
+OPEN_RETRIES = 5
+
+
+class StoredDocument(Mapping):
+    """
+    Entrada da Knowledge Base com conteúdo decodificado sob demanda
+
+    Tem o mesmo formato das entradas de DocumentReader.knowledge
+    ('path', 'content', 'full_size', 'type'), mas o texto só é lido do
+    mmap quando a chave 'content' é acessada.
+    """
+
+    __slots__ = ('_store', '_position', '_meta')
+
+    def __init__(self, store: 'KnowledgeStore', position: int, meta: Dict[str, Any]):
+        self._store = store
+        self._position = position
+        self._meta = meta
+
+    def __getitem__(self, key):
+        if key == 'content':
+            return self._store.get_content(self._position)
+        if key in ('path', 'full_size', 'type'):
+            return self._meta[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('path', 'content', 'full_size', 'type'))
+
+    def __len__(self):
+        return 4
+
+
+class KnowledgeStore:
+    """
+    Knowledge Base compacta em disco, aberta com mmap (somente leitura)
+
+    Estrutura da pasta:
+        index.json         - metadados de cada documento e a geração atual
+        offsets-<ger>.bin  - array uint64 com N+1 offsets de bytes em content-<ger>.bin
+        content-<ger>.bin  - textos extraídos concatenados em UTF-8
+
+    Vários processos podem abrir a mesma pasta: as páginas do mmap são
+    compartilhadas pelo sistema operacional e a abertura não lê o conteúdo.
+    Cada gravação cria uma geração nova de arquivos de dados e só então troca
+    o index.json (um único rename), de modo que um leitor nunca combina
+    conteúdo de uma geração com offsets de outra.
+    """
+
+    def __init__(self, store_path="knowledge_store"):
+        self.store_path = Path(store_path)
+
+        index_file = self.store_path / INDEX_FILE
+        if not index_file.exists():
+            raise FileNotFoundError(f"Knowledge Store não encontrada: {self.store_path}")
+
+        for attempt in range(OPEN_RETRIES):
+            try:
+                self._open(index_file)
+                break
+            except FileNotFoundError:
+                # Geração substituída (e removida) entre a leitura do índice e a abertura
+                if attempt == OPEN_RETRIES - 1:
+                    raise
+
+    def _open(self, index_file: Path) -> None:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        if index.get('version') != STORE_VERSION:
+            raise ValueError(
+                f"Versão da Knowledge Store não suportada: {index.get('version')} "
+                f"(esperada: {STORE_VERSION})"
+            )
+
+        self.categories: List[str] = index['categories']
+        self.entries: List[Dict[str, Any]] = index['documents']
+        self._content_size = index['content_size']
+        self.generation: str = index['generation']
+
+        self._offsets_map = self._content_map = None
+        self._offsets = array('Q', [0])
+        try:
+            self._offsets_map = self._open_map(self.store_path / OFFSETS_FILE.format(generation=self.generation))
+            self._content_map = self._open_map(self.store_path / CONTENT_FILE.format(generation=self.generation))
+        except OSError:
+            self.close()
+            raise
+
+        if self._offsets_map is not None:
+            self._offsets = memoryview(self._offsets_map).cast('Q')
+
+        content_size = len(self._content_map) if self._content_map is not None else 0
+        if (len(self._offsets) != len(self.entries) + 1 or self._offsets[-1] != self._content_size
+                or content_size != self._content_size):
+            self.close()
+            raise ValueError(f"Knowledge Store inconsistente: {self.store_path}")
+
+    @staticmethod
+    def _open_map(file_path: Path) -> Optional[mmap.mmap]:
+        """Abre arquivo com mmap somente leitura (None se estiver vazio)"""
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def write(cls, knowledge: Dict[str, Dict[str, Dict[str, Any]]], store_path="knowledge_store") -> 'KnowledgeStore':
+        """
+        Grava a Knowledge Base (formato de DocumentReader.knowledge) em disco
+
+        Args:
+            knowledge: {categoria: {arquivo: {'path', 'content', 'full_size', 'type'}}}
+            store_path: Pasta de destino
+
+        Returns:
+            KnowledgeStore aberta sobre os arquivos gravados
+        """
+        store_dir = Path(store_path)
+        store_dir.mkdir(parents=True, exist_ok=True)
+
+        documents = []
+        offsets = array('Q', [0])
+        content = bytearray()
+
+        for category, docs in knowledge.items():
+            for filename, data in docs.items():
+                content += data['content'].encode('utf-8')
+                offsets.append(len(content))
+                documents.append({
+                    'category': category,
+                    'file': filename,
+                    'path': data['path'],
+                    'full_size': data['full_size'],
+                    'type': data['type'],
+                })
+
+        generation = secrets.token_hex(8)
+        index = {
+            'version': STORE_VERSION,
+            'generation': generation,
+            'categories': list(knowledge.keys()),
+            'content_size': len(content),
+            'documents': documents,
+        }
+
+        # Arquivos de dados com nome próprio; a troca do index.json publica a geração
+        atomic_write(store_dir / CONTENT_FILE.format(generation=generation), bytes(content))
+        atomic_write(store_dir / OFFSETS_FILE.format(generation=generation), offsets.tobytes())
+
+        index_file = store_dir / INDEX_FILE
+        with file_lock(index_file):
+            previous = cls._published_generation(index_file)
+            atomic_write(index_file, json.dumps(index, ensure_ascii=False).encode('utf-8'))
+            # Cada geração é removida uma única vez, por quem a substituiu; leitores
+            # que já a mapearam continuam lendo (POSIX) e os demais reabrem o índice
+            if previous and previous != generation:
+                for name in (CONTENT_FILE, OFFSETS_FILE):
+                    try:
+                        os.remove(store_dir / name.format(generation=previous))
+                    except OSError:
+                        pass
+
+        return cls(store_dir)
+
+    @staticmethod
+    def _published_generation(index_file: Path) -> Optional[str]:
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('generation')
+        except (OSError, ValueError):
+            return None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Libera os mapeamentos de memória"""
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+            self._offsets = array('Q', [0])
+        for mapped in (self._offsets_map, self._content_map):
+            if mapped is not None:
+                mapped.close()
+        self._offsets_map = None
+        self._content_map = None
+
+    def get_content(self, position: int) -> str:
+        """Decodifica o texto do documento na posição informada"""
+        start, end = self._offsets[position], self._offsets[position + 1]
+        if start == end:
+            return ""
+        return self._content_map[start:end].decode('utf-8')
+
+    def iter_documents(self) -> Iterator[StoredDocument]:
+        """Itera sobre os documentos sem decodificar o conteúdo"""
+        for position, meta in enumerate(self.entries):
+            yield StoredDocument(self, position, meta)
+
+    def as_knowledge(self) -> Dict[str, Dict[str, StoredDocument]]:
+        """
+        Visão no formato de DocumentReader.knowledge
+
+        Returns:
+            {categoria: {arquivo: StoredDocument}} com conteúdo lido sob demanda
+        """
+        knowledge = {category: {} for category in self.categories}
+        for position, meta in enumerate(self.entries):
+            knowledge.setdefault(meta['category'], {})[meta['file']] = StoredDocument(self, position, meta)
+        return knowledge
@@ -0,0 +1,261 @@
+"""
+Digital Worker VSC - Knowledge Base Watcher
+Monitora knowledge_base/ e mantém a Knowledge Base atualizada continuamente
+
+A detecção é por varredura periódica (polling de mtime e tamanho a cada
+`interval` segundos), não por notificações do sistema de arquivos
+(inotify/FSEvents): funciona igual em pastas de rede e não acrescenta
+dependências. Uma alteração leva até `interval + debounce` segundos para
+ser publicada.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import threading
+import time
+
+from .document_reader import DocumentReader
+from .kb_store import KnowledgeStore
+
+# Assinatura de um arquivo: (categoria, mtime_ns, tamanho)
+FileSignature = Tuple[str, int, int]
+
+
+class _Batch:
+    """Extrações de uma rodada de varredura, publicadas juntas"""
+
+    __slots__ = ('updated', 'removed', 'remaining')
+
+    def __init__(self, removed, remaining: int):
+        self.updated = []
+        self.removed = removed
+        self.remaining = remaining
+
+
+class KnowledgeBaseWatcher:
+    """
+    Ingestão contínua da Knowledge Base por varredura periódica (polling)
+
+    - Alterações em rajada são agrupadas: um arquivo só é processado depois de
+      ficar `debounce` segundos sem mudar.
+    - A extração roda em um pool de threads em segundo plano.
+    - DocumentReader.knowledge nunca é alterado no lugar: cada lote gera um novo
+      dicionário que substitui o anterior de uma vez, então search() sempre vê
+      uma versão consistente, antiga ou nova.
+    """
+
+    def __init__(
+        self,
+        reader: DocumentReader,
+        interval: float = 1.0,
+        debounce: float = 2.0,
+        max_workers: int = 4,
+        store_path: Optional[str] = None,
+        on_update: Optional[Callable[[Dict[str, list]], None]] = None,
+    ):
+        """
+        Args:
+            reader: DocumentReader cuja Knowledge Base será mantida
+            interval: Intervalo entre varreduras (segundos)
+            debounce: Tempo sem alterações antes de processar um arquivo (segundos)
+            max_workers: Threads de extração
+            store_path: Se informado, regrava a Knowledge Store após cada lote
+            on_update: Callback chamado com {'updated': [...], 'removed': [...]}
+        """
+        self.reader = reader
+        self.interval = interval
+        self.debounce = debounce
+        self.store_path = store_path
+        self.on_update = on_update
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kb-extract')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._snapshot: Dict[Path, FileSignature] = {}
+        self._pending: Dict[Path, float] = {}
+        self._in_flight = 0
+        self._idle = threading.Condition(self._lock)
+
+        # Versões publicadas da Knowledge Base; a Store nunca volta para uma mais antiga
+        self._version = 0
+        self._stored_version = 0
+        self._store_lock = threading.Lock()
+
+    def _take_snapshot(self) -> Dict[Path, FileSignature]:
+        """Assinatura atual de todos os documentos da Knowledge Base"""
+        snapshot = {}
+        for category, entry in self.reader.iter_documents():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            snapshot[Path(entry.path)] = (category, stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def start(self) -> 'KnowledgeBaseWatcher':
+        """Inicia o monitoramento em segundo plano"""
+        self._snapshot = self._take_snapshot()
+
+        # Knowledge Base vazia: a carga inicial também passa pelo pool
+        if not self.reader.knowledge:
+            self.reader.knowledge = {category: {} for category in self.reader.categories}
+            now = time.monotonic() - self.debounce
+            self._pending = {path: now for path in self._snapshot}
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='kb-watcher', daemon=True)
+        self._thread.start()
+        print(f"👀 Monitorando Knowledge Base: {self.reader.kb_path}")
+        return self
+
+    def stop(self) -> None:
+        """Interrompe o monitoramento e aguarda extrações em andamento"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.interval)
+
+    def poll_once(self) -> None:
+        """Executa uma varredura: detecta mudanças e despacha as já estabilizadas"""
+        now = time.monotonic()
+        current = self._take_snapshot()
+
+        with self._lock:
+            for path, signature in current.items():
+                if self._snapshot.get(path) != signature:
+                    self._pending[path] = now
+            for path in self._snapshot.keys() - current.keys():
+                self._pending[path] = now
+            self._snapshot = current
+
+            ready = [path for path, changed in self._pending.items() if now - changed >= self.debounce]
+            for path in ready:
+                del self._pending[path]
+
+        if not ready:
+            return
+
+        removed = [path for path in ready if path not in current]
+        changed = [(path, current[path]) for path in ready if path in current]
+
+        if not changed:
+            self._apply([], removed)
+            return
+
+        # Um lote por rodada: a Knowledge Base (e a Store) é publicada uma única
+        # vez, quando a última extração da rodada termina
+        batch = _Batch(removed, len(changed))
+        with self._lock:
+            self._in_flight += 1
+        for path, signature in changed:
+            future = self._executor.submit(self.reader.extract_file, path)
+            future.add_done_callback(
+                lambda f, path=path, signature=signature: self._on_extracted(batch, path, signature, f)
+            )
+
+    def _on_extracted(self, batch: '_Batch', path: Path, signature: FileSignature, future) -> None:
+        error = future.exception()
+        if error is not None:
+            print(f"   ❌ Erro ao processar {path.name}: {error}")
+
+        with self._lock:
+            # Arquivo alterado de novo durante a extração: a próxima rodada cuida dele
+            if error is None and self._snapshot.get(path) == signature:
+                batch.updated.append((path, signature, future.result()))
+            batch.remaining -= 1
+            if batch.remaining:
+                return
+
+        try:
+            if batch.updated or batch.removed:
+                self._apply(batch.updated, batch.removed)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def _apply(self, updated, removed) -> None:
+        """Publica uma nova versão da Knowledge Base (copy-on-write)"""
+        with self._lock:
+            # Lotes podem terminar fora de ordem: só entra o que ainda é a versão atual
+            updated = [item for item in updated if self._snapshot.get(item[0]) == item[1]]
+            removed = [path for path in removed if path not in self._snapshot]
+            if not (updated or removed):
+                return
+
+            knowledge = dict(self.reader.knowledge)
+
+            for path, (category, _, _), entry in updated:
+                docs = dict(knowledge.get(category, {}))
+                docs[self.reader.document_key(category, path)] = entry
+                knowledge[category] = docs
+
+            for path in removed:
+                category = path.relative_to(self.reader.kb_path).parts[0]
+                docs = dict(knowledge.get(category, {}))
+                docs.pop(self.reader.document_key(category, path), None)
+                knowledge[category] = docs
+
+            self.reader.knowledge = knowledge
+            self._version += 1
+            version = self._version
+
+        # Gravação em disco fora do lock: varreduras e extrações seguem enquanto isso
+        if self.store_path:
+            with self._store_lock:
+                if version > self._stored_version:
+                    KnowledgeStore.write(knowledge, self.store_path).close()
+                    self._stored_version = version
+
+        for path, _, entry in updated:
+            print(f"🔄 Atualizado: {path.name} ({entry['full_size']} caracteres)")
+        for path in removed:
+            print(f"🗑️  Removido: {path.name}")
+
+        if self.on_update:
+            self.on_update({
+                'updated': [str(path) for path, _, _ in updated],
+                'removed': [str(path) for path in removed],
+            })
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda até não haver alterações pendentes nem extrações em andamento
+
+        Returns:
+            True se ficou ocioso dentro do timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(min(self.interval, remaining) if remaining is not None else self.interval)
+        return True
+
+
+if __name__ == "__main__":
+    reader = DocumentReader()
+    reader.ensure_folders()
+    watcher = KnowledgeBaseWatcher(reader).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
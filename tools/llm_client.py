@@ -0,0 +1,336 @@
+"""
+Digital Worker VSC - LLM Client
+Camada de acesso ao provedor LLM compartilhada por todos os agentes e
+validações do processo
+
+- Rate limit por token bucket (requisições por minuto, com rajada)
+- Pool de conexões keep-alive (requests.Session) limitado a N simultâneas
+- Retentativas com backoff exponencial e jitter em 429/5xx/falhas de rede,
+  respeitando Retry-After
+- Prompts idênticos e determinísticos (temperature 0 ou seed) em andamento
+  viram uma única requisição: quem chega depois aguarda e recebe a mesma
+  resposta. Requisições com amostragem vão sempre ao provedor.
+
+Fala a API OpenAI-compatível (POST <base_url>/chat/completions): OpenAI,
+Azure/LiteLLM proxy, vLLM, Ollama... Configuração por variáveis de ambiente:
+    LLM_BASE_URL, LLM_API_KEY (ou OPENAI_API_KEY), LLM_RATE_LIMIT (req/min),
+    LLM_BURST, LLM_MAX_CONNECTIONS, LLM_MAX_RETRIES, LLM_TIMEOUT
+"""
+
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from pydantic import PrivateAttr
+from requests.adapters import HTTPAdapter
+
+from crewai import BaseLLM
+from crewai.types.usage_metrics import UsageMetrics
+
+from .async_io import run_blocking
+from .profiling import span
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+RETRY_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'total_tokens')
+
+
+class LLMClientError(RuntimeError):
+    """Falha definitiva do provedor (sem mais retentativas)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+# ========== RATE LIMIT ==========
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: `rate` fichas por segundo, até `capacity` acumuladas
+
+    acquire() reserva a ficha imediatamente e dorme só o déficit, então as
+    threads são atendidas na ordem de chegada, sem espera ativa.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate deve ser positivo")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Bloqueia até haver fichas; retorna o tempo de espera em segundos"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+# ========== CLIENTE ==========
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Retry-After em segundos (aceita número ou data HTTP)"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class LLMClient:
+    """
+    Cliente HTTP do provedor LLM (chat completions)
+
+    Uma instância deve ser compartilhada (get_client()): o limite de taxa,
+    o pool de conexões e a agregação de prompts só valem dentro dela.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 requests_per_minute: float = 60, burst: Optional[float] = None,
+                 max_connections: int = 8, max_retries: int = 5, timeout: float = 120,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+
+        # Keep-alive: conexões reaproveitadas entre chamadas de todos os agentes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Content-Type'] = 'application/json'
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'coalesced': 0}
+
+    @classmethod
+    def from_env(cls) -> 'LLMClient':
+        """Cliente configurado pelas variáveis LLM_* do .env"""
+        env = os.environ.get
+        burst = env('LLM_BURST')
+        return cls(
+            base_url=env('LLM_BASE_URL') or env('OPENAI_API_BASE') or DEFAULT_BASE_URL,
+            api_key=env('LLM_API_KEY') or env('OPENAI_API_KEY'),
+            requests_per_minute=float(env('LLM_RATE_LIMIT', '60')),
+            burst=float(burst) if burst else None,
+            max_connections=int(env('LLM_MAX_CONNECTIONS', '8')),
+            max_retries=int(env('LLM_MAX_RETRIES', '5')),
+            timeout=float(env('LLM_TIMEOUT', '120')),
+        )
+
+    def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST /chat/completions, com agregação de requisições idênticas em andamento
+
+        Só payloads determinísticos são agregados: agentes que amostram de
+        propósito (temperature > 0 sem seed) recebem respostas independentes.
+
+        Args:
+            payload: Corpo da requisição (model, messages, temperature...)
+
+        Returns:
+            Resposta JSON do provedor
+        """
+        if not self._deterministic(payload):
+            return self._post(payload)
+
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._post(payload)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    @staticmethod
+    def _deterministic(payload: Dict[str, Any]) -> bool:
+        """temperature 0 ou seed fixo (sem temperature, o provedor amostra com o padrão dele)"""
+        return payload.get('temperature') == 0 or payload.get('seed') is not None
+
+    def complete(self, messages: List[Dict[str, Any]], model: str, **params) -> str:
+        """Texto da primeira escolha para as mensagens"""
+        response = self.chat({'model': model, 'messages': messages, **params})
+        return response['choices'][0]['message'].get('content') or ''
+
+    def _count(self, name: str) -> None:
+        with self._inflight_lock:
+            self.stats[name] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial com jitter completo: U(0, min(máx, base * 2^n))"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        url = f'{self.base_url}/chat/completions'
+
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            delay = None
+            try:
+                with self._slots, span('llm_request', 'llm', model=payload.get('model'), attempt=attempt):
+                    self._count('requests')
+                    response = self.session.post(url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = LLMClientError(f"Falha de conexão com o provedor LLM: {e}")
+            else:
+                if response.status_code < 400:
+                    return response.json()
+                error = LLMClientError(
+                    f"Provedor LLM respondeu {response.status_code}: {response.text[:500]}",
+                    status=response.status_code)
+                if response.status_code not in RETRY_STATUS:
+                    raise error
+                delay = _retry_after(response)
+
+            if attempt >= self.max_retries:
+                raise error
+            self._count('retries')
+            # Retry-After é o mínimo; o jitter evita que agentes voltem todos juntos
+            time.sleep(max(delay or 0.0, self._backoff(attempt)))
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """Cliente compartilhado do processo (criado pelas variáveis LLM_* na primeira chamada)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient.from_env()
+        return _client
+
+
+# ========== CREWAI ==========
+
+class PooledLLM(BaseLLM):
+    """
+    LLM do CrewAI que passa pelo cliente compartilhado
+
+    Os agentes usam o modo texto (ReAct) para ferramentas, sem function calling
+    nativo, o que funciona em qualquer provedor OpenAI-compatível. Uso de
+    tokens e stop words são tratados aqui, sem depender de métodos internos
+    do BaseLLM.
+    """
+
+    _usage: Dict[str, int] = PrivateAttr(default_factory=lambda: dict.fromkeys((*USAGE_FIELDS, 'successful_requests'), 0))
+    _usage_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None) -> str:
+        if isinstance(messages, str):
+            messages = [{'role': 'user', 'content': messages}]
+
+        params: Dict[str, Any] = {}
+        for name in ('temperature', 'top_p', 'max_tokens', 'seed',
+                     'frequency_penalty', 'presence_penalty'):
+            value = getattr(self, name, None)
+            if value is not None:
+                params[name] = value
+        stop = self.stop_sequences
+        if stop:
+            params['stop'] = stop[:4]  # limite da API OpenAI
+
+        response = get_client().chat({
+            'model': self.model,
+            'messages': [{'role': m['role'], 'content': m.get('content') or ''} for m in messages],
+            **params,
+        })
+        self._count_usage(response.get('usage') or {})
+
+        content = response['choices'][0]['message'].get('content') or ''
+        return self._cut_at_stop(content, stop)
+
+    def _count_usage(self, usage: Dict[str, Any]) -> None:
+        with self._usage_lock:
+            for name in USAGE_FIELDS:
+                self._usage[name] += int(usage.get(name) or 0)
+            self._usage['successful_requests'] += 1
+
+    @staticmethod
+    def _cut_at_stop(content: str, stop: Optional[List[str]]) -> str:
+        """Corta a resposta na primeira stop word (provedores que a ignoram)"""
+        positions = [content.find(word) for word in stop or () if word and word in content]
+        return content[:min(positions)].strip() if positions else content
+
+    def get_token_usage_summary(self) -> UsageMetrics:
+        """Uso acumulado de tokens desta instância (lido pelo Crew no fim do kickoff)"""
+        with self._usage_lock:
+            return UsageMetrics(**self._usage)
+
+    async def acall(self, messages, tools=None, callbacks=None, available_functions=None,
+                    from_task=None, from_agent=None, response_model=None) -> str:
+        return await run_blocking(self.call, messages, tools, callbacks, available_functions,
+                                  from_task, from_agent, response_model)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+
+def create_llm(model: Optional[str] = None) -> Optional[PooledLLM]:
+    """
+    LLM dos agentes a partir de CREWAI_MODEL
+
+    Modelos Claude sem LLM_BASE_URL (proxy OpenAI-compatível) ficam com o
+    cliente nativo do CrewAI: retorna None.
+    """
+    model = model or os.environ.get('CREWAI_MODEL', 'gpt-4o')
+    if not os.environ.get('LLM_BASE_URL') and model.startswith(('claude', 'anthropic/')):
+        return None
+    return PooledLLM(model=model.removeprefix('openai/'))
@@ -0,0 +1,284 @@
+"""
+Digital Worker VSC - Output Manager
+Gravação segura de documentos gerados por vários agentes/processos ao mesmo tempo
+
+- Gravação atômica: arquivo temporário na mesma pasta + os.replace; leitores
+  nunca veem um documento pela metade e uma falha não apaga a versão anterior
+- Nomes com marcadores ({{DATA_DOCUMENTO}}, {{NOME_SISTEMA}}...) são expandidos
+  e saneados antes de virar caminho
+- Saídas separadas por sistema e execução: output/<sistema>/<run_id>/
+- Índice das execuções em output/index.jsonl (uma linha JSON por arquivo,
+  anexada sob lock de arquivo, seguro entre processos)
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+INDEX_FILE = 'index.jsonl'
+DEFAULT_SYSTEM = 'geral'
+
+_NAME_MARKER_RE = re.compile(r'\{\{(\w+)\}\}|\[\[([A-Za-z0-9_]+)\]\]')
+_UNSAFE_RE = re.compile(r'[^\w.\-]+')
+
+# Por contexto: threads e tarefas asyncio de execuções simultâneas não se misturam
+_run_id: ContextVar[Optional[str]] = ContextVar('vsc_run_id', default=None)
+
+
+# ========== EXECUÇÕES ==========
+
+def new_run_id() -> str:
+    """Identificador de execução ordenável por data: 20260121-143005-a1b2c3"""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}"
+
+
+def start_run(run_id: Optional[str] = None) -> str:
+    """
+    Inicia uma execução: as saídas seguintes vão para output/<sistema>/<run_id>/
+
+    Sem argumento, reaproveita VSC_RUN_ID (para retomar uma execução) ou gera um novo ID.
+    """
+    run_id = run_id or os.environ.get('VSC_RUN_ID') or new_run_id()
+    _run_id.set(run_id)
+    return run_id
+
+
+@contextmanager
+def active_run(run_id: Optional[str] = None) -> Iterator[str]:
+    """
+    start_run() só dentro do bloco: ao sair, volta a execução que estava ativa
+
+    Inclui chamadas a start_run() feitas dentro do bloco.
+    """
+    token = _run_id.set(_run_id.get())
+    try:
+        yield start_run(run_id)
+    finally:
+        _run_id.reset(token)
+
+
+def current_run_id() -> Optional[str]:
+    """Execução ativa (start_run ou VSC_RUN_ID); None = saídas só por sistema"""
+    return _run_id.get() or os.environ.get('VSC_RUN_ID')
+
+
+# ========== NOMES ==========
+
+def sanitize_component(name: str) -> str:
+    """Nome seguro para um componente de caminho (sem separadores nem '..')"""
+    clean = _UNSAFE_RE.sub('_', str(name)).strip('._')
+    return clean or 'sem_nome'
+
+
+def expand_name(pattern: str, context: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Expande marcadores {{CHAVE}} / [[CHAVE]] de um nome de arquivo
+
+    DATA_DOCUMENTO (AAAAMMDD) está sempre disponível. Valores são saneados;
+    chaves ausentes ficam com o próprio nome da chave.
+    """
+    values = {'DATA_DOCUMENTO': datetime.now().strftime('%Y%m%d'), **(context or {})}
+
+    def replace(match):
+        key = match.group(1) or match.group(2)
+        return sanitize_component(values.get(key, key))
+
+    return _NAME_MARKER_RE.sub(replace, str(pattern))
+
+
+def resolve_output_path(output_path, context: Optional[Dict[str, Any]] = None,
+                        system: Optional[str] = None) -> Tuple[Path, Optional['OutputManager']]:
+    """
+    Caminho final de uma saída pedida por uma ferramenta
+
+    - Caminho com pasta: respeitado, só com marcadores expandidos no nome
+    - Só o nome do arquivo: gerenciado em output/<sistema>/<run_id>/ e indexado
+
+    Returns:
+        (caminho, OutputManager se a saída é gerenciada)
+    """
+    path = Path(str(output_path))
+    if len(path.parts) > 1 or path.is_absolute():
+        return path.with_name(expand_name(path.name, context)), None
+
+    manager = OutputManager(system=system or (context or {}).get('NOME_SISTEMA'))
+    return manager.path_for(path.name, context), manager
+
+
+# ========== GRAVAÇÃO ATÔMICA ==========
+
+def _temp_path(target: Path) -> Path:
+    return target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+@contextmanager
+def atomic_path(target) -> Iterator[Path]:
+    """
+    Caminho temporário que substitui `target` atomicamente ao sair do bloco
+
+    Uso com bibliotecas que gravam em caminho (python-docx, reportlab):
+        with atomic_path('output/IQ.docx') as tmp:
+            doc.save(str(tmp))
+
+    Se o bloco falhar, o temporário é removido e o destino não é alterado.
+    """
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _temp_path(target)
+    try:
+        yield tmp
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write(target, data: bytes) -> None:
+    """Grava bytes atomicamente (temporário + rename)"""
+    with atomic_path(target) as tmp:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+
+
+@contextmanager
+def file_lock(path) -> Iterator[None]:
+    """
+    Lock exclusivo entre processos e threads, via arquivo <path>.lock
+
+    fcntl.flock no Linux/macOS, msvcrt.locking no Windows.
+    """
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ========== GERENCIADOR ==========
+
+class OutputManager:
+    """
+    Saídas de um sistema em uma execução: <root>/<sistema>/<run_id>/
+
+    Sem execução ativa (start_run / VSC_RUN_ID), a pasta é <root>/<sistema>/,
+    e a regeneração incremental (manifesto de impressões digitais) vale entre
+    execuções; com run_id, cada execução é um conjunto completo e isolado.
+    """
+
+    def __init__(self, root=None, system: Optional[str] = None, run_id: Optional[str] = None):
+        self.root = Path(root or os.environ.get('OUTPUT_DIR') or 'output')
+        self.system = sanitize_component(system) if system else DEFAULT_SYSTEM
+        self.run_id = run_id or current_run_id()
+        self.run_dir = self.root / self.system
+        if self.run_id:
+            self.run_dir = self.run_dir / sanitize_component(self.run_id)
+        self.index_path = self.root / INDEX_FILE
+
+    def path_for(self, name: str, context: Optional[Dict[str, Any]] = None) -> Path:
+        """Caminho dentro da pasta da execução, com marcadores expandidos"""
+        parts = [sanitize_component(expand_name(part, context))
+                 for part in Path(str(name)).parts if part not in ('', '.', '..', '/', '\\')]
+        return self.run_dir.joinpath(*parts) if parts else self.run_dir / 'sem_nome'
+
+    def previous_outputs(self, path) -> List[Path]:
+        """
+        O mesmo arquivo nas execuções anteriores do sistema, da mais recente à mais antiga
+
+        Sem execução ativa a pasta é a mesma entre chamadas, então não há anteriores.
+        """
+        path = Path(path)
+        if not self.run_id:
+            return []
+        try:
+            relative = path.relative_to(self.run_dir)
+        except ValueError:
+            return []
+        system_dir = self.run_dir.parent
+        try:
+            runs = sorted((entry.name for entry in os.scandir(system_dir)
+                           if entry.is_dir() and entry.name != self.run_dir.name), reverse=True)
+        except OSError:
+            return []
+        return [candidate for candidate in (system_dir / run / relative for run in runs) if candidate.exists()]
+
+    def write_bytes(self, name: str, data: bytes, context: Optional[Dict[str, Any]] = None, **meta) -> Path:
+        """Grava atomicamente e registra no índice"""
+        path = self.path_for(name, context)
+        atomic_write(path, data)
+        self.record(path, **meta)
+        return path
+
+    def write_text(self, name: str, text: str, context: Optional[Dict[str, Any]] = None, **meta) -> Path:
+        return self.write_bytes(name, text.encode('utf-8'), context, **meta)
+
+    def record(self, path, **meta) -> Dict[str, Any]:
+        """Anexa a saída ao índice (uma linha JSON, sob lock entre processos)"""
+        path = Path(path)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        try:
+            relative = path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            relative = str(path)
+
+        entry = {
+            'run_id': self.run_id,
+            'system': self.system,
+            'path': relative,
+            'size': path.stat().st_size,
+            'sha256': digest.hexdigest(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            **meta,
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.index_path):
+            with open(self.index_path, 'ab') as f:
+                f.write(line)
+        return entry
+
+    def index(self, system: Optional[str] = None, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entradas do índice, opcionalmente filtradas por sistema e execução"""
+        if not self.index_path.exists():
+            return []
+        entries = []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if system and entry.get('system') != sanitize_component(system):
+                    continue
+                if run_id and entry.get('run_id') != run_id:
+                    continue
+                entries.append(entry)
+        return entries
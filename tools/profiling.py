@@ -0,0 +1,204 @@
+"""
+Digital Worker VSC - Profiling
+Instrumentação opcional (spans) das ferramentas e geradores, com exportação
+em formato Chrome Trace / Perfetto e dump do cProfile
+
+Ativação sem alterar código:
+    VSC_TRACE=output/trace.json VSC_PROFILE=output/run.prof python main.py
+
+Ou em código:
+    with tracing('output/trace.json', profile_path='output/run.prof'):
+        generate_document(...)
+
+VSC_TRACE vale para o processo inteiro. Um bloco tracing() vale para o
+contexto atual (contextvars): a thread que o abriu e as tarefas asyncio,
+run_blocking() e asyncio.to_thread() disparadas de dentro dele. Blocos em
+threads diferentes não se misturam.
+
+Abra o trace em https://ui.perfetto.dev ou chrome://tracing, e o .prof com
+`python -m pstats` ou snakeviz.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import atexit
+import cProfile
+import inspect
+import json
+import os
+import threading
+import time
+
+from .output_manager import atomic_write
+
+
+class _Session:
+    """Eventos de um bloco tracing() (ou do processo inteiro, via VSC_TRACE)"""
+
+    __slots__ = ('events', 'lock')
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+
+_session: ContextVar[Optional[_Session]] = ContextVar('vsc_trace_session', default=None)
+_process_session: Optional[_Session] = None
+_origin_ns = time.perf_counter_ns()
+
+
+def _current() -> Optional[_Session]:
+    return _session.get() or _process_session
+
+
+def is_enabled() -> bool:
+    """Indica se os spans estão sendo registrados neste contexto"""
+    return _current() is not None
+
+
+def _now_us() -> float:
+    return (time.perf_counter_ns() - _origin_ns) / 1000
+
+
+@contextmanager
+def span(name: str, category: str = 'vsc', **args):
+    """
+    Registra a duração de um trecho como evento 'X' do Chrome Trace
+
+    Sem instrumentação ativa o custo é de uma leitura de ContextVar.
+    """
+    session = _current()
+    if session is None:
+        yield
+        return
+
+    start = _now_us()
+    try:
+        yield
+    finally:
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start,
+            'dur': _now_us() - start,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = {key: str(value) for key, value in args.items()}
+        with session.lock:
+            session.events.append(event)
+
+
+def traced(name: Optional[str] = None, category: str = 'tool'):
+    """
+    Decorator que envolve a função (síncrona ou assíncrona) em um span
+
+    Args:
+        name: Nome do span (padrão: nome qualificado da função)
+        category: Categoria exibida no visualizador
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def write_trace(trace_path, session: Optional[_Session] = None) -> Path:
+    """Grava os eventos coletados neste contexto em JSON (Chrome Trace / Perfetto)"""
+    session = session or _current()
+    events = []
+    if session is not None:
+        with session.lock:
+            events = list(session.events)
+
+    metadata = [{
+        'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+        'args': {'name': thread.name},
+    } for tid, thread in ((t.ident, t) for t in threading.enumerate())]
+
+    trace_file = Path(trace_path)
+    data = json.dumps({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'})
+    atomic_write(trace_file, data.encode('utf-8'))
+    return trace_file
+
+
+def _start_profiler(profile_path) -> Optional[cProfile.Profile]:
+    if not profile_path:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _finish(session: _Session, trace_path, profiler: Optional[cProfile.Profile], profile_path) -> None:
+    """Grava o perfil e o trace de uma sessão encerrada"""
+    if profiler:
+        profiler.disable()
+        Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_path))
+        print(f"🔬 Perfil cProfile gravado: {profile_path}")
+
+    if trace_path:
+        write_trace(trace_path, session)
+        print(f"🔬 Trace gravado: {trace_path}")
+
+
+@contextmanager
+def tracing(trace_path=None, profile_path=None):
+    """
+    Ativa os spans (e opcionalmente o cProfile) dentro do bloco
+
+    Args:
+        trace_path: Arquivo JSON do trace gravado ao sair do bloco
+        profile_path: Arquivo .prof do cProfile (perfila a thread atual)
+    """
+    parent = _current()
+    session = _Session()
+    token = _session.set(session)
+    profiler = _start_profiler(profile_path)
+
+    try:
+        yield
+    finally:
+        _session.reset(token)
+        _finish(session, trace_path, profiler, profile_path)
+
+        # Blocos aninhados também entregam os eventos ao bloco externo
+        if parent is not None:
+            with parent.lock:
+                parent.events.extend(session.events)
+
+
+def _enable_from_env() -> None:
+    """Ativa a instrumentação para o processo inteiro via VSC_TRACE / VSC_PROFILE"""
+    global _process_session
+
+    trace_path = os.environ.get('VSC_TRACE')
+    profile_path = os.environ.get('VSC_PROFILE')
+    if not (trace_path or profile_path):
+        return
+
+    _process_session = _Session()
+    profiler = _start_profiler(profile_path)
+    atexit.register(_finish, _process_session, trace_path, profiler, profile_path)
+
+
+_enable_from_env()
@@ -0,0 +1,353 @@
+"""
+Digital Worker VSC - Run Store
+Histórico das validações em SQLite embutido, para relatórios de tendência
+entre execuções
+
+Cada validação (criar_validacao_completa) grava:
+- runs          sistema, entradas, status, duração e uso de tokens
+- task_outputs  saída, agente e duração de cada tarefa
+- findings      gaps (⚠️/❌) apontados pelo ComplianceChecker
+
+As consultas são agregações SQL com índices, sem carregar as execuções em
+memória. Relatórios pela linha de comando:
+    python -m tools.run_store runs
+    python -m tools.run_store agentes --sistema "LIMS Waters Empower 3"
+    python -m tools.run_store gaps --desde 2026-01-01
+"""
+
+from contextvars import ContextVar, Token
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA_VERSION = 1
+DEFAULT_DB = 'runs.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id            TEXT PRIMARY KEY,
+    system            TEXT NOT NULL,
+    inputs            TEXT NOT NULL DEFAULT '{}',
+    status            TEXT NOT NULL,
+    started_at        TEXT NOT NULL,
+    finished_at       TEXT,
+    duration_s        REAL,
+    prompt_tokens     INTEGER,
+    completion_tokens INTEGER,
+    total_tokens      INTEGER,
+    llm_requests      INTEGER,
+    error             TEXT
+);
+CREATE TABLE IF NOT EXISTS task_outputs (
+    run_id     TEXT NOT NULL REFERENCES runs(run_id),
+    position   INTEGER NOT NULL,
+    task       TEXT NOT NULL,
+    agent      TEXT,
+    duration_s REAL,
+    output     TEXT,
+    PRIMARY KEY (run_id, position)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id         INTEGER PRIMARY KEY,
+    run_id     TEXT NOT NULL REFERENCES runs(run_id),
+    regulation TEXT NOT NULL,
+    severity   TEXT NOT NULL,
+    item       TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_system_started ON runs(system, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_agent ON task_outputs(agent, duration_s);
+CREATE INDEX IF NOT EXISTS idx_findings_item ON findings(regulation, item);
+CREATE INDEX IF NOT EXISTS idx_findings_run ON findings(run_id);
+"""
+
+# Linhas de gap nos relatórios do ComplianceChecker
+_FINDING_RE = re.compile(r'^\s*(⚠️?|❌)\s*(.+?)\s*$', re.MULTILINE)
+_REGULATION_RE = re.compile(r'^=== VERIFICAÇÃO (.+?) ===', re.MULTILINE)
+SEVERITY = {'❌': 'nao_conforme'}  # demais: 'atencao'
+
+
+def default_db_path() -> Path:
+    """VSC_RUN_DB ou <OUTPUT_DIR>/runs.db"""
+    value = os.environ.get('VSC_RUN_DB')
+    if value:
+        return Path(value)
+    return Path(os.environ.get('OUTPUT_DIR') or 'output') / DEFAULT_DB
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def parse_findings(text: str, regulation: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    """
+    Gaps de um relatório de conformidade
+
+    Returns:
+        Lista de (norma, severidade, item); a norma vem do argumento ou do
+        cabeçalho "=== VERIFICAÇÃO ... ===" do relatório
+    """
+    if not regulation:
+        header = _REGULATION_RE.search(text)
+        regulation = header.group(1) if header else 'desconhecida'
+    return [(regulation, SEVERITY.get(mark, 'atencao'), item)
+            for mark, item in _FINDING_RE.findall(text)]
+
+
+# ========== ARMAZENAMENTO ==========
+
+class RunStore:
+    """
+    Banco SQLite do histórico de execuções
+
+    WAL + busy timeout: vários processos podem gravar validações ao mesmo
+    tempo; dentro do processo a conexão é compartilhada sob lock.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or default_db_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def _write(self, sql: str, params: Iterable = ()) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(sql, tuple(params))
+
+    # ----- gravação -----
+
+    def start_run(self, run_id: str, system: str, inputs: Optional[Dict[str, Any]] = None) -> None:
+        """Registra o início de uma execução (status 'em_andamento')"""
+        self._write(
+            "INSERT OR REPLACE INTO runs (run_id, system, inputs, status, started_at) VALUES (?, ?, ?, ?, ?)",
+            (run_id, system, json.dumps(inputs or {}, ensure_ascii=False, default=str), 'em_andamento', _now()))
+
+    def record_task(self, run_id: str, position: int, task: str, agent: Optional[str],
+                    duration_s: Optional[float], output: Optional[str]) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO task_outputs (run_id, position, task, agent, duration_s, output) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, position, task, agent, duration_s, output))
+
+    def record_findings(self, run_id: str, findings: Iterable[Tuple[str, str, str]]) -> int:
+        rows = [(run_id, regulation, severity, item, _now()) for regulation, severity, item in findings]
+        if rows:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO findings (run_id, regulation, severity, item, created_at) VALUES (?, ?, ?, ?, ?)",
+                    rows)
+        return len(rows)
+
+    def finish_run(self, run_id: str, status: str, duration_s: Optional[float] = None,
+                   token_usage: Optional[Dict[str, int]] = None, error: Optional[str] = None) -> None:
+        usage = token_usage or {}
+        self._write(
+            "UPDATE runs SET status = ?, finished_at = ?, duration_s = ?, prompt_tokens = ?, "
+            "completion_tokens = ?, total_tokens = ?, llm_requests = ?, error = ? WHERE run_id = ?",
+            (status, _now(), duration_s, usage.get('prompt_tokens'), usage.get('completion_tokens'),
+             usage.get('total_tokens'), usage.get('successful_requests'), error, run_id))
+
+    # ----- consultas -----
+
+    def _filters(self, system: Optional[str], since: Optional[str], *extra: str) -> Tuple[str, List[Any]]:
+        clauses, params = list(extra), []
+        if system:
+            clauses.append('r.system = ?')
+            params.append(system)
+        if since:
+            clauses.append('r.started_at >= ?')
+            params.append(since)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Dict[str, Any]]:
+        """Linhas como dicts, lidas por inteiro sob o lock (a conexão é compartilhada entre threads)"""
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        return [dict(row) for row in rows]
+
+    def runs(self, system: Optional[str] = None, since: Optional[str] = None,
+             limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Execuções da mais recente para a mais antiga (sem saídas das tarefas)"""
+        where, params = self._filters(system, since)
+        sql = f"SELECT r.* FROM runs r{where} ORDER BY r.started_at DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return iter(self._query(sql, params))
+
+    def tasks(self, run_id: str) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM task_outputs WHERE run_id = ? ORDER BY position", (run_id,))
+
+    def findings(self, run_id: str) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT regulation, severity, item FROM findings WHERE run_id = ? ORDER BY id", (run_id,))
+
+    def slowest_agents(self, limit: int = 10, system: Optional[str] = None,
+                       since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Agentes por duração média das tarefas (média, máximo, total e nº de tarefas)"""
+        where, params = self._filters(system, since, 't.duration_s IS NOT NULL')
+        return self._query(
+            "SELECT t.agent, COUNT(*) AS tasks, AVG(t.duration_s) AS avg_s, "
+            "MAX(t.duration_s) AS max_s, SUM(t.duration_s) AS total_s "
+            f"FROM task_outputs t JOIN runs r ON r.run_id = t.run_id{where} "
+            "GROUP BY t.agent ORDER BY avg_s DESC LIMIT ?",
+            [*params, limit])
+
+    def frequent_gaps(self, limit: int = 10, system: Optional[str] = None,
+                      since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Gaps mais recorrentes: ocorrências, execuções afetadas e última ocorrência"""
+        where, params = self._filters(system, since)
+        return self._query(
+            "SELECT f.regulation, f.item, COUNT(*) AS occurrences, COUNT(DISTINCT f.run_id) AS runs, "
+            "MAX(f.created_at) AS last_seen "
+            f"FROM findings f JOIN runs r ON r.run_id = f.run_id{where} "
+            "GROUP BY f.regulation, f.item ORDER BY occurrences DESC, last_seen DESC LIMIT ?",
+            [*params, limit])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ========== EXECUÇÃO ATIVA ==========
+
+def _task_name(output) -> str:
+    """Nome da tarefa ou, sem nome, a primeira linha da descrição"""
+    name = getattr(output, 'name', None)
+    if name:
+        return name
+    lines = (getattr(output, 'description', None) or '').strip().splitlines()
+    return lines[0] if lines else 'tarefa'
+
+
+# Por contexto: validações simultâneas gravam os gaps cada uma na sua execução
+_active: ContextVar[Optional['RunRecorder']] = ContextVar('vsc_active_run', default=None)
+
+
+class RunRecorder:
+    """
+    Grava uma validação no histórico enquanto o Crew executa
+
+    Uso (main.py):
+        recorder = RunRecorder(run_id, sistema_nome, {'criticidade': 'Alta'})
+        crew = Crew(..., task_callback=recorder.on_task)
+        with recorder:
+            resultado = crew.kickoff()
+            recorder.on_crew(resultado)
+
+    Dentro do bloco, record_findings() (chamado pelo ComplianceChecker)
+    grava os gaps nesta execução. Falhas do histórico nunca interrompem a
+    validação: só geram um aviso.
+    """
+
+    def __init__(self, run_id: str, system: str, inputs: Optional[Dict[str, Any]] = None,
+                 store: Optional[RunStore] = None):
+        self.run_id = run_id
+        self.system = system
+        self.inputs = inputs or {}
+        self.store = store
+        self._position = 0
+        self._started = self._last = time.monotonic()
+        self._token_usage: Optional[Dict[str, int]] = None
+        self._token: Optional[Token] = None
+
+    def _safely(self, method: str, *args) -> None:
+        """Chama um método do RunStore; sem histórico disponível, não faz nada"""
+        if self.store is None:
+            return
+        try:
+            getattr(self.store, method)(*args)
+        except sqlite3.Error as e:
+            print(f"⚠️ Histórico de execuções indisponível: {e}")
+
+    def __enter__(self) -> 'RunRecorder':
+        if self.store is None:
+            try:
+                self.store = RunStore()
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Histórico de execuções indisponível: {e}")
+        self._safely('start_run', self.run_id, self.system, self.inputs)
+        self._started = self._last = time.monotonic()
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _active.reset(self._token)
+        status = 'concluida' if exc is None else 'erro'
+        self._safely('finish_run', self.run_id, status, time.monotonic() - self._started,
+                     self._token_usage, None if exc is None else f"{exc_type.__name__}: {exc}")
+
+    def _record_task(self, output, duration: Optional[float]) -> None:
+        self._safely('record_task', self.run_id, self._position, _task_name(output),
+                     getattr(output, 'agent', None), duration, getattr(output, 'raw', None))
+        self._position += 1
+
+    def on_task(self, output) -> None:
+        """task_callback do Crew: em processo sequencial, a duração vai do fim da tarefa anterior até agora"""
+        now = time.monotonic()
+        duration, self._last = now - self._last, now
+        self._record_task(output, duration)
+
+    def on_crew(self, result) -> None:
+        """Resultado do kickoff: uso de tokens e tarefas que não passaram pelo callback"""
+        usage = getattr(result, 'token_usage', None)
+        if usage is not None:
+            self._token_usage = usage if isinstance(usage, dict) else usage.model_dump()
+        for output in list(getattr(result, 'tasks_output', None) or [])[self._position:]:
+            self._record_task(output, None)
+
+    def add_findings(self, text: str, regulation: Optional[str] = None) -> None:
+        self._safely('record_findings', self.run_id, parse_findings(text, regulation))
+
+
+def record_findings(text: str, regulation: Optional[str] = None) -> None:
+    """Grava os gaps de um relatório na execução ativa (sem execução ativa, não faz nada)"""
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.add_findings(text, regulation)
+
+
+# ========== CLI ==========
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Relatórios do histórico de validações')
+    parser.add_argument('relatorio', choices=['runs', 'agentes', 'gaps'])
+    parser.add_argument('--db', help='Banco SQLite (padrão: VSC_RUN_DB ou output/runs.db)')
+    parser.add_argument('--sistema', help='Filtrar por sistema')
+    parser.add_argument('--desde', help='Filtrar por data de início (AAAA-MM-DD)')
+    parser.add_argument('--limite', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    store = RunStore(args.db)
+    try:
+        if args.relatorio == 'runs':
+            for run in store.runs(args.sistema, args.desde, args.limite):
+                duration = f"{run['duration_s']:.0f}s" if run['duration_s'] is not None else '-'
+                print(f"📋 {run['run_id']}  {run['system']}  {run['status']}  {duration}  "
+                      f"{run['total_tokens'] or 0} tokens")
+        elif args.relatorio == 'agentes':
+            for row in store.slowest_agents(args.limite, args.sistema, args.desde):
+                print(f"⏱️  {row['avg_s']:8.1f}s média  {row['max_s']:8.1f}s máx  "
+                      f"{row['tasks']:5d} tarefa(s)  {row['agent']}")
+        else:
+            for row in store.frequent_gaps(args.limite, args.sistema, args.desde):
+                print(f"⚠️  {row['occurrences']:5d}x em {row['runs']} execução(ões)  "
+                      f"[{row['regulation']}] {row['item']}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Digital Worker VSC - Template AST
+Árvore única para os templates com marcadores {{VARIAVEL}} (TemplateGenerator)
+e [[MARCADOR]] (TemplateProcessor)
+
+O template é compilado uma vez em linhas já classificadas (título, lista,
+tabela...) com os marcadores separados do texto, fragmentos incluídos
+({{> nome}}) e blocos de repetição ({{#each LISTA}} ... {{/each}}).
+Preencher produz um FilledDocument com blocos prontos para os renderizadores
+Markdown, DOCX e PDF (tools/template_render.py), sem gerar e reprocessar
+Markdown intermediário.
+"""
+
+from collections import OrderedDict
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
+import re
+import threading
+
+# Tipos de bloco (mesma classificação linha a linha do conversor Markdown → DOCX)
+BLANK = 'blank'
+HEADING = 'heading'
+STRONG = 'strong'
+BULLET = 'bullet'
+NUMBERED = 'numbered'
+TABLE = 'table'
+PARAGRAPH = 'paragraph'
+
+# Sintaxes de marcador: {{VARIAVEL}} (TemplateGenerator) e [[MARCADOR]] (TemplateProcessor)
+GENERATOR_SYNTAX = '{{'
+PROCESSOR_SYNTAX = '[['
+_DELIMITERS = {
+    GENERATOR_SYNTAX: (r'\{\{', r'\}\}', r'(\w+)'),
+    PROCESSOR_SYNTAX: (r'\[\[', r'\]\]', r'([A-Za-z0-9_]+)'),
+}
+
+
+class _Grammar:
+    """
+    Regexes de marcadores e diretivas para um conjunto de sintaxes
+
+    Cada alternativa tem um único grupo, então `match.lastindex` indica a
+    sintaxe encontrada.
+    """
+
+    __slots__ = ('syntaxes', 'marker', 'each', 'end_each', 'include')
+
+    def __init__(self, syntaxes: Tuple[str, ...]):
+        self.syntaxes = syntaxes
+
+        def alternatives(pattern: str) -> str:
+            return '|'.join(pattern.format(o=o, c=c, k=k)
+                            for o, c, k in (_DELIMITERS[syntax] for syntax in syntaxes))
+
+        self.marker = re.compile(alternatives('{o}{k}{c}'))
+        self.each = re.compile(r'^\s*(?:' + alternatives(r'{o}#each\s+{k}\s*{c}') + r')\s*$')
+        self.end_each = re.compile(r'^\s*(?:' + alternatives(r'{o}/each{c}') + r')\s*$')
+        self.include = re.compile(r'^\s*(?:' + alternatives(r'{o}>\s*([\w./-]+)\s*{c}') + r')\s*$')
+
+    def marker_of(self, match) -> 'Marker':
+        return Marker(match.group(match.lastindex), self.syntaxes[match.lastindex - 1])
+
+
+_GRAMMARS = {
+    None: _Grammar((GENERATOR_SYNTAX, PROCESSOR_SYNTAX)),
+    GENERATOR_SYNTAX: _Grammar((GENERATOR_SYNTAX,)),
+    PROCESSOR_SYNTAX: _Grammar((PROCESSOR_SYNTAX,)),
+}
+
+MARKER_RE = _GRAMMARS[None].marker
+_NUMBERED_RE = re.compile(r'^\d+\.\s')
+
+DEFAULT_FRAGMENTS_DIR = Path(__file__).parent.parent / 'templates' / 'fragments'
+
+
+class Marker:
+    """Marcador no texto do template: {{CHAVE}} ou [[CHAVE]]"""
+
+    __slots__ = ('key', 'syntax')
+
+    def __init__(self, key: str, syntax: str):
+        self.key = key
+        self.syntax = syntax
+
+    def missing(self) -> str:
+        """
+        Texto usado quando a chave não está no contexto
+
+        {{CHAVE}} vira {{MISSING: CHAVE}} (comportamento do TemplateGenerator);
+        [[CHAVE]] permanece no documento para ser apontado no aviso.
+        """
+        if self.syntax == '{{':
+            return f'{{{{MISSING: {self.key}}}}}'
+        return f'[[{self.key}]]'
+
+    def __repr__(self):
+        return f"Marker({self.syntax}{self.key})"
+
+
+Part = Union[str, Marker]
+
+
+def classify(line: str) -> Tuple[str, int, str]:
+    """
+    Classifica uma linha Markdown
+
+    Returns:
+        (tipo do bloco, nível do título, texto exibido)
+    """
+    if not line.strip():
+        return BLANK, 0, ''
+    if line.startswith('# '):
+        return HEADING, 1, line[2:].strip()
+    if line.startswith('## '):
+        return HEADING, 2, line[3:].strip()
+    if line.startswith('### '):
+        return HEADING, 3, line[4:].strip()
+    if line.startswith('**') and line.endswith('**'):
+        return STRONG, 0, line[2:-2]
+    if line.startswith('- '):
+        return BULLET, 0, line[2:].strip()
+    if _NUMBERED_RE.match(line):
+        return NUMBERED, 0, _NUMBERED_RE.sub('', line)
+    if line.startswith('|'):
+        return TABLE, 0, line
+    return PARAGRAPH, 0, line
+
+
+def parse_table_rows(table_lines: List[str]) -> List[List[str]]:
+    """Células de uma tabela Markdown, sem a linha separadora"""
+    rows = []
+    for line in table_lines:
+        # Pular linha separadora (contém apenas -, :, |)
+        if not line.strip('-:| '):
+            continue
+        rows.append([cell.strip() for cell in line.split('|')[1:-1]])
+    return rows
+
+
+class Block:
+    """
+    Bloco do documento preenchido
+
+    `lines` guarda o texto original das linhas do bloco (Markdown exato);
+    os demais campos são a forma semântica usada por DOCX e PDF.
+    """
+
+    __slots__ = ('kind', 'level', 'text', 'lines', 'rows')
+
+    def __init__(self, kind: str, lines: List[str], level: int = 0, text: str = '',
+                 rows: Optional[List[List[str]]] = None):
+        self.kind = kind
+        self.level = level
+        self.text = text
+        self.lines = lines
+        self.rows = rows
+
+    def __repr__(self):
+        return f"Block({self.kind}, {self.text or self.rows!r})"
+
+
+class FilledDocument:
+    """
+    Resultado do preenchimento: linhas preenchidas + marcadores [[...]] sem valor
+
+    Os blocos só são montados quando um renderizador estruturado (DOCX, PDF)
+    pede; a saída Markdown usa as linhas diretamente.
+    """
+
+    def __init__(self, lines: List[str], classes: Optional[List[Optional[Tuple[str, int, str]]]] = None,
+                 missing: Optional[Set[str]] = None):
+        self.lines = lines
+        self.missing = missing or set()
+        self._classes = classes
+
+    @cached_property
+    def blocks(self) -> List[Block]:
+        return build_blocks(self.lines, self._classes)
+
+
+def build_blocks(lines: List[str], classes: Optional[List[Optional[Tuple[str, int, str]]]] = None) -> List[Block]:
+    """
+    Agrupa linhas em blocos (linhas de tabela consecutivas formam um bloco)
+
+    Args:
+        lines: Linhas já preenchidas
+        classes: Classificação pré-calculada por linha (None = classificar agora)
+    """
+    blocks: List[Block] = []
+    table: Optional[Block] = None
+
+    for index, line in enumerate(lines):
+        cls = classes[index] if classes is not None else None
+        kind, level, text = cls if cls is not None else classify(line)
+
+        if kind == TABLE:
+            if table is None:
+                table = Block(TABLE, [])
+                blocks.append(table)
+            table.lines.append(line)
+            continue
+
+        table = None
+        blocks.append(Block(kind, [line], level, text))
+
+    for block in blocks:
+        if block.kind == TABLE:
+            block.rows = parse_table_rows(block.lines)
+
+    return blocks
+
+
+def parse_markdown(markdown_content: str) -> FilledDocument:
+    """Markdown já preenchido → blocos (marcadores restantes ficam como texto)"""
+    return FilledDocument(markdown_content.split('\n'))
+
+
+class _Line:
+    """Linha compilada: partes de texto/marcadores e classificação se for estática"""
+
+    __slots__ = ('parts', 'text', 'cls')
+
+    def __init__(self, parts: Tuple[Part, ...]):
+        self.parts = parts
+        static = all(isinstance(part, str) for part in parts)
+        self.text = ''.join(parts) if static else None
+        # Linhas sem marcador são classificadas uma única vez, na compilação
+        self.cls = classify(self.text) if static else None
+
+
+def _split_markers(line: str, grammar: _Grammar = _GRAMMARS[None]) -> Tuple[Part, ...]:
+    parts: List[Part] = []
+    position = 0
+    for match in grammar.marker.finditer(line):
+        if match.start() > position:
+            parts.append(line[position:match.start()])
+        parts.append(grammar.marker_of(match))
+        position = match.end()
+    if position < len(line):
+        parts.append(line[position:])
+    return tuple(parts)
+
+
+class _Each:
+    """Bloco de repetição {{#each CHAVE}} ... {{/each}}"""
+
+    __slots__ = ('marker', 'body')
+
+    def __init__(self, marker: Marker, body: List[Any]):
+        self.marker = marker
+        self.body = body
+
+
+def _iter_markers(nodes) -> Iterator[Marker]:
+    for node in nodes:
+        if isinstance(node, _Each):
+            yield node.marker
+            yield from _iter_markers(node.body)
+        else:
+            yield from (part for part in node.parts if isinstance(part, Marker))
+
+
+class Template:
+    """
+    Template compilado; use compile_template() para reaproveitar a compilação
+
+    Além dos marcadores, aceita em linhas próprias:
+        {{> fragmento}}       inclui templates/fragments/fragmento.md na compilação
+        {{#each TESTES}}      repete as linhas até {{/each}} para cada item da lista;
+        {{/each}}             marcadores resolvem primeiro no item, depois no contexto
+
+    Dentro do bloco, INDICE é a posição do item (1, 2, ...) e ITEM o próprio
+    item quando ele não é um dicionário.
+
+    `syntax` restringe marcadores e diretivas a '{{' ou '[['; a outra sintaxe
+    fica como texto, como nos processadores antigos. None aceita as duas.
+    """
+
+    def __init__(self, source: str, fragments_dir=None, syntax: Optional[str] = None):
+        self.fragments_dir = Path(fragments_dir) if fragments_dir else DEFAULT_FRAGMENTS_DIR
+        self.syntax = syntax
+        self._grammar = _GRAMMARS[syntax]
+        # Fragmentos incluídos → mtime na compilação (para invalidar o cache)
+        self.includes: Dict[Path, int] = {}
+        self.nodes = self._parse(source.split('\n'), ())
+
+    def _parse(self, source_lines: List[str], stack: Tuple[Path, ...]) -> List[Any]:
+        nodes: List[Any] = []
+        current = nodes
+        open_blocks: List[Tuple[_Each, List[Any], int]] = []
+        grammar = self._grammar
+
+        for number, line in enumerate(source_lines, 1):
+            match = grammar.each.match(line)
+            if match:
+                each = _Each(grammar.marker_of(match), [])
+                current.append(each)
+                open_blocks.append((each, current, number))
+                current = each.body
+                continue
+
+            if grammar.end_each.match(line):
+                if not open_blocks:
+                    raise ValueError(f"Fim de bloco /each sem #each correspondente (linha {number})")
+                _, current, _ = open_blocks.pop()
+                continue
+
+            match = grammar.include.match(line)
+            if match:
+                current.extend(self._include(match.group(match.lastindex), stack))
+                continue
+
+            current.append(_Line(_split_markers(line, grammar)))
+
+        if open_blocks:
+            each, _, number = open_blocks[-1]
+            raise ValueError(f"Bloco #each {each.marker.key} aberto na linha {number} sem /each")
+
+        return nodes
+
+    def _include(self, name: str, stack: Tuple[Path, ...]) -> List[Any]:
+        """Compila o fragmento no lugar da linha de inclusão"""
+        base = self.fragments_dir.resolve()
+        path = (base / name).resolve()
+        if not path.suffix:
+            path = path.with_suffix('.md')
+        if base not in path.parents:
+            raise ValueError(f"Fragmento fora de {self.fragments_dir}: {name}")
+        if path in stack:
+            chain = ' → '.join(p.stem for p in stack + (path,))
+            raise ValueError(f"Inclusão circular de fragmentos: {chain}")
+        if not path.exists():
+            raise FileNotFoundError(f"Fragmento não encontrado: {path}")
+
+        text = path.read_text(encoding='utf-8')
+        self.includes[path] = path.stat().st_mtime_ns
+        # A quebra de linha final do arquivo não vira linha em branco no documento
+        if text.endswith('\n'):
+            text = text[:-1]
+        return self._parse(text.split('\n'), stack + (path,))
+
+    def is_current(self) -> bool:
+        """False se algum fragmento incluído mudou desde a compilação"""
+        for path, mtime_ns in self.includes.items():
+            try:
+                if path.stat().st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    @property
+    def markers(self) -> Set[str]:
+        """Chaves referenciadas pelo template (inclusive listas de #each)"""
+        return {marker.key for marker in _iter_markers(self.nodes)}
+
+    def fill(self, context: Dict[str, Any]) -> FilledDocument:
+        """
+        Preenche os marcadores com o contexto
+
+        Valores com quebra de linha viram várias linhas, classificadas como se
+        tivessem sido escritas no template. O custo é linear no tamanho do
+        documento gerado: cada linha do template é visitada uma vez por item.
+        """
+        lines: List[str] = []
+        classes: List[Optional[Tuple[str, int, str]]] = []
+        missing: Set[str] = set()
+        self._emit(self.nodes, (context,), lines, classes, missing)
+        return FilledDocument(lines, classes, missing)
+
+    def _emit(self, nodes: List[Any], scopes: Tuple[Mapping[str, Any], ...], lines: List[str],
+              classes: List[Optional[Tuple[str, int, str]]], missing: Set[str]) -> None:
+        """Escopos vão do mais interno (item do #each) ao contexto do documento"""
+        for node in nodes:
+            if type(node) is _Each:
+                self._emit_each(node, scopes, lines, classes, missing)
+                continue
+
+            if node.text is not None:
+                lines.append(node.text)
+                classes.append(node.cls)
+                continue
+
+            pieces = []
+            for part in node.parts:
+                if type(part) is str:
+                    pieces.append(part)
+                    continue
+                for scope in scopes:
+                    if part.key in scope:
+                        pieces.append(str(scope[part.key]))
+                        break
+                else:
+                    pieces.append(part.missing())
+                    if part.syntax == '[[':
+                        missing.add(part.missing())
+
+            text = ''.join(pieces)
+            if '\n' in text:
+                for line in text.split('\n'):
+                    lines.append(line)
+                    classes.append(None)
+            else:
+                lines.append(text)
+                classes.append(None)
+
+    def _emit_each(self, node: _Each, scopes: Tuple[Mapping[str, Any], ...], lines: List[str],
+                   classes: List[Optional[Tuple[str, int, str]]], missing: Set[str]) -> None:
+        marker = node.marker
+        for scope in scopes:
+            if marker.key in scope:
+                items = scope[marker.key]
+                break
+        else:
+            if marker.syntax == '[[':
+                missing.add(marker.missing())
+            else:
+                lines.append(marker.missing())
+                classes.append(None)
+            return
+
+        if not isinstance(items, (list, tuple)):
+            items = [items] if isinstance(items, (str, Mapping)) or not isinstance(items, Iterable) else list(items)
+
+        for index, item in enumerate(items, 1):
+            if isinstance(item, Mapping):
+                item_scopes = ({'INDICE': index}, item) + scopes
+            else:
+                item_scopes = ({'INDICE': index, 'ITEM': item},) + scopes
+            self._emit(node.body, item_scopes, lines, classes, missing)
+
+
+_cache: 'OrderedDict[Tuple[str, Optional[str], Optional[str]], Template]' = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 64
+
+
+def compile_template(source: str, fragments_dir=None, syntax: Optional[str] = None) -> Template:
+    """
+    Compila o template (em cache pelo conteúdo, pasta de fragmentos e sintaxe)
+
+    A compilação é refeita se algum fragmento incluído for alterado.
+    """
+    key = (source, str(fragments_dir) if fragments_dir else None, syntax)
+
+    with _cache_lock:
+        template = _cache.get(key)
+        if template is not None:
+            _cache.move_to_end(key)
+
+    if template is not None and template.is_current():
+        return template
+
+    template = Template(source, fragments_dir, syntax)
+    with _cache_lock:
+        _cache[key] = template
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return template
@@ -5,13 +5,34 @@ from pydantic import BaseModel, Field
 from pathlib import Path
 import json
 from datetime import datetime
-import re
+
+from .async_io import read_text, run_blocking, write_bytes
+from .fingerprint import FingerprintManifest, compute_fingerprint
+from .output_manager import resolve_output_path
+from .profiling import span, traced
+from .template_ast import GENERATOR_SYNTAX, FilledDocument, compile_template
+from .template_render import output_format, render_bytes, render_dependencies, render_file, render_markdown
+
+# Mapa de templates
+TEMPLATE_MAP = {
+    'IQ': 'template_iq.md',
+    'OQ': 'template_oq.md',
+    'PQ': 'template_pq.md',
+    'VP': 'template_vp.md',
+    'ARI': 'template_ari.md'
+}
+
+TEMPLATES_DIR = Path(__file__).parent.parent / 'templates'
 
 class TemplateGeneratorInput(BaseModel):
     """Input para TemplateGenerator"""
     protocol_type: str = Field(..., description="Tipo: 'IQ', 'OQ', 'PQ', 'VP', 'ARI'")
     system_data: str = Field(..., description="Dados do sistema em formato JSON")
-    output_path: str = Field(..., description="Caminho para salvar documento gerado")
+    output_path: str = Field(..., description=(
+        "Caminho para salvar documento gerado (.md, .docx ou .pdf). Só o nome do arquivo "
+        "grava em output/<sistema>/<execução>/; aceita {{DATA_DOCUMENTO}} e {{NOME_SISTEMA}} no nome"
+    ))
+    force: bool = Field(False, description="Regenerar mesmo se template e dados não mudaram")
 
 class TemplateGenerator(BaseTool):
     name: str = "Template Generator"
@@ -21,62 +42,120 @@ class TemplateGenerator(BaseTool):
     )
     args_schema: Type[BaseModel] = TemplateGeneratorInput
     
-    def _run(self, protocol_type: str, system_data: str, output_path: str) -> str:
+    @traced()
+    def _run(self, protocol_type: str, system_data: str, output_path: str, force: bool = False) -> str:
         """
         Gera protocolo a partir de template
         
         Args:
             protocol_type: IQ, OQ, PQ, VP, ARI
             system_data: JSON com dados do sistema
-            output_path: Caminho para salvar
+            output_path: Caminho para salvar (ou só o nome, gravado em output/<sistema>/<execução>/)
+            force: Regenerar mesmo se a saída estiver atualizada
         """
         try:
             # Parse system data
             data = json.loads(system_data) if isinstance(system_data, str) else system_data
             
-            # Mapa de templates
-            template_map = {
-                'IQ': 'template_iq.md',
-                'OQ': 'template_oq.md',
-                'PQ': 'template_pq.md',
-                'VP': 'template_vp.md',
-                'ARI': 'template_ari.md'
-            }
+            # Só o nome do arquivo: output/<sistema>/<run_id>/; marcadores no nome são expandidos
+            output_file, output_manager = resolve_output_path(output_path, data)
+            output_path = str(output_file)
             
-            if protocol_type not in template_map:
-                return f"Tipo de protocolo '{protocol_type}' não reconhecido."
+            template_path, error = self._locate_template(protocol_type)
+            if error:
+                return error
             
             # Ler template
-            template_path = Path(__file__).parent.parent / 'templates' / template_map[protocol_type]
+            with span('load', 'generate', template=template_path.name):
+                with open(template_path, 'r', encoding='utf-8') as f:
+                    template_content = f.read()
             
-            if not template_path.exists():
-                return f"Template não encontrado: {template_path}"
-            
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template_content = f.read()
+            # Pular se template e dados são os mesmos da última geração
+            compiled = self._compile(template_content)
+            includes = [*compiled.includes, *render_dependencies(output_path)]
+            # Datas automáticas entram na impressão digital: um documento de outro
+            # dia nunca é reaproveitado com a data de elaboração antiga
+            dates = self._document_dates()
+            fingerprint = compute_fingerprint(template_content, {**data, **dates}, template_path, includes)
+            manifest = FingerprintManifest.for_output(output_path)
+            if not force:
+                if manifest.is_current(output_path, fingerprint):
+                    return self._skipped_message(protocol_type, output_path)
+                # Nova execução: copiar o protocolo de uma execução anterior com as mesmas entradas
+                if output_manager is not None:
+                    previous = manifest.reuse(output_file, fingerprint, output_manager.previous_outputs(output_file))
+                    if previous is not None:
+                        output_manager.record(output_file, protocolo=protocol_type, reaproveitado_de=str(previous))
+                        return self._skipped_message(protocol_type, output_path, previous)
             
             # Preencher template
-            documento = self._fill_template(template_content, data)
-            
-            # Salvar documento
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+            with span('fill', 'generate'):
+                documento = self._fill_document(template_content, data, dates)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(documento)
+            # Salvar documento no formato da extensão (fases 'convert' e 'save')
+            render_file(documento, output_file)
+            manifest.record(output_file, fingerprint)
+            if output_manager is not None:
+                output_manager.record(output_file, protocolo=protocol_type)
             
-            return f"✅ Protocolo {protocol_type} gerado com sucesso!\n\nArquivo: {output_path}\n\nPrévia:\n{documento[:300]}..."
+            return self._success_message(protocol_type, output_path, documento)
             
         except Exception as e:
             return f"❌ Erro ao gerar protocolo: {str(e)}"
     
+    def _locate_template(self, protocol_type: str):
+        """
+        Localiza o template do tipo de protocolo
+        
+        Returns:
+            (caminho do template, mensagem de erro ou None)
+        """
+        if protocol_type not in TEMPLATE_MAP:
+            return None, f"Tipo de protocolo '{protocol_type}' não reconhecido."
+        
+        template_path = TEMPLATES_DIR / TEMPLATE_MAP[protocol_type]
+        
+        if not template_path.exists():
+            return None, f"Template não encontrado: {template_path}"
+        
+        return template_path, None
+    
+    @staticmethod
+    def _success_message(protocol_type: str, output_path: str, documento: FilledDocument) -> str:
+        preview = render_markdown(documento)[:300]
+        return f"✅ Protocolo {protocol_type} gerado com sucesso!\n\nArquivo: {output_path}\n\nPrévia:\n{preview}..."
+    
+    @staticmethod
+    def _skipped_message(protocol_type: str, output_path: str, previous: Optional[Path] = None) -> str:
+        message = f"⏭️ Protocolo {protocol_type} inalterado desde a última geração (use force=True para regenerar)\n\nArquivo: {output_path}"
+        if previous is not None:
+            message += f"\nCopiado de: {previous}"
+        return message
+    
+    @staticmethod
+    def _compile(template: str):
+        """Template compilado (em cache), com fragmentos de templates/fragments"""
+        return compile_template(template, TEMPLATES_DIR / 'fragments', GENERATOR_SYNTAX)
+    
     def _fill_template(self, template: str, data: Dict) -> str:
         """
         Substitui marcadores {{VARIAVEL}} pelos dados reais
         """
-        # Adicionar data atual automaticamente
-        data['DATA_DOCUMENTO'] = datetime.now().strftime('%Y%m%d')
-        data['DATA_ELABORACAO'] = datetime.now().strftime('%d/%m/%Y')
+        return render_markdown(self._fill_document(template, data))
+    
+    @staticmethod
+    def _document_dates() -> Dict[str, str]:
+        """Datas preenchidas automaticamente em todo documento"""
+        now = datetime.now()
+        return {'DATA_DOCUMENTO': now.strftime('%Y%m%d'), 'DATA_ELABORACAO': now.strftime('%d/%m/%Y')}
+    
+    def _fill_document(self, template: str, data: Dict, dates: Optional[Dict[str, str]] = None) -> FilledDocument:
+        """
+        Preenche o template compilado; o resultado alimenta qualquer
+        renderizador (Markdown, DOCX ou PDF) sem novo parsing
+        """
+        # Adicionar data atual automaticamente (as mesmas usadas na impressão digital)
+        data.update(dates or self._document_dates())
         
         # Valores padrão para campos comuns
         defaults = {
@@ -116,16 +195,62 @@ class TemplateGenerator(BaseTool):
         # Mesclar com valores padrão
         full_data = {**defaults, **data}
         
-        # Substituir todos os marcadores {{VARIAVEL}}
-        def replace_marker(match):
-            key = match.group(1)
-            return str(full_data.get(key, f'{{{{MISSING: {key}}}}}'))
-        
-        # Regex para encontrar {{VARIAVEL}}
-        filled_template = re.sub(r'\{\{(\w+)\}\}', replace_marker, template)
-        
-        return filled_template
+        # Substituir todos os marcadores; ausentes viram {{MISSING: VARIAVEL}}
+        return self._compile(template).fill(full_data)
     
-    async def _arun(self, *args, **kwargs) -> str:
-        """Versão assíncrona"""
-        return self._run(*args, **kwargs)
+    @traced()
+    async def _arun(self, protocol_type: str, system_data: str, output_path: str, force: bool = False) -> str:
+        """
+        Versão assíncrona: leitura, preenchimento e gravação rodam no executor
+        limitado, sem bloquear o event loop. Cancelar a tarefa interrompe a
+        geração entre as fases e nunca deixa o arquivo de saída pela metade.
+        """
+        try:
+            data = json.loads(system_data) if isinstance(system_data, str) else system_data
+            
+            # Só o nome do arquivo: output/<sistema>/<run_id>/; marcadores no nome são expandidos
+            output_file, output_manager = resolve_output_path(output_path, data)
+            output_path = str(output_file)
+            
+            template_path, error = self._locate_template(protocol_type)
+            if error:
+                return error
+            
+            with span('load', 'generate', template=template_path.name):
+                template_content = await read_text(template_path)
+            
+            compiled = await run_blocking(self._compile, template_content)
+            includes = [*compiled.includes, *render_dependencies(output_path)]
+            # Datas automáticas entram na impressão digital: um documento de outro
+            # dia nunca é reaproveitado com a data de elaboração antiga
+            dates = self._document_dates()
+            fingerprint = compute_fingerprint(template_content, {**data, **dates}, template_path, includes)
+            manifest = await run_blocking(FingerprintManifest.for_output, output_path)
+            if not force:
+                if await run_blocking(manifest.is_current, output_path, fingerprint):
+                    return self._skipped_message(protocol_type, output_path)
+                if output_manager is not None:
+                    candidates = await run_blocking(output_manager.previous_outputs, output_file)
+                    previous = await run_blocking(manifest.reuse, output_file, fingerprint, candidates)
+                    if previous is not None:
+                        await run_blocking(output_manager.record, output_file, protocolo=protocol_type,
+                                           reaproveitado_de=str(previous))
+                        return self._skipped_message(protocol_type, output_path, previous)
+            
+            with span('fill', 'generate'):
+                documento = await run_blocking(self._fill_document, template_content, data, dates)
+            
+            fmt = output_format(output_path)
+            with span('convert', 'generate', format=fmt):
+                content = await run_blocking(render_bytes, documento, fmt)
+            
+            with span('save', 'generate', output=output_path):
+                await write_bytes(output_path, content)
+            await run_blocking(manifest.record, output_path, fingerprint)
+            if output_manager is not None:
+                await run_blocking(output_manager.record, output_file, protocolo=protocol_type)
+            
+            return self._success_message(protocol_type, output_path, documento)
+            
+        except Exception as e:
+            return f"❌ Erro ao gerar protocolo: {str(e)}"
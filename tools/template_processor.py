@@ -1,23 +1,36 @@
 """
 Template Processor - Processa templates Word/Markdown com marcadores [[...]]
 Preenche marcadores com dados gerados pelos agentes e gera documentos finais
+(DOCX, PDF ou Markdown) a partir do template AST
 """
 
 from docx import Document
-from docx.shared import Pt, RGBColor, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 from pathlib import Path
-import re
 from typing import Dict, Any, List, Optional
 
+from .evidence_store import EvidenceStore
+from .fingerprint import FingerprintManifest, compute_fingerprint
+from .output_manager import atomic_path, resolve_output_path
+from .profiling import span
+from .template_ast import (PROCESSOR_SYNTAX, FilledDocument, Template, compile_template, parse_markdown,
+                           parse_table_rows)
+from .template_render import add_table, build_docx, render_dependencies, render_file, render_markdown
+
 
 class TemplateProcessor:
     """
     Processa templates com marcadores [[NOME_MARCADOR]] e gera documentos finais
     """
     
-    def __init__(self, templates_path="templates"):
+    def __init__(self, templates_path="templates", base_template=None):
+        """
+        Args:
+            templates_path: Pasta dos templates Markdown
+            base_template: Modelo Word (.docx/.dotx) com timbre e estilos da empresa;
+                           padrão: variável TEMPLATE_DOCX ou o modelo do python-docx
+        """
         self.templates_path = Path(templates_path)
+        self.base_template = base_template
     
     def load_template(self, template_name: str) -> str:
         """
@@ -37,6 +50,32 @@ class TemplateProcessor:
         with open(template_file, 'r', encoding='utf-8') as f:
             return f.read()
     
+    def compile(self, template_content: str) -> Template:
+        """
+        Compila o template (em cache), resolvendo inclusões [[> fragmento]]
+        a partir de <templates_path>/fragments
+        """
+        return compile_template(template_content, self.templates_path / 'fragments', PROCESSOR_SYNTAX)
+    
+    def fill(self, template_content: str, context: Dict[str, Any]) -> FilledDocument:
+        """
+        Preenche o template e devolve o documento em blocos, pronto para
+        qualquer renderizador (Markdown, DOCX ou PDF)
+        
+        Args:
+            template_content: Conteúdo do template com marcadores
+            context: Dicionário com valores {NOME_MARCADOR: valor}
+        """
+        document = self.compile(template_content).fill(context)
+        
+        # Verificar marcadores não preenchidos
+        if document.missing:
+            print(f"⚠️  AVISO: {len(document.missing)} marcadores não preenchidos:")
+            for marker in sorted(document.missing):
+                print(f"   - {marker}")
+        
+        return document
+    
     def replace_placeholders(self, template_content: str, context: Dict[str, Any]) -> str:
         """
         Substitui todos os [[MARCADORES]] pelos valores do contexto
@@ -48,22 +87,19 @@ class TemplateProcessor:
         Returns:
             Template preenchido
         """
-        filled_content = template_content
-        
-        # Substituir marcadores
-        for key, value in context.items():
-            placeholder = f"[[{key}]]"
-            filled_content = filled_content.replace(placeholder, str(value))
-        
-        # Verificar marcadores não preenchidos
-        remaining = re.findall(r'\[\[[A-Za-z0-9_]+\]\]', filled_content)
-        if remaining:
-            unique_remaining = set(remaining)
-            print(f"⚠️  AVISO: {len(unique_remaining)} marcadores não preenchidos:")
-            for marker in sorted(unique_remaining):
-                print(f"   - {marker}")
+        return render_markdown(self.fill(template_content, context))
+    
+    def render(self, document: FilledDocument, output_path: str) -> None:
+        """
+        Grava o documento preenchido no formato da extensão (.docx, .pdf ou .md)
         
-        return filled_content
+        Args:
+            document: Documento preenchido por fill()
+            output_path: Caminho do arquivo final
+        """
+        # Fases 'convert' e 'save' registradas por render_file
+        render_file(document, output_path, self.base_template)
+        print(f"✅ Documento salvo: {output_path}")
     
     def markdown_to_docx(self, markdown_content: str, output_path: str) -> None:
         """
@@ -73,69 +109,25 @@ class TemplateProcessor:
             markdown_content: Conteúdo markdown preenchido
             output_path: Caminho para salvar o .docx
         """
-        doc = Document()
+        with span('convert', 'generate'):
+            doc = self._build_docx(markdown_content)
         
-        # Configurar estilos padrão
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Calibri'
-        font.size = Pt(11)
-        
-        lines = markdown_content.split('\n')
-        i = 0
+        with span('save', 'generate', output=output_path):
+            with atomic_path(output_path) as tmp:
+                doc.save(str(tmp))
+        print(f"✅ Documento Word salvo: {output_path}")
+    
+    def _build_docx(self, markdown_content: str) -> Document:
+        """
+        Monta o documento Word em memória a partir do Markdown
         
-        while i < len(lines):
-            line = lines[i]
-            
-            # Linha vazia
-            if not line.strip():
-                i += 1
-                continue
-            
-            # Títulos
-            if line.startswith('# '):
-                heading = doc.add_heading(line[2:].strip(), level=1)
-                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            elif line.startswith('## '):
-                doc.add_heading(line[3:].strip(), level=2)
-            elif line.startswith('### '):
-                doc.add_heading(line[4:].strip(), level=3)
-            
-            # Negrito forte
-            elif line.startswith('**') and line.endswith('**'):
-                para = doc.add_paragraph()
-                run = para.add_run(line[2:-2])
-                run.bold = True
-                run.font.size = Pt(12)
-            
-            # Lista com marcadores
-            elif line.startswith('- '):
-                doc.add_paragraph(line[2:].strip(), style='List Bullet')
-            
-            # Lista numerada
-            elif re.match(r'^\d+\.\s', line):
-                content = re.sub(r'^\d+\.\s', '', line)
-                doc.add_paragraph(content, style='List Number')
-            
-            # Tabela Markdown
-            elif line.startswith('|'):
-                table_lines = []
-                while i < len(lines) and lines[i].startswith('|'):
-                    table_lines.append(lines[i])
-                    i += 1
-                i -= 1  # Voltar 1 pois o loop principal vai incrementar
-                
-                if len(table_lines) > 2:  # Header + separator + data
-                    self._add_table_to_doc(doc, table_lines)
-            
-            # Parágrafo normal
-            else:
-                doc.add_paragraph(line)
-            
-            i += 1
+        Args:
+            markdown_content: Conteúdo markdown preenchido
         
-        doc.save(output_path)
-        print(f"✅ Documento Word salvo: {output_path}")
+        Returns:
+            Documento Word (ainda não salvo)
+        """
+        return build_docx(parse_markdown(markdown_content), self.base_template)
     
     def _add_table_to_doc(self, doc: Document, table_lines: List[str]) -> None:
         """
@@ -145,53 +137,35 @@ class TemplateProcessor:
             doc: Documento Word
             table_lines: Linhas da tabela em Markdown
         """
-        # Parsear células
-        rows_data = []
-        for line in table_lines:
-            cells = [cell.strip() for cell in line.split('|')[1:-1]]  # Remove | inicial e final
-            # Pular linha separadora (contém apenas -, :, |)
-            if all(c in '-:| ' for c in line):
-                continue
-            rows_data.append(cells)
-        
-        if not rows_data:
-            return
-        
-        # Criar tabela
-        num_cols = len(rows_data[0])
-        table = doc.add_table(rows=len(rows_data), cols=num_cols)
-        table.style = 'Light Grid Accent 1'
-        
-        # Preencher células
-        for row_idx, row_data in enumerate(rows_data):
-            for col_idx, cell_value in enumerate(row_data):
-                cell = table.rows[row_idx].cells[col_idx]
-                cell.text = cell_value
-                
-                # Header em negrito
-                if row_idx == 0:
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.bold = True
+        add_table(doc, parse_table_rows(table_lines))
 
 
-def generate_document(tipo_documento: str, context: Dict[str, Any], output_path: str) -> str:
+def generate_document(tipo_documento: str, context: Dict[str, Any], output_path: str,
+                      evidence: Optional[EvidenceStore] = None, force: bool = False,
+                      base_template: Optional[str] = None) -> str:
     """
     Função principal para gerar documentos a partir de templates
     
     Args:
         tipo_documento: Tipo do documento ('QI_ANEXOS', 'OQ_ANEXOS', 'PV_VSC', etc)
-        context: Dicionário com todos os valores para preencher marcadores
-        output_path: Caminho completo para salvar o documento final (.docx)
+        context: Dicionário com todos os valores para preencher marcadores; listas
+                 (ex: casos de teste) alimentam blocos [[#each LISTA]] ... [[/each]]
+        output_path: Caminho do documento final (.docx, .pdf ou .md); só o nome do arquivo
+                     grava em output/<sistema>/<run_id>/. Aceita marcadores no nome
+                     (ex: 'PRT-IQ-{{DATA_DOCUMENTO}}.docx')
+        evidence: Repositório de evidências; preenche os marcadores [[EVIDENCIA_TESTE_*]]
+                  que não vierem no contexto
+        force: Regenerar mesmo se template e contexto não mudaram desde a última geração
+        base_template: Modelo Word (.docx/.dotx) corporativo; padrão: TEMPLATE_DOCX
     
     Returns:
-        Caminho do arquivo gerado
+        Caminho do arquivo gerado (existente, se a geração foi pulada)
     
     Raises:
         ValueError: Se tipo de documento não for suportado
         FileNotFoundError: Se template não existir
     """
-    processor = TemplateProcessor()
+    processor = TemplateProcessor(base_template=base_template)
     
     # Mapear tipo de documento para template
     template_map = {
@@ -211,18 +185,49 @@ def generate_document(tipo_documento: str, context: Dict[str, Any], output_path:
     
     template_name = template_map[tipo_documento]
     
+    if evidence is not None:
+        evidence.flush()
+        context = {**evidence.markers(), **context}
+    
+    output_file, output_manager = resolve_output_path(output_path, context)
+    output_path = str(output_file)
+    
     print(f"📄 Gerando documento: {tipo_documento}")
     print(f"📋 Template: {template_name}")
     print(f"💾 Saída: {output_path}")
     
-    # 1. Carregar template
-    template_content = processor.load_template(template_name)
-    
-    # 2. Substituir marcadores
-    filled_content = processor.replace_placeholders(template_content, context)
-    
-    # 3. Gerar DOCX
-    processor.markdown_to_docx(filled_content, output_path)
+    with span('generate_document', 'generate', tipo=tipo_documento):
+        # 1. Carregar template
+        with span('load', 'generate', template=template_name):
+            template_content = processor.load_template(template_name)
+            compiled = processor.compile(template_content)
+        
+        # Pular documentos cujas entradas não mudaram
+        includes = [*compiled.includes, *render_dependencies(output_path, base_template)]
+        fingerprint = compute_fingerprint(template_content, context,
+                                          processor.templates_path / template_name, includes)
+        manifest = FingerprintManifest.for_output(output_path)
+        if not force:
+            if manifest.is_current(output_path, fingerprint):
+                print(f"⏭️ Inalterado, geração ignorada: {output_path}")
+                return output_path
+            # Nova execução: copiar o documento de uma execução anterior com as mesmas entradas
+            if output_manager is not None:
+                previous = manifest.reuse(output_file, fingerprint, output_manager.previous_outputs(output_file))
+                if previous is not None:
+                    output_manager.record(output_file, tipo=tipo_documento, reaproveitado_de=str(previous))
+                    print(f"⏭️ Inalterado, copiado de {previous}")
+                    return output_path
+        
+        # 2. Preencher marcadores (uma vez, para qualquer formato)
+        with span('fill', 'generate'):
+            document = processor.fill(template_content, context)
+        
+        # 3. Renderizar direto do documento preenchido (.docx, .pdf ou .md)
+        processor.render(document, output_path)
+        manifest.record(output_path, fingerprint)
+        if output_manager is not None:
+            output_manager.record(output_file, tipo=tipo_documento)
     
     return output_path
 
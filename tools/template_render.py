@@ -0,0 +1,330 @@
+"""
+Digital Worker VSC - Template Renderers
+Renderizadores Markdown, DOCX e PDF que consomem o FilledDocument do
+template AST (tools/template_ast.py) diretamente
+
+O formato é escolhido pela extensão do arquivo de saída: .docx, .pdf ou
+Markdown para qualquer outra extensão.
+
+Documentos Word partem de um modelo base carregado uma única vez e clonado
+em memória a cada renderização: o padrão do python-docx (Calibri 11) ou um
+modelo corporativo .docx/.dotx com timbre e estilos, indicado por parâmetro
+ou pela variável TEMPLATE_DOCX.
+"""
+
+from docx import Document
+from docx.shared import Pt
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import copy
+import os
+import threading
+import zipfile
+
+from .output_manager import atomic_path
+from .profiling import span
+from .template_ast import (BLANK, BULLET, HEADING, NUMBERED, STRONG, TABLE,
+                           FilledDocument)
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:
+    SimpleDocTemplate = None
+
+MARKDOWN = 'md'
+DOCX = 'docx'
+PDF = 'pdf'
+
+
+def output_format(output_path) -> str:
+    """Formato de saída pela extensão do arquivo"""
+    suffix = Path(output_path).suffix.lower()
+    if suffix == '.docx':
+        return DOCX
+    if suffix == '.pdf':
+        return PDF
+    return MARKDOWN
+
+
+# ========== MARKDOWN ==========
+
+def render_markdown(document: FilledDocument) -> str:
+    """Markdown preenchido, idêntico ao template com os marcadores substituídos"""
+    return '\n'.join(document.lines)
+
+
+# ========== DOCX ==========
+
+TABLE_STYLE = 'Light Grid Accent 1'
+
+_TEMPLATE_CONTENT_TYPE = b'application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml'
+_DOCUMENT_CONTENT_TYPE = b'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml'
+
+# Caminho do modelo (None = padrão) → (mtime, documento base, nomes de estilos)
+_bases: Dict[Optional[str], Tuple[int, Document, FrozenSet[str]]] = {}
+_bases_lock = threading.Lock()
+
+
+def resolve_base_template(base_template=None) -> Optional[Path]:
+    """Modelo base .docx/.dotx: o argumento ou, se omitido, TEMPLATE_DOCX"""
+    value = base_template or os.environ.get('TEMPLATE_DOCX')
+    return Path(value) if value else None
+
+
+def render_dependencies(output_path, base_template=None) -> List[Path]:
+    """Arquivos além do template que definem a saída (o modelo base, para .docx)"""
+    path = resolve_base_template(base_template)
+    if path is None or output_format(output_path) != DOCX:
+        return []
+    return [path.resolve()]
+
+
+def _as_document_package(data: bytes) -> bytes:
+    """
+    Converte um modelo .dotx em pacote .docx, em memória
+
+    O python-docx só abre pacotes cujo tipo de conteúdo principal é de documento;
+    o conteúdo do modelo (estilos, cabeçalhos, timbre) é o mesmo.
+    """
+    output = BytesIO()
+    with zipfile.ZipFile(BytesIO(data)) as source, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == '[Content_Types].xml':
+                content = content.replace(_TEMPLATE_CONTENT_TYPE, _DOCUMENT_CONTENT_TYPE)
+            target.writestr(item, content)
+    return output.getvalue()
+
+
+def _load_base(path: Optional[Path]) -> Document:
+    if path is None:
+        doc = Document()
+
+        # Configurar estilos padrão
+        style = doc.styles['Normal']
+        font = style.font
+        font.name = 'Calibri'
+        font.size = Pt(11)
+        return doc
+
+    # Modelo corporativo: estilos e timbre vêm do próprio arquivo
+    data = path.read_bytes()
+    if path.suffix.lower() == '.dotx':
+        data = _as_document_package(data)
+    return Document(BytesIO(data))
+
+
+def new_docx(base_template=None) -> Tuple[Document, FrozenSet[str]]:
+    """
+    Cópia em memória do documento base (carregado e configurado uma única vez)
+
+    Args:
+        base_template: Modelo .docx/.dotx (padrão: TEMPLATE_DOCX ou o modelo do python-docx)
+
+    Returns:
+        (documento novo, nomes dos estilos disponíveis no modelo)
+    """
+    path = resolve_base_template(base_template)
+    key = str(path.resolve()) if path else None
+    mtime_ns = path.stat().st_mtime_ns if path else 0
+
+    with _bases_lock:
+        cached = _bases.get(key)
+    if cached is None or cached[0] != mtime_ns:
+        base = _load_base(path)
+        cached = (mtime_ns, base, frozenset(style.name for style in base.styles))
+        with _bases_lock:
+            _bases[key] = cached
+    # Cópia fora do lock: o documento base nunca é alterado depois de entrar no cache
+    return copy.deepcopy(cached[1]), cached[2]
+
+
+def build_docx(document: FilledDocument, base_template=None) -> Document:
+    """
+    Monta o documento Word em memória
+
+    Args:
+        document: Documento preenchido
+        base_template: Modelo .docx/.dotx (padrão: TEMPLATE_DOCX ou o modelo do python-docx)
+
+    Returns:
+        Documento Word (ainda não salvo)
+    """
+    doc, styles = new_docx(base_template)
+
+    # Modelos corporativos podem não ter todos os estilos; usar o parágrafo padrão
+    bullet_style = 'List Bullet' if 'List Bullet' in styles else None
+    number_style = 'List Number' if 'List Number' in styles else None
+    table_style = TABLE_STYLE if TABLE_STYLE in styles else None
+
+    for block in document.blocks:
+        if block.kind == BLANK:
+            continue
+
+        if block.kind == HEADING:
+            if f'Heading {block.level}' in styles:
+                heading = doc.add_heading(block.text, level=block.level)
+            else:
+                heading = doc.add_paragraph()
+                heading.add_run(block.text).bold = True
+            if block.level == 1:
+                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        elif block.kind == STRONG:
+            para = doc.add_paragraph()
+            run = para.add_run(block.text)
+            run.bold = True
+            run.font.size = Pt(12)
+
+        elif block.kind == BULLET:
+            doc.add_paragraph(block.text, style=bullet_style)
+
+        elif block.kind == NUMBERED:
+            doc.add_paragraph(block.text, style=number_style)
+
+        elif block.kind == TABLE:
+            if len(block.lines) > 2:  # Header + separator + data
+                add_table(doc, block.rows, table_style)
+
+        else:
+            doc.add_paragraph(block.text)
+
+    return doc
+
+
+def add_table(doc: Document, rows: List[List[str]], style: Optional[str] = TABLE_STYLE) -> None:
+    """
+    Adiciona tabela ao documento Word (primeira linha em negrito)
+
+    Args:
+        doc: Documento Word
+        rows: Células por linha, sem a linha separadora
+        style: Estilo de tabela (None = estilo padrão do documento)
+    """
+    if not rows:
+        return
+
+    num_cols = len(rows[0])
+    table = doc.add_table(rows=len(rows), cols=num_cols)
+    if style:
+        table.style = style
+
+    for row_idx, row_data in enumerate(rows):
+        for col_idx, cell_value in enumerate(row_data):
+            cell = table.rows[row_idx].cells[col_idx]
+            cell.text = cell_value
+
+            # Header em negrito
+            if row_idx == 0:
+                for paragraph in cell.paragraphs:
+                    for run in paragraph.runs:
+                        run.bold = True
+
+
+# ========== PDF ==========
+
+def render_pdf(document: FilledDocument, output) -> None:
+    """
+    Gera o PDF com reportlab
+
+    Args:
+        document: Documento preenchido
+        output: Caminho ou arquivo binário aberto
+    """
+    if SimpleDocTemplate is None:
+        raise ImportError("reportlab não instalado: pip install reportlab")
+
+    styles = getSampleStyleSheet()
+    heading_styles = {1: styles['Title'], 2: styles['Heading2'], 3: styles['Heading3']}
+    story = []
+
+    for block in document.blocks:
+        if block.kind == BLANK:
+            continue
+
+        if block.kind == HEADING:
+            story.append(Paragraph(escape(block.text), heading_styles[block.level]))
+
+        elif block.kind == STRONG:
+            story.append(Paragraph(f"<b>{escape(block.text)}</b>", styles['Normal']))
+
+        elif block.kind == BULLET:
+            story.append(Paragraph(escape(block.text), styles['Normal'], bulletText='•'))
+
+        elif block.kind == NUMBERED:
+            number = block.lines[0].split('.', 1)[0]
+            story.append(Paragraph(escape(block.text), styles['Normal'], bulletText=f"{number}."))
+
+        elif block.kind == TABLE:
+            if len(block.lines) > 2 and block.rows:
+                num_cols = len(block.rows[0])
+                cells = [[Paragraph(escape(value), styles['BodyText']) for value in row[:num_cols]]
+                         + [''] * (num_cols - len(row)) for row in block.rows]
+                table = Table(cells, repeatRows=1)
+                table.setStyle(TableStyle([
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#DCE6F1')),
+                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ]))
+                story.append(table)
+                story.append(Spacer(1, 6))
+
+        else:
+            story.append(Paragraph(escape(block.text), styles['Normal']))
+
+    SimpleDocTemplate(output, pagesize=A4).build(story)
+
+
+# ========== SAÍDA ==========
+
+def render_bytes(document: FilledDocument, fmt: str, base_template=None) -> bytes:
+    """Documento renderizado no formato pedido, em memória"""
+    if fmt == MARKDOWN:
+        return render_markdown(document).encode('utf-8')
+
+    buffer = BytesIO()
+    if fmt == DOCX:
+        build_docx(document, base_template).save(buffer)
+    elif fmt == PDF:
+        render_pdf(document, buffer)
+    else:
+        raise ValueError(f"Formato de saída não suportado: {fmt}")
+    return buffer.getvalue()
+
+
+def render_file(document: FilledDocument, output_path, base_template=None) -> Path:
+    """
+    Renderiza no formato indicado pela extensão do arquivo
+
+    Fases 'convert' (montagem em memória) e 'save' (gravação) separadas no
+    trace. A gravação é atômica: o arquivo final só aparece completo, mesmo
+    com várias gerações simultâneas na mesma pasta.
+    """
+    output_file = Path(output_path)
+    fmt = output_format(output_file)
+
+    with span('convert', 'generate', format=fmt):
+        if fmt == MARKDOWN:
+            content = render_markdown(document)
+        elif fmt == DOCX:
+            content = build_docx(document, base_template)
+        else:
+            content = render_bytes(document, fmt)
+
+    with span('save', 'generate', output=str(output_file)):
+        with atomic_path(output_file) as tmp:
+            if fmt == MARKDOWN:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            elif fmt == DOCX:
+                content.save(str(tmp))
+            else:
+                tmp.write_bytes(content)
+
+    return output_file